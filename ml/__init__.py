@@ -1,3 +1,22 @@
 """ML package init for static analyzers and imports."""
 
-__all__ = ["data_loader", "train", "predict"]
+__all__ = [
+    "data_loader",
+    "train",
+    "predict",
+    "synthetic_data",
+    "metrics_engine",
+    "train_cache",
+    "profiling",
+    "fast_model",
+    "model_selection",
+    "data_cache",
+    "backfill",
+    "drift",
+    "live_accuracy",
+    "student_history",
+    "age_group_models",
+    "evaluate",
+    "feature_importance",
+    "calibration",
+]
@@ -0,0 +1,88 @@
+"""
+Per-age-group models for ``train.py --per-age-group``.
+
+Vital-sign norms differ sharply between neonates, children, teens, adults and
+seniors, so instead of one global model with per-group thresholds, each age
+group with enough training rows gets an estimator of its own. A global model
+fitted on every row is kept as the fallback for the remaining groups and for
+requests without an age.
+
+The fits are independent, so they run concurrently on a process pool, the
+largest (the global model) submitted first. The result is a
+``predict.AgeGroupModel``, which routes rows to their group's model at serve
+time.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from ml.model_selection import build_estimator  # pragma: no cover
+    from ml.predict import AGE_GROUP_NAMES, AgeGroupModel, age_group_codes  # pragma: no cover
+else:
+    try:
+        from ml.model_selection import build_estimator
+    except Exception:
+        from model_selection import build_estimator
+    try:
+        from ml.predict import AGE_GROUP_NAMES, AgeGroupModel, age_group_codes
+    except Exception:
+        from predict import AGE_GROUP_NAMES, AgeGroupModel, age_group_codes
+
+# Groups with fewer training rows (or a single class) use the global model
+MIN_GROUP_ROWS = 200
+GLOBAL = "global"
+
+
+def _fit(task: tuple[str, int, pd.DataFrame, pd.Series]) -> Any:
+    name, seed, X, y = task
+    return build_estimator(name, seed).fit(X, y)
+
+
+def fit_age_group_models(
+    X: pd.DataFrame,
+    y: pd.Series,
+    estimator: str = "logreg",
+    seed: int = 7,
+    workers: int | None = None,
+    min_rows: int = MIN_GROUP_ROWS,
+) -> tuple[AgeGroupModel, dict[str, Any]]:
+    """
+    Fit the global model and one ``estimator`` per eligible age group.
+
+    ``workers`` processes share the fits (default: one per fit, capped at the
+    CPU count; 1 fits in-process). Returns the routed model and a summary of
+    training rows per group and whether the group got its own model.
+    """
+    codes = age_group_codes(X["age_years"].to_numpy(dtype=np.float64))
+    y_values = np.asarray(y)
+    tasks = {GLOBAL: (estimator, seed, X, y)}
+    summary: dict[str, Any] = {}
+    for i, group in enumerate(AGE_GROUP_NAMES):
+        mask = codes == i
+        n = int(mask.sum())
+        own = n >= min_rows and len(np.unique(y_values[mask])) == 2
+        summary[group] = {"train_rows": n, "model": "own" if own else GLOBAL}
+        if own:
+            tasks[group] = (estimator, seed, X[mask], y[mask])
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        fitted = {group: _fit(task) for group, task in tasks.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {group: pool.submit(_fit, task) for group, task in tasks.items()}
+            fitted = {group: f.result() for group, f in futures.items()}
+
+    fallback = fitted.pop(GLOBAL)
+    return AgeGroupModel(fitted, fallback), {
+        "estimator": estimator,
+        "min_group_rows": min_rows,
+        "workers": workers,
+        "groups": summary,
+    }
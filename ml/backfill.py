@@ -0,0 +1,352 @@
+"""
+Bulk-score historical vital readings with the current model artifact.
+
+Readings are streamed in id order through a server-side cursor, scored in
+vectorized batches, and written back per batch: the scores are COPYed into
+a temporary staging table and applied with one set-based UPDATE. Each batch
+is its own transaction and rewriting a score is harmless, so after each
+commit the last id is saved to a checkpoint file and a rerun resumes after
+it. The checkpoint is tied to the model artifact, so a new model starts a
+new pass.
+
+Scores match app/api/vitals/submit/route.js: ml_prediction is the
+thresholded flag, ml_risk_score the probability and ml_confidence
+``|p - 0.5| * 2``.
+
+Usage:
+    python ml/backfill.py [--batch-size 5000] [--only-missing] [--dry-run]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+import numpy as np
+import pandas as pd
+import psycopg
+
+if TYPE_CHECKING:
+    from ml.data_loader import get_database_url  # pragma: no cover
+    from ml.predict import (  # pragma: no cover
+        MODEL_PATH,
+        get_feature_names,
+        load_metrics,
+        load_model,
+        model_fingerprint,
+        resolve_thresholds,
+    )
+else:
+    try:
+        from ml.data_loader import get_database_url
+    except Exception:
+        from data_loader import get_database_url
+    try:
+        from ml.predict import (
+            MODEL_PATH,
+            get_feature_names,
+            load_metrics,
+            load_model,
+            model_fingerprint,
+            resolve_thresholds,
+        )
+    except Exception:
+        from predict import (
+            MODEL_PATH,
+            get_feature_names,
+            load_metrics,
+            load_model,
+            model_fingerprint,
+            resolve_thresholds,
+        )
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CHECKPOINT_PATH = REPO_ROOT / "ml" / ".cache" / "backfill" / "checkpoint.json"
+
+DEFAULT_BATCH_SIZE = 5_000
+STAGING_TABLE = "ml_backfill_staging"
+SCORE_COLUMNS = ["id", "ml_prediction", "ml_risk_score", "ml_confidence"]
+
+# Model features derived from vital_readings (+ patient age), keyed by name
+SOURCE_QUERY = """
+SELECT
+  vr.id,
+  vr.ml_risk_score,
+  p.age::float AS age_years,
+  vr.blood_pressure_sys AS bp_systolic,
+  vr.blood_pressure_dia AS bp_diastolic,
+  vr.heart_rate,
+  vr.temperature::float AS temperature,
+  vr.respiratory_rate,
+  vr.oxygen_saturation,
+  (vr.blood_pressure_sys - vr.blood_pressure_dia) AS pulse_pressure,
+  0 AS pain_level
+FROM vital_readings vr
+LEFT JOIN patients p ON p.id = vr.patient_id
+"""
+SOURCE_FEATURES = (
+    "age_years",
+    "bp_systolic",
+    "bp_diastolic",
+    "heart_rate",
+    "temperature",
+    "respiratory_rate",
+    "oxygen_saturation",
+    "pulse_pressure",
+    "pain_level",
+)
+
+
+@dataclass
+class Checkpoint:
+    model_sha256: str
+    last_id: str | None = None
+    rows_scored: int = 0
+    rows_skipped: int = 0
+    batches: int = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint | None":
+        if not path.exists():
+            return None
+        return cls(**json.loads(path.read_text()))
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        tmp.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp, path)
+
+
+@dataclass
+class BackfillStats:
+    rows_scored: int = 0
+    rows_skipped: int = 0
+    batches: int = 0
+    seconds: dict[str, float] = field(
+        default_factory=lambda: {"fetch": 0.0, "score": 0.0, "write": 0.0}
+    )
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    def rows_per_second(self) -> float:
+        total = self.total_seconds
+        return (self.rows_scored + self.rows_skipped) / total if total > 0 else 0.0
+
+
+def build_select(feature_names: list[str], only_missing: bool) -> str:
+    unknown = sorted(set(feature_names) - set(SOURCE_FEATURES))
+    if unknown:
+        raise ValueError(f"Model features not available from vital_readings: {unknown}")
+    cols = ", ".join(["id", *feature_names])
+    where = ["(%(after)s::uuid IS NULL OR id > %(after)s::uuid)"]
+    if only_missing:
+        where.append("ml_risk_score IS NULL")
+    return f"SELECT {cols} FROM ({SOURCE_QUERY}) src WHERE {' AND '.join(where)} ORDER BY id"
+
+
+def score_batch(
+    model: Any,
+    batch: pd.DataFrame,
+    feature_names: list[str],
+    metrics: dict[str, Any],
+    threshold: float,
+) -> tuple[pd.DataFrame, int]:
+    """
+    Score one batch of readings; rows with missing features are skipped.
+
+    Returns (scores, n_skipped) where scores has columns id, ml_prediction,
+    ml_risk_score and ml_confidence.
+    """
+    X = batch[feature_names].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+    ok = X.notna().all(axis=1).to_numpy()
+    skipped = int((~ok).sum())
+    X = X[ok]
+    if X.empty:
+        return pd.DataFrame(columns=SCORE_COLUMNS), skipped
+
+    prob = model.predict_proba(X)[:, 1]
+    ages = X["age_years"].to_numpy() if "age_years" in X.columns else None
+    thresholds = resolve_thresholds(metrics, ages, threshold)
+    scores = pd.DataFrame({
+        "id": batch["id"].to_numpy()[ok],
+        "ml_prediction": (prob >= thresholds).astype(np.int32),
+        "ml_risk_score": prob,
+        "ml_confidence": np.abs(prob - 0.5) * 2,
+    })
+    return scores, skipped
+
+
+def iter_batches(
+    conn: psycopg.Connection,
+    feature_names: list[str],
+    after: str | None,
+    batch_size: int,
+    only_missing: bool,
+) -> Iterator[pd.DataFrame]:
+    """Stream readings after ``after`` (by id) through a named cursor."""
+    with conn.cursor(name="ml_backfill_stream") as cur:
+        cur.itersize = batch_size
+        cur.execute(build_select(feature_names, only_missing), {"after": after})
+        columns = [d.name for d in cur.description]
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return
+            df = pd.DataFrame.from_records(rows, columns=columns)
+            df["id"] = df["id"].astype(str)
+            yield df
+
+
+def write_scores(conn: psycopg.Connection, scores: pd.DataFrame) -> int:
+    """COPY scores into the session's staging table and apply them in one UPDATE."""
+    buf = io.StringIO()
+    scores.to_csv(buf, index=False, header=False, float_format="%.17g")
+    with conn.cursor() as cur:
+        with cur.copy(
+            f"COPY {STAGING_TABLE} (id, ml_prediction, ml_risk_score, ml_confidence) "
+            "FROM STDIN WITH (FORMAT csv)"
+        ) as copy:
+            copy.write(buf.getvalue())
+        cur.execute(
+            f"UPDATE vital_readings vr SET "
+            "ml_prediction = s.ml_prediction, "
+            "ml_risk_score = s.ml_risk_score, "
+            "ml_confidence = s.ml_confidence "
+            f"FROM {STAGING_TABLE} s WHERE vr.id = s.id"
+        )
+        updated = cur.rowcount
+    conn.commit()
+    return updated
+
+
+def run_backfill(
+    model_path: Path = MODEL_PATH,
+    checkpoint_path: Path = CHECKPOINT_PATH,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    only_missing: bool = False,
+    dry_run: bool = False,
+    restart: bool = False,
+    max_rows: int | None = None,
+) -> tuple[BackfillStats, Checkpoint]:
+    """
+    Score vital_readings after the checkpoint and write the scores back.
+
+    Args:
+        model_path: Model artifact (a newer sibling model.gvm is preferred)
+        checkpoint_path: Where progress is recorded after each batch
+        batch_size: Rows per fetch, scoring call and UPDATE
+        only_missing: Skip readings that already have an ml_risk_score
+        dry_run: Score without writing scores or the checkpoint
+        restart: Ignore an existing checkpoint
+        max_rows: Stop after about this many rows (whole batches)
+
+    Raises:
+        ValueError: If the checkpoint belongs to a different model artifact
+        RuntimeError: If a database operation fails
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    metrics = load_metrics()
+    model = load_model(model_path)
+    feature_names = get_feature_names(model, metrics)
+    threshold = float(metrics.get("threshold", 0.5))
+    fingerprint = model_fingerprint(model_path)
+
+    checkpoint = None if restart else Checkpoint.load(checkpoint_path)
+    if checkpoint is not None and checkpoint.model_sha256 != fingerprint:
+        raise ValueError(
+            f"Checkpoint {checkpoint_path} was written for a different model. "
+            "Use --restart to rescore from the beginning."
+        )
+    checkpoint = checkpoint or Checkpoint(model_sha256=fingerprint)
+    stats = BackfillStats()
+    db_url = get_database_url()
+
+    try:
+        with psycopg.connect(db_url) as read_conn, psycopg.connect(db_url) as write_conn:
+            write_conn.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} "
+                "(id uuid PRIMARY KEY, ml_prediction integer, "
+                "ml_risk_score numeric, ml_confidence numeric) ON COMMIT DELETE ROWS"
+            )
+            write_conn.commit()
+
+            batches = iter_batches(read_conn, feature_names, checkpoint.last_id, batch_size, only_missing)
+            while max_rows is None or stats.rows_scored + stats.rows_skipped < max_rows:
+                start = time.perf_counter()
+                batch = next(batches, None)
+                stats.seconds["fetch"] += time.perf_counter() - start
+                if batch is None:
+                    break
+
+                start = time.perf_counter()
+                scores, skipped = score_batch(model, batch, feature_names, metrics, threshold)
+                stats.seconds["score"] += time.perf_counter() - start
+
+                if not dry_run and not scores.empty:
+                    start = time.perf_counter()
+                    write_scores(write_conn, scores)
+                    stats.seconds["write"] += time.perf_counter() - start
+
+                stats.rows_scored += len(scores)
+                stats.rows_skipped += skipped
+                stats.batches += 1
+                checkpoint.last_id = str(batch["id"].iloc[-1])
+                checkpoint.rows_scored += len(scores)
+                checkpoint.rows_skipped += skipped
+                checkpoint.batches += 1
+                if not dry_run:
+                    checkpoint.save(checkpoint_path)
+                print(
+                    f"batch {checkpoint.batches}: {checkpoint.rows_scored} scored, "
+                    f"{checkpoint.rows_skipped} skipped, {stats.rows_per_second():,.0f} rows/s"
+                )
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error during backfill: {e}") from e
+
+    return stats, checkpoint
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill ML scores for historical vital readings")
+    parser.add_argument("--model", type=str, default=str(MODEL_PATH))
+    parser.add_argument("--checkpoint", type=str, default=str(CHECKPOINT_PATH))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--only-missing", action="store_true", help="Only score readings without a score")
+    parser.add_argument("--dry-run", action="store_true", help="Score but do not write anything")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--max-rows", type=int, default=None)
+    args = parser.parse_args()
+
+    model_path = Path(args.model).expanduser().resolve()
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model not found: {model_path}. Run: python ml/train.py")
+
+    stats, checkpoint = run_backfill(
+        model_path=model_path,
+        checkpoint_path=Path(args.checkpoint).expanduser().resolve(),
+        batch_size=args.batch_size,
+        only_missing=args.only_missing,
+        dry_run=args.dry_run,
+        restart=args.restart,
+        max_rows=args.max_rows,
+    )
+    print(
+        f"Scored {stats.rows_scored} rows ({stats.rows_skipped} skipped) in "
+        f"{stats.batches} batches: {stats.rows_per_second():,.0f} rows/s"
+    )
+    print(json.dumps({k: round(v, 3) for k, v in stats.seconds.items()}))
+    if checkpoint.last_id:
+        print(f"Checkpoint: {checkpoint.last_id}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare cold load time and resident memory of model.joblib vs model.gvm.
+
+Each measurement runs in a fresh interpreter so import cost (joblib/sklearn
+for the pickle, NumPy only for the fast format) is included, as it is for a
+``predict.py`` invocation or a service worker start.
+
+Usage (from the repo root, after training):
+    python -m ml.benchmarks.artifact_load --repeats 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+ARTIFACTS_DIR = REPO_ROOT / "ml" / "artifacts"
+
+_PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+rss0 = int(open("/proc/self/statm").read().split()[1])
+if sys.argv[1] == "joblib":
+    import joblib
+    t1 = time.perf_counter()
+    model = joblib.load(sys.argv[2])
+else:
+    from ml.fast_model import load_fast_model
+    t1 = time.perf_counter()
+    model = load_fast_model(sys.argv[2])
+t2 = time.perf_counter()
+model.predict_proba([[0.0] * len(model.feature_names_in_)])
+t3 = time.perf_counter()
+rss1 = int(open("/proc/self/statm").read().split()[1])
+import resource
+page = resource.getpagesize()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "load_s": t2 - t1,
+    "first_predict_s": t3 - t2,
+    "rss_delta_bytes": (rss1 - rss0) * page,
+}))
+"""
+
+
+def measure(fmt: str, path: Path, repeats: int) -> dict:
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, fmt, str(path)],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        runs.append(json.loads(out.stdout))
+    return {
+        key: statistics.median(r[key] for r in runs)
+        for key in ("import_s", "load_s", "first_predict_s", "rss_delta_bytes")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark model artifact load time and memory")
+    parser.add_argument("--artifacts", type=str, default=str(ARTIFACTS_DIR))
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    artifacts = Path(args.artifacts).expanduser().resolve()
+    paths = {"joblib": artifacts / "model.joblib", "gvm": artifacts / "model.gvm"}
+    missing = [str(p) for p in paths.values() if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"Missing artifacts: {missing}. Run: python ml/train.py")
+
+    results = {fmt: measure(fmt, path, args.repeats) for fmt, path in paths.items()}
+
+    print(f"{'format':<8} {'import_ms':>10} {'load_us':>10} {'predict_us':>11} {'rss_MiB':>8}")
+    for fmt, r in results.items():
+        print(
+            f"{fmt:<8} {r['import_s'] * 1e3:>10.1f} {r['load_s'] * 1e6:>10.0f} "
+            f"{r['first_predict_s'] * 1e6:>11.0f} {r['rss_delta_bytes'] / 2**20:>8.1f}"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
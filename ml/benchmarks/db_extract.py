@@ -0,0 +1,168 @@
+"""
+Compare training-data extraction methods against a live Postgres.
+
+Methods:
+    read_sql  SELECT * through pandas.read_sql_query (previous loader)
+    stream    server-side cursor, decoded in chunks (data_loader "stream")
+    copy      COPY (SELECT ...) TO STDOUT as CSV (data_loader "copy")
+    parallel  concurrent COPYs of id ranges (data_loader "parallel"), run once
+              per ``--partitions`` value to show throughput vs partition count
+
+By default the methods read ``ml_training_data``. ``--seed-rows N`` instead
+fills an unlogged scratch table with N synthetic rows (via COPY FROM) and
+benchmarks against that, dropping it afterwards unless ``--keep``.
+
+Peak memory is measured with tracemalloc, which does not see Arrow's own
+allocator, so the ``copy`` figure understates its parse buffers.
+
+Usage (from the repo root, DATABASE_URL set):
+    python -m ml.benchmarks.db_extract --seed-rows 1000000 --repeats 3 --partitions 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import statistics
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+import psycopg
+
+from ml.data_loader import (
+    build_training_query,
+    copy_training_data,
+    copy_training_data_parallel,
+    decode_frame,
+    get_database_url,
+    iter_training_chunks,
+)
+from ml.synthetic_data import iter_synthetic_chunks
+
+SCRATCH_TABLE = "ml_bench_training"
+
+
+def _read_sql(view_name: str) -> pd.DataFrame:
+    with psycopg.connect(get_database_url()) as conn, warnings.catch_warnings():
+        # pandas warns about non-SQLAlchemy connections
+        warnings.simplefilter("ignore", UserWarning)
+        df = pd.read_sql_query(build_training_query(view_name, None, columns=None), conn)
+    return decode_frame(df, view_name)
+
+
+def _stream(view_name: str) -> pd.DataFrame:
+    return pd.concat(iter_training_chunks(view_name=view_name), ignore_index=True)
+
+
+def _copy(view_name: str) -> pd.DataFrame:
+    return copy_training_data(view_name=view_name)
+
+
+METHODS = {"read_sql": _read_sql, "stream": _stream, "copy": _copy}
+DEFAULT_PARTITIONS = [1, 2, 4, 8]
+
+
+def seed_table(n_rows: int) -> None:
+    """Create the scratch table and COPY ``n_rows`` synthetic rows into it."""
+    first = True
+    with psycopg.connect(get_database_url()) as conn:
+        with conn.cursor() as cur:
+            for chunk in iter_synthetic_chunks(n_rows):
+                if first:
+                    cols = ", ".join(
+                        f'"{c}" {"integer" if c == "at_risk" else "double precision"}'
+                        for c in chunk.columns
+                    )
+                    names = ", ".join(f'"{c}"' for c in chunk.columns)
+                    cur.execute(f'DROP TABLE IF EXISTS "{SCRATCH_TABLE}"')
+                    # uuid keys like vital_readings, so id-range partitioning applies
+                    cur.execute(
+                        f'CREATE UNLOGGED TABLE "{SCRATCH_TABLE}" '
+                        f"(id uuid PRIMARY KEY DEFAULT gen_random_uuid(), {cols})"
+                    )
+                    first = False
+                buf = io.StringIO()
+                chunk.to_csv(buf, index=False, header=False)
+                with cur.copy(f'COPY "{SCRATCH_TABLE}" ({names}) FROM STDIN WITH (FORMAT csv)') as copy:
+                    copy.write(buf.getvalue())
+        conn.commit()
+
+
+def drop_table() -> None:
+    with psycopg.connect(get_database_url()) as conn:
+        conn.execute(f'DROP TABLE IF EXISTS "{SCRATCH_TABLE}"')
+        conn.commit()
+
+
+def measure(method: str, view_name: str, repeats: int, partitions: int = 1) -> dict:
+    if repeats < 1:
+        raise ValueError("repeats must be at least 1")
+    if method == "parallel":
+        def fn(view: str) -> pd.DataFrame:
+            return copy_training_data_parallel(view_name=view, partitions=partitions)
+    else:
+        fn = METHODS[method]
+    walls, peaks, rows = [], [], 0
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        df = fn(view_name)
+        walls.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        rows = len(df)
+        checksum = float(np.nansum(df.select_dtypes("number").to_numpy()))
+        del df
+    wall = statistics.median(walls)
+    return {
+        "rows": rows,
+        "wall_seconds": wall,
+        "rows_per_second": rows / wall if wall > 0 else None,
+        "peak_mem_bytes": int(statistics.median(peaks)),
+        "checksum": checksum,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Postgres training-data extraction")
+    parser.add_argument("--view", type=str, default="ml_training_data")
+    parser.add_argument("--seed-rows", type=int, default=0, help="Benchmark a synthetic scratch table")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table afterwards")
+    parser.add_argument("--methods", nargs="+", choices=sorted(METHODS), default=list(METHODS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--partitions", type=int, nargs="*", default=DEFAULT_PARTITIONS,
+        help="Partition counts for the parallel method (empty list skips it)",
+    )
+    args = parser.parse_args()
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+
+    view_name = args.view
+    if args.seed_rows:
+        seed_table(args.seed_rows)
+        view_name = SCRATCH_TABLE
+        print(f"Seeded {args.seed_rows:,} rows into {SCRATCH_TABLE}")
+
+    try:
+        results = {m: measure(m, view_name, args.repeats) for m in args.methods}
+        for n in args.partitions:
+            results[f"parallel_{n}"] = measure("parallel", view_name, args.repeats, partitions=n)
+    finally:
+        if args.seed_rows and not args.keep:
+            drop_table()
+
+    print(f"{'method':<12} {'rows':>10} {'seconds':>9} {'rows/s':>12} {'peak_MiB':>9}")
+    for method, r in results.items():
+        print(
+            f"{method:<12} {r['rows']:>10,} {r['wall_seconds']:>9.3f} "
+            f"{r['rows_per_second'] or 0:>12,.0f} {r['peak_mem_bytes'] / 2**20:>9.1f}"
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
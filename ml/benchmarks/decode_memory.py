@@ -0,0 +1,123 @@
+"""
+Memory saved by column projection and compact dtypes in data_loader.
+
+Builds a view-shaped table of synthetic readings (uuid ids, timestamps, role
+enum and integer vitals, like ml_training_data) and compares:
+
+    select_all  every column fetched, each coerced with pd.to_numeric
+                (the loader before projection; metadata ends up as NaN floats)
+    projected   only TRAINING_COLUMNS fetched, decoded with COLUMN_DTYPES
+
+Reported per path: CSV bytes on the wire (as COPY would send them), memory of
+the fetched rows as Python tuples, peak traced memory while decoding and the
+deep size of the decoded DataFrame. Runs offline; no database needed.
+
+Usage (from the repo root):
+    python -m ml.benchmarks.decode_memory --rows 500000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tracemalloc
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from ml.data_loader import TRAINING_COLUMNS, decode_chunk
+from ml.synthetic_data import iter_synthetic_chunks
+
+_LEGACY_METADATA = ["id", "studentId", "patientId", "readingNumber", "submittedAt", "gradedAt"]
+
+
+def view_rows(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    """Synthetic rows with the column set and SQL types of ml_training_data."""
+    vitals = pd.concat(iter_synthetic_chunks(n_rows, seed=seed), ignore_index=True)
+    rng = np.random.default_rng(seed)
+    students = [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, 500)]
+    patients = [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, 50)]
+    df = pd.DataFrame({
+        "id": [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, n_rows)],
+        "student_id": rng.choice(students, n_rows),
+        "patient_id": rng.choice(patients, n_rows),
+        "reading_number": rng.integers(1, 4, n_rows),
+    })
+    for col in TRAINING_COLUMNS:
+        values = vitals[col] if col in vitals else 0
+        df[col] = values if col == "temperature" else np.round(values).astype(np.int64)
+    df["submitted_at"] = pd.Timestamp("2026-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 86400 * 180, n_rows), unit="s"
+    )
+    df["entered_by_role"] = rng.choice(["STUDENT", "INSTRUCTOR"], n_rows, p=[0.9, 0.1])
+    return df
+
+
+def legacy_decode(rows: list[tuple], columns: list[str]) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    df = df.drop(columns=[c for c in _LEGACY_METADATA if c in df.columns], errors="ignore")
+    for col in df.columns:
+        if col != "at_risk":
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.dropna(subset=["at_risk"])
+    df["at_risk"] = pd.to_numeric(df["at_risk"]).astype("int64")
+    return df
+
+
+def _tuples_bytes(rows: list[tuple]) -> int:
+    seen: set[int] = set()
+    total = sys.getsizeof(rows)
+    for row in rows:
+        total += sys.getsizeof(row)
+        for value in row:
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+    return total
+
+
+def measure(view: pd.DataFrame, columns: list[str], decode) -> dict:
+    frame = view[columns]
+    wire = len(frame.to_csv(index=False).encode())
+    rows = list(frame.astype(object).itertuples(index=False, name=None))
+    fetched = _tuples_bytes(rows)
+
+    tracemalloc.start()
+    decoded = decode(rows, columns)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "columns": len(columns),
+        "wire_bytes": wire,
+        "fetched_tuple_bytes": fetched,
+        "decode_peak_bytes": peak,
+        "decoded_bytes": int(decoded.memory_usage(deep=True).sum()),
+        "dtypes": {c: str(t) for c, t in decoded.dtypes.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure memory saved by projection and compact dtypes")
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    view = view_rows(args.rows)
+    results = {
+        "select_all": measure(view, list(view.columns), legacy_decode),
+        "projected": measure(
+            view, list(TRAINING_COLUMNS), lambda rows, cols: decode_chunk(rows, cols, "bench")
+        ),
+    }
+
+    keys = ("wire_bytes", "fetched_tuple_bytes", "decode_peak_bytes", "decoded_bytes")
+    print(f"{args.rows:,} rows")
+    print(f"{'MiB':<22} {'select_all':>12} {'projected':>12} {'saved':>8}")
+    for key in keys:
+        before, after = results["select_all"][key], results["projected"][key]
+        print(f"{key:<22} {before / 2**20:>12.1f} {after / 2**20:>12.1f} {1 - after / before:>8.0%}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
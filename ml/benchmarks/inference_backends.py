@@ -0,0 +1,101 @@
+"""
+Throughput of the service's inference backends under concurrent load.
+
+``--clients`` threads call ``predict_proba`` back to back for ``--seconds``
+with batches of ``--batch-size`` rows, the way the service's threadpool
+does. The threaded default scores in-process on those threads, contending
+for the GIL; the process backend hands each batch to one of N warm workers
+through shared memory (service/inference.py). The table reports rows/s and
+the speed-up over the threaded default for each worker count.
+
+Usage (from the repo root, after training):
+    python -m ml.benchmarks.inference_backends --workers 1 2 4 8 --batch-size 64
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from ml.predict import MODEL_PATH, get_feature_names, load_metrics, load_model
+from ml.service.inference import ProcessPoolModel
+from ml.train import make_synthetic_data
+
+
+def run_load(model: Any, X: pd.DataFrame, clients: int, batch_size: int, seconds: float) -> dict:
+    """Rows scored per second by ``clients`` threads calling ``model`` concurrently."""
+    batches = [X.iloc[i : i + batch_size] for i in range(0, len(X) - batch_size + 1, batch_size)]
+    for batch in batches[:3]:
+        model.predict_proba(batch)
+
+    counts = [0] * clients
+    stop = threading.Event()
+
+    def client(k: int) -> None:
+        i = k
+        while not stop.is_set():
+            model.predict_proba(batches[i % len(batches)])
+            counts[k] += batch_size
+            i += clients
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {"rows": sum(counts), "seconds": elapsed, "rows_per_second": sum(counts) / elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare threaded and process-pool inference throughput")
+    parser.add_argument("--model", type=str, default=str(MODEL_PATH))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=0, help="Concurrent callers (default: 2x max workers)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--out", type=str, default="", help="Write results as JSON")
+    args = parser.parse_args()
+
+    model_path = Path(args.model).expanduser().resolve()
+    model = load_model(model_path)
+    feature_names = get_feature_names(model, load_metrics())
+    X = make_synthetic_data(n=max(20 * args.batch_size, 2000))
+    X = X.reindex(columns=feature_names, fill_value=0.0).astype(float)
+    clients = args.clients or 2 * max(args.workers)
+
+    results = [{"backend": "thread", "workers": 1, **run_load(model, X, clients, args.batch_size, args.seconds)}]
+    for workers in sorted(args.workers):
+        with ProcessPoolModel(model_path, feature_names, workers=workers) as pool:
+            stats = run_load(pool, X, clients, args.batch_size, args.seconds)
+        results.append({"backend": "process", "workers": workers, **stats})
+
+    base = results[0]["rows_per_second"]
+    print(f"{os.cpu_count()} CPUs, {clients} clients, batch size {args.batch_size}")
+    print(f"{'backend':<10}{'workers':>8}{'rows/s':>14}{'speed-up':>10}")
+    for r in results:
+        r["speedup"] = r["rows_per_second"] / base
+        print(f"{r['backend']:<10}{r['workers']:>8}{r['rows_per_second']:>14,.0f}{r['speedup']:>9.2f}x")
+
+    if args.out:
+        out_path = Path(args.out).expanduser().resolve()
+        out_path.write_text(json.dumps({
+            "cpus": os.cpu_count(),
+            "clients": clients,
+            "batch_size": args.batch_size,
+            "results": results,
+        }, indent=2))
+        print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
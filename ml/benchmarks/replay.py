@@ -0,0 +1,177 @@
+"""
+Replay captured /predict traffic against the service and report latency.
+
+Reads a capture written with TRAFFIC_CAPTURE_DIR (service/traffic_capture.py)
+and sends the same bodies in the same order on the same schedule: request i
+is due ``(t_i - t_0) / speed`` seconds after the start, so bursts and idle
+gaps keep their shape at any ``--speed`` (``--speed 0`` sends back to back).
+Sending is open-loop, like real clients: a slow response does not delay the
+requests due after it, up to ``--max-in-flight`` outstanding requests.
+
+Without ``--url`` the app is driven in-process through its ASGI interface
+(ml.service.api with the current artifacts and environment), inside its
+lifespan so background syncs and the inference backend start as they would
+under a server; with ``--url`` any running instance, e.g. a local
+``uvicorn ml.service.api:app``.
+
+Usage (from the repo root):
+    python -m ml.benchmarks.replay ml/logs/traffic --speed 4
+    python -m ml.benchmarks.replay ml/logs/traffic --url http://127.0.0.1:8000 --out replay.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import httpx
+import numpy as np
+
+from ml.service.traffic_capture import read_capture
+
+DEFAULT_MAX_IN_FLIGHT = 256
+PERCENTILES = (50, 90, 99)
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    records: list[dict[str, Any]],
+    speed: float = 1.0,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> list[dict[str, Any]]:
+    """
+    Send ``records`` on their captured schedule scaled by ``1 / speed``.
+
+    Returns one result per record, in capture order: ``status`` (None if the
+    request raised), ``latency`` from send to response and ``lag`` between
+    the due time and the actual send, both in seconds.
+    """
+    if speed < 0:
+        raise ValueError("speed must be >= 0")
+    slots = asyncio.Semaphore(max_in_flight)
+    results: list[dict[str, Any]] = [{} for _ in records]
+    t0 = records[0]["t"] if records else 0.0
+    start = time.perf_counter()
+
+    async def send(i: int, record: dict[str, Any], due: float) -> None:
+        try:
+            sent = time.perf_counter()
+            try:
+                response = await client.post(record["path"], json=record["body"])
+                status = response.status_code
+            except httpx.HTTPError:
+                status = None
+            results[i] = {"status": status, "latency": time.perf_counter() - sent, "lag": sent - due}
+        finally:
+            slots.release()
+
+    tasks = []
+    for i, record in enumerate(records):
+        due = start + (record["t"] - t0) / speed if speed else time.perf_counter()
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        tasks.append(asyncio.create_task(send(i, record, due)))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(results: list[dict[str, Any]], records: list[dict[str, Any]], elapsed: float) -> dict[str, Any]:
+    """Latency percentiles (ms), error count and achieved vs captured request rate."""
+    latency = np.array([r["latency"] for r in results]) * 1000
+    lag = np.array([r["lag"] for r in results]) * 1000
+    statuses = Counter("error" if r["status"] is None else str(r["status"]) for r in results)
+    captured = records[-1]["t"] - records[0]["t"] if len(records) > 1 else 0.0
+    out: dict[str, Any] = {
+        "requests": len(results),
+        "errors": sum(n for s, n in statuses.items() if not s.startswith("2")),
+        "status_counts": dict(statuses),
+        "elapsed_seconds": elapsed,
+        "captured_seconds": captured,
+        "requests_per_second": len(results) / elapsed if elapsed > 0 else None,
+        "captured_requests_per_second": len(records) / captured if captured > 0 else None,
+    }
+    if len(results):
+        out["latency_ms"] = {
+            **{f"p{q}": float(np.percentile(latency, q)) for q in PERCENTILES},
+            "mean": float(latency.mean()),
+            "max": float(latency.max()),
+        }
+        # Large send lag means the replay client itself could not keep up
+        out["send_lag_ms"] = {"p99": float(np.percentile(lag, 99)), "max": float(lag.max())}
+    return out
+
+
+async def run_replay(
+    records: list[dict[str, Any]],
+    app: Any = None,
+    url: str | None = None,
+    speed: float = 1.0,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    timeout: float = 30.0,
+) -> dict[str, Any]:
+    """
+    Replay ``records`` against an ASGI ``app`` in-process or a server at ``url``.
+
+    ASGITransport sends no lifespan events, so an in-process ``app`` is run
+    inside its lifespan context for the duration of the replay.
+    """
+    if (app is None) == (url is None):
+        raise ValueError("Pass exactly one of app or url")
+    lifespan: Any = contextlib.nullcontext()
+    if url is not None:
+        client = httpx.AsyncClient(base_url=url, timeout=timeout, limits=httpx.Limits(max_connections=max_in_flight))
+    else:
+        lifespan = app.router.lifespan_context(app)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay", timeout=timeout)
+    async with lifespan, client:
+        start = time.perf_counter()
+        results = await replay(client, records, speed, max_in_flight)
+        elapsed = time.perf_counter() - start
+    return {"speed": speed, **summarize(results, records, elapsed)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay captured /predict traffic and report latency")
+    parser.add_argument("capture", type=str, help="Capture file or TRAFFIC_CAPTURE_DIR directory")
+    parser.add_argument("--url", type=str, default="", help="Running service (default: in-process ASGI app)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pacing multiplier (0: as fast as possible)")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    parser.add_argument("--limit", type=int, default=0, help="Replay only the first N requests")
+    parser.add_argument("--out", type=str, default="", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    records = read_capture(Path(args.capture).expanduser().resolve())
+    if args.limit:
+        records = records[: args.limit]
+    if not records:
+        raise SystemExit(f"No captured requests in {args.capture}")
+
+    app = None
+    if not args.url:
+        from ml.service.api import app
+
+    report = asyncio.run(
+        run_replay(records, app=app, url=args.url or None, speed=args.speed, max_in_flight=args.max_in_flight)
+    )
+    latency = report["latency_ms"]
+    print(
+        f"{report['requests']} requests at {args.speed:g}x in {report['elapsed_seconds']:.2f}s "
+        f"({report['requests_per_second']:,.1f} req/s), {report['errors']} errors"
+    )
+    print("latency ms  " + "  ".join(f"{k} {v:.2f}" for k, v in latency.items()))
+
+    if args.out:
+        out_path = Path(args.out).expanduser().resolve()
+        out_path.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
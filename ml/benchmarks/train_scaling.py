@@ -0,0 +1,98 @@
+"""
+Scaling benchmark for the training pipeline.
+
+Runs load -> coerce -> split -> fit -> threshold search -> metrics -> dump on
+synthetic data of increasing size and reports per-stage wall time, peak
+memory and the empirical scaling exponent between consecutive sizes
+(``log(t2/t1) / log(n2/n1)``; ~1 is linear, noticeably >1 is superlinear).
+
+Usage (from the repo root):
+    python -m ml.benchmarks.train_scaling --sizes 10000 100000 1000000 --out scaling.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import tempfile
+from pathlib import Path
+
+from ml.profiling import StageProfiler
+from ml.train import load_data, save_artifacts, train_model
+
+DEFAULT_SIZES = [10_000, 30_000, 100_000, 300_000, 1_000_000]
+
+# Exponent above which a stage is flagged as superlinear
+SUPERLINEAR_EXPONENT = 1.2
+
+
+def profile_size(n_rows: int, workers: int, n_bootstrap: int, out_dir: Path) -> dict[str, dict]:
+    profiler = StageProfiler()
+    with profiler.stage("load", rows=n_rows):
+        df = load_data("synthetic", synthetic_rows=n_rows, synthetic_workers=workers)
+    out = train_model(df, n_bootstrap=n_bootstrap, profiler=profiler)
+    with profiler.stage("dump"):
+        save_artifacts(out["model"], out["metrics"], out["eval_report"], artifacts_dir=out_dir)
+    return {
+        s["name"]: {"wall_seconds": s["wall_seconds"], "peak_mem_bytes": s["peak_mem_bytes"]}
+        for s in profiler.report()
+    }
+
+
+def scaling_exponents(results: list[dict]) -> dict[str, list[float | None]]:
+    stages = results[0]["stages"].keys()
+    exponents: dict[str, list[float | None]] = {name: [] for name in stages}
+    for prev, cur in zip(results, results[1:]):
+        ratio_n = cur["n_rows"] / prev["n_rows"]
+        for name in stages:
+            t1 = prev["stages"][name]["wall_seconds"]
+            t2 = cur["stages"][name]["wall_seconds"]
+            exponents[name].append(
+                math.log(t2 / t1) / math.log(ratio_n) if t1 > 0 and t2 > 0 else None
+            )
+    return exponents
+
+
+def format_table(results: list[dict], exponents: dict[str, list[float | None]]) -> str:
+    stages = list(results[0]["stages"])
+    header = f"{'stage':<18}" + "".join(f"{r['n_rows']:>14,}" for r in results) + f"{'exponent':>10}"
+    lines = [header, "wall seconds / peak MiB"]
+    for name in stages:
+        cells = "".join(
+            f"{r['stages'][name]['wall_seconds']:>7.3f}/{r['stages'][name]['peak_mem_bytes'] / 2**20:<6.0f}"
+            for r in results
+        )
+        last = exponents[name][-1] if exponents[name] else None
+        flag = " *" if last is not None and last > SUPERLINEAR_EXPONENT else ""
+        exp = f"{last:>10.2f}{flag}" if last is not None else f"{'-':>10}"
+        lines.append(f"{name:<18}{cells}{exp}")
+    lines.append(f"* exponent > {SUPERLINEAR_EXPONENT} between the two largest sizes")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark training stage scaling on synthetic data")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--workers", type=int, default=1, help="Synthetic generator processes")
+    parser.add_argument("--bootstrap", type=int, default=200)
+    parser.add_argument("--out", type=str, default="", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sorted(args.sizes):
+            stages = profile_size(n_rows, args.workers, args.bootstrap, Path(tmp))
+            results.append({"n_rows": n_rows, "stages": stages})
+            print(f"profiled {n_rows:,} rows")
+
+    exponents = scaling_exponents(results) if len(results) > 1 else {}
+    print(format_table(results, exponents) if exponents else json.dumps(results, indent=2))
+
+    if args.out:
+        out_path = Path(args.out).expanduser().resolve()
+        out_path.write_text(json.dumps({"results": results, "scaling_exponents": exponents}, indent=2))
+        print(f"Wrote {out_path}")
+
+
+if __name__ == "__main__":
+    main()
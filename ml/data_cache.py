@@ -0,0 +1,302 @@
+"""
+Local Parquet cache of the ml_training_data view.
+
+The cache holds the raw view rows (metadata included) in one Parquet file.
+Syncing fetches only rows after the stored watermark: rows at or after the
+largest ``(submitted_at, id)`` seen, minus a lookback window, plus any row
+graded after the newest ``graded_at`` seen (migrations/005), so a reading
+graded or regraded long after it was submitted is fetched again. The
+lookback is only a safety margin for views without ``graded_at``. Fetched
+rows are upserted by id. The watermark is stored in the Parquet schema
+metadata, so data and watermark are always replaced together; caches synced
+before the view had ``graded_at`` should be rebuilt once with ``--full``.
+
+Deleted readings are not detected incrementally; use ``--full`` to rebuild.
+
+Usage:
+    python ml/data_cache.py sync [--full] [--lookback-days 7]
+    python ml/data_cache.py info
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+
+import pandas as pd
+import psycopg
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from ml.data_loader import decode_frame, get_database_url, read_copy_csv  # pragma: no cover
+else:
+    try:
+        from ml.data_loader import decode_frame, get_database_url, read_copy_csv
+    except Exception:
+        from data_loader import decode_frame, get_database_url, read_copy_csv
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DATA_CACHE_PATH = REPO_ROOT / "ml" / ".cache" / "data" / "ml_training_data.parquet"
+
+DEFAULT_LOOKBACK = timedelta(days=7)
+WATERMARK_KEY = b"gitvitals.watermark"
+KEY_COLUMNS = ("id", "submitted_at")
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """Position of the newest cached row, ``(submitted_at, id)``, and the newest grade."""
+
+    submitted_at: datetime
+    id: str
+    graded_at: datetime | None = None
+
+    def to_json(self) -> dict[str, str | None]:
+        return {
+            "submitted_at": self.submitted_at.isoformat(),
+            "id": self.id,
+            "graded_at": self.graded_at.isoformat() if self.graded_at else None,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, str | None]) -> "Watermark":
+        graded_at = data.get("graded_at")
+        return cls(
+            datetime.fromisoformat(data["submitted_at"]),
+            data["id"],
+            datetime.fromisoformat(graded_at) if graded_at else None,
+        )
+
+
+@dataclass(frozen=True)
+class SyncResult:
+    fetched: int
+    inserted: int
+    updated: int
+    total: int
+    watermark: Watermark | None
+
+
+def read_cache_metadata(path: Path = DATA_CACHE_PATH) -> dict[str, Any] | None:
+    """Sync metadata stored with the cache (watermark, view, sync time), or None."""
+    if not Path(path).exists():
+        return None
+    meta = pq.read_schema(path).metadata or {}
+    if WATERMARK_KEY not in meta:
+        return None
+    return json.loads(meta[WATERMARK_KEY])
+
+
+def compute_watermark(df: pd.DataFrame) -> Watermark | None:
+    if df.empty:
+        return None
+    newest = df["submitted_at"].max()
+    last_id = df.loc[df["submitted_at"] == newest, "id"].max()
+    graded = df["graded_at"].max() if "graded_at" in df.columns else pd.NaT
+    return Watermark(
+        newest.to_pydatetime(),
+        str(last_id),
+        None if pd.isna(graded) else graded.to_pydatetime(),
+    )
+
+
+def build_sync_query(
+    view_name: str,
+    watermark: Watermark | None,
+    lookback: timedelta = DEFAULT_LOOKBACK,
+) -> tuple[str, tuple]:
+    """
+    SELECT for rows after the watermark and its parameters.
+
+    Rows submitted after the watermark (minus ``lookback``) or graded after
+    its ``graded_at`` are selected.
+    """
+    query = f'SELECT * FROM "{view_name}"'
+    if watermark is None:
+        return query, ()
+    if lookback > timedelta(0):
+        where, params = "submitted_at >= %s", (watermark.submitted_at - lookback,)
+    else:
+        where, params = "(submitted_at, id::text) > (%s, %s)", (watermark.submitted_at, watermark.id)
+    if watermark.graded_at is not None:
+        where, params = f"{where} OR graded_at > %s", (*params, watermark.graded_at)
+    return f"{query} WHERE {where}", params
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df["id"] = df["id"].astype(str)
+    df["submitted_at"] = pd.to_datetime(df["submitted_at"], utc=True, format="ISO8601")
+    if "graded_at" in df.columns:
+        df["graded_at"] = pd.to_datetime(df["graded_at"], utc=True, format="ISO8601")
+    return df
+
+
+def fetch_rows(
+    view_name: str,
+    watermark: Watermark | None,
+    lookback: timedelta = DEFAULT_LOOKBACK,
+) -> pd.DataFrame:
+    """COPY the rows selected by build_sync_query out of Postgres, metadata included."""
+    query, params = build_sync_query(view_name, watermark, lookback)
+    sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+    try:
+        with psycopg.connect(get_database_url()) as conn:
+            with conn.cursor() as cur:
+                with cur.copy(sql, params or None) as copy:
+                    df = read_copy_csv(copy, string_columns=KEY_COLUMNS)
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when syncing {view_name}: {e}") from e
+
+    missing = [c for c in KEY_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"{view_name} is missing columns required for caching: {missing}")
+    return _normalize(df)
+
+
+def merge_rows(cached: pd.DataFrame | None, fresh: pd.DataFrame) -> tuple[pd.DataFrame, int, int]:
+    """
+    Upsert ``fresh`` into ``cached`` by id; fresh rows win.
+
+    Returns (merged, inserted, updated). The result is sorted by
+    ``(submitted_at, id)`` so the file layout is deterministic.
+    """
+    if cached is None or cached.empty:
+        merged, inserted, updated = fresh, len(fresh), 0
+    elif fresh.empty:
+        merged, inserted, updated = cached, 0, 0
+    else:
+        known = fresh["id"].isin(cached["id"])
+        updated = int(known.sum())
+        inserted = len(fresh) - updated
+        merged = pd.concat(
+            [cached[~cached["id"].isin(fresh["id"])], fresh],
+            ignore_index=True,
+        )
+    merged = merged.sort_values(["submitted_at", "id"], kind="stable").reset_index(drop=True)
+    return merged, inserted, updated
+
+
+def _write(df: pd.DataFrame, path: Path, metadata: dict[str, Any]) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema_meta = dict(table.schema.metadata or {})
+    schema_meta[WATERMARK_KEY] = json.dumps(metadata).encode()
+    table = table.replace_schema_metadata(schema_meta)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename: readers (and existing memory maps) keep the old file
+    tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def sync_training_cache(
+    path: Path = DATA_CACHE_PATH,
+    view_name: str = "ml_training_data",
+    lookback: timedelta = DEFAULT_LOOKBACK,
+    full: bool = False,
+) -> SyncResult:
+    """
+    Bring the local cache up to date with ``view_name``.
+
+    Args:
+        path: Parquet file holding the cache
+        view_name: View (or table) to mirror
+        lookback: Re-fetch window before the watermark, a safety margin for
+            relabels not caught by the graded_at watermark
+        full: Ignore the existing cache and fetch everything
+
+    Returns:
+        SyncResult with row counts and the new watermark
+    """
+    path = Path(path)
+    meta = None if full else read_cache_metadata(path)
+    if meta is not None and meta.get("view") != view_name:
+        raise ValueError(f"Cache at {path} mirrors {meta.get('view')}, not {view_name}")
+
+    watermark = Watermark.from_json(meta["watermark"]) if meta and meta.get("watermark") else None
+    cached = _normalize(pq.read_table(path).to_pandas()) if meta is not None else None
+
+    fresh = fetch_rows(view_name, watermark, lookback)
+    merged, inserted, updated = merge_rows(cached, fresh)
+    new_watermark = compute_watermark(merged)
+
+    _write(
+        merged,
+        path,
+        {
+            "view": view_name,
+            "watermark": new_watermark.to_json() if new_watermark else None,
+            "lookback_seconds": lookback.total_seconds(),
+            "synced_at": datetime.now(timezone.utc).isoformat(),
+            "rows": len(merged),
+        },
+    )
+    return SyncResult(len(fresh), inserted, updated, len(merged), new_watermark)
+
+
+def read_training_cache(
+    path: Path = DATA_CACHE_PATH,
+    view_name: str = "ml_training_data",
+    keep: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Load training data (features + at_risk) from the cache.
+
+    Only the training columns, plus the metadata columns in ``keep``, are
+    read, through a memory map of the file.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No training cache at {path}. Run: python ml/data_cache.py sync"
+        )
+    schema = pq.read_schema(path)
+    columns = decode_frame(pd.DataFrame(columns=schema.names), view_name, keep).columns
+    table = pq.read_table(path, columns=list(columns), memory_map=True)
+    df = decode_frame(table.to_pandas(), view_name, keep)
+    if df.empty:
+        raise ValueError(f"Training cache at {path} contains no labeled rows")
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the local training data cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sync = sub.add_parser("sync", help="Fetch new and relabeled rows from Postgres")
+    sync.add_argument("--full", action="store_true", help="Rebuild the cache from scratch")
+    sync.add_argument("--lookback-days", type=float, default=DEFAULT_LOOKBACK.days)
+    sub.add_parser("info", help="Show the cache watermark and size")
+    for p in (sync, sub.choices["info"]):
+        p.add_argument("--path", type=str, default=str(DATA_CACHE_PATH))
+        p.add_argument("--view", type=str, default="ml_training_data")
+    args = parser.parse_args()
+
+    path = Path(args.path).expanduser().resolve()
+    if args.command == "sync":
+        result = sync_training_cache(
+            path,
+            view_name=args.view,
+            lookback=timedelta(days=args.lookback_days),
+            full=args.full,
+        )
+        print(
+            f"Fetched {result.fetched} rows ({result.inserted} new, {result.updated} updated); "
+            f"cache now has {result.total} rows"
+        )
+        if result.watermark:
+            print(f"Watermark: {result.watermark.submitted_at.isoformat()} / {result.watermark.id}")
+            if result.watermark.graded_at:
+                print(f"Graded watermark: {result.watermark.graded_at.isoformat()}")
+    else:
+        meta = read_cache_metadata(path)
+        print(json.dumps(meta, indent=2) if meta else f"No training cache at {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,37 @@ Connects to Supabase Postgres and loads training data from ml_training_data view
 """
 from __future__ import annotations
 
+import argparse
+import io
+import json
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NamedTuple, Sequence
 
+import numpy as np
 import pandas as pd
 import psycopg
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow is optional for the COPY path
+    pa = pa_csv = None
+
+if TYPE_CHECKING:
+    from ml.profiling import NULL_PROFILER, StageProfiler  # pragma: no cover
+else:
+    try:
+        from ml.profiling import NULL_PROFILER, StageProfiler
+    except Exception:
+        from profiling import NULL_PROFILER, StageProfiler
+
+
 def get_database_url() -> str:
     """
     Get database connection URL from environment.
@@ -23,61 +49,601 @@ def get_database_url() -> str:
     return url
 
 
+# Metadata columns dropped before training (keep only features + target)
+METADATA_COLUMNS = [
+    "id", "studentId", "patientId", "readingNumber", "submittedAt", "gradedAt",
+    # ml_training_data spells them in snake_case
+    "student_id", "patient_id", "reading_number", "submitted_at", "entered_by_role", "graded_at",
+    # Patient reference vitals; inputs to deviation features, not features themselves
+    "ref_bp_systolic", "ref_bp_diastolic", "ref_heart_rate", "ref_temperature",
+    "ref_respiratory_rate", "ref_oxygen_saturation",
+]
+
+TARGET_COLUMN = "at_risk"
+
+# Model features exposed by ml_training_data
+FEATURE_COLUMNS = (
+    "bp_systolic",
+    "bp_diastolic",
+    "heart_rate",
+    "temperature",
+    "respiratory_rate",
+    "oxygen_saturation",
+    "pulse_pressure",
+    "pain_level",
+)
+
+# Default projection: only what training needs crosses the wire
+TRAINING_COLUMNS = FEATURE_COLUMNS + (TARGET_COLUMN,)
+
+# Compact dtypes applied at decode time. Integer columns holding NULLs fall
+# back to the nullable pandas type; columns not listed are coerced to float64.
+COLUMN_DTYPES: dict[str, str] = {
+    "bp_systolic": "int16",
+    "bp_diastolic": "int16",
+    "heart_rate": "int16",
+    "respiratory_rate": "int16",
+    "oxygen_saturation": "int16",
+    "pulse_pressure": "int16",
+    "pain_level": "int16",
+    "temperature": "float32",
+    "at_risk": "int8",
+    "entered_by_role": "category",
+}
+
+DEFAULT_CHUNK_ROWS = 50_000
+DEFAULT_ITERSIZE = 10_000
+
+# Materialized copy of ml_training_data (migrations/002) and its refresh log
+SNAPSHOT_VIEW = "ml_training_snapshot"
+REFRESH_LOG_TABLE = "ml_snapshot_refreshes"
+
+# Extraction methods for load_training_data_from_db
+DB_METHODS = ("stream", "copy", "parallel")
+DEFAULT_PARTITIONS = 4
+
+
+class ArrayChunk(NamedTuple):
+    """Training rows as a float64 feature matrix plus an int8 target vector."""
+
+    X: np.ndarray
+    y: np.ndarray
+    feature_names: list[str]
+
+
+def build_training_query(
+    view_name: str,
+    limit: int | None,
+    columns: Sequence[str] | None = TRAINING_COLUMNS,
+    where: str = "",
+    order_by: str = "",
+) -> str:
+    """SELECT over ``view_name`` projecting ``columns`` plus the target (None: every column)."""
+    if columns is None:
+        projection = "*"
+    else:
+        names = list(dict.fromkeys([*columns, TARGET_COLUMN]))
+        projection = ", ".join(f'"{c}"' for c in names)
+    query = f'SELECT {projection} FROM "{view_name}"'
+    if where:
+        query += f" WHERE {where}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if limit is not None and limit > 0:
+        query += f" LIMIT {limit}"
+    return query
+
+
+def decode_chunk(
+    rows: list[tuple],
+    columns: list[str],
+    view_name: str,
+    keep: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Turn fetched rows into a typed DataFrame of numeric features and the target.
+
+    Each column is read straight out of the row tuples into its COLUMN_DTYPES
+    array with ``np.fromiter``; no object matrix is built. Columns that do not
+    convert cleanly (NULLs, text) go through ``pd.to_numeric`` instead.
+    """
+    keep = set(keep)
+    n = len(rows)
+    data: dict[str, Any] = {}
+    for i, name in enumerate(columns):
+        if name in METADATA_COLUMNS and name not in keep:
+            continue
+        dtype = COLUMN_DTYPES.get(name, "float64")
+        values = map(itemgetter(i), rows)
+        if dtype == "category":
+            data[name] = pd.Categorical(list(values))
+            continue
+        try:
+            data[name] = np.fromiter(values, dtype=dtype, count=n)
+        except (TypeError, ValueError, OverflowError):
+            data[name] = pd.Series([row[i] for row in rows], dtype=object)
+    return decode_frame(pd.DataFrame(data, index=pd.RangeIndex(n)), view_name, keep)
+
+
+def _cast(col: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "category":
+        return col.astype("category")
+    if col.dtype == object:
+        col = pd.to_numeric(col, errors="coerce")
+    if np.dtype(dtype).kind in "iu" and col.isna().any():
+        # e.g. int16 -> Int16, which can hold missing values
+        return col.astype(dtype.capitalize())
+    return col.astype(dtype)
+
+
+def decode_frame(
+    df: pd.DataFrame,
+    view_name: str,
+    keep: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Drop metadata and apply COLUMN_DTYPES to a raw training frame.
+
+    Metadata columns named in ``keep`` (e.g. an explicitly projected
+    ``entered_by_role``) survive; those without a COLUMN_DTYPES entry, like
+    ids and timestamps, are passed through unconverted.
+    """
+    if TARGET_COLUMN not in df.columns:
+        raise ValueError(f"Target column '{TARGET_COLUMN}' not found in {view_name}")
+
+    keep = set(keep)
+    df = df.drop(columns=[c for c in METADATA_COLUMNS if c in df.columns and c not in keep])
+
+    # Drop rows with NaN in target
+    target = pd.to_numeric(df[TARGET_COLUMN], errors="coerce")
+    if target.isna().any():
+        df = df[target.notna().to_numpy()]
+        target = target[target.notna()]
+
+    out = {}
+    for col in df.columns:
+        series = target if col == TARGET_COLUMN else df[col]
+        if col in COLUMN_DTYPES:
+            out[col] = _cast(series, COLUMN_DTYPES[col])
+        elif col in keep:
+            out[col] = series
+        elif series.dtype.kind in "biuf":
+            out[col] = series.astype(np.float64)
+        else:
+            out[col] = pd.to_numeric(series, errors="coerce").astype(np.float64)
+    return pd.DataFrame(out).reset_index(drop=True)
+
+
+def to_array_chunk(df: pd.DataFrame) -> ArrayChunk:
+    feature_names = [c for c in df.columns if c != "at_risk"]
+    return ArrayChunk(
+        X=df[feature_names].to_numpy(dtype=np.float64),
+        y=df["at_risk"].to_numpy(dtype=np.int8),
+        feature_names=feature_names,
+    )
+
+
+def iter_training_chunks(
+    limit: int | None = None,
+    view_name: str = "ml_training_data",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    itersize: int = DEFAULT_ITERSIZE,
+    as_numpy: bool = False,
+    columns: Sequence[str] | None = TRAINING_COLUMNS,
+) -> Iterator[pd.DataFrame] | Iterator[ArrayChunk]:
+    """
+    Stream training data through a server-side (named) cursor.
+
+    Rows are fetched from Postgres ``itersize`` at a time and decoded into
+    chunks of about ``chunk_rows`` rows, so memory stays bounded by one chunk
+    no matter how large the view is.
+
+    Args:
+        limit: Optional row limit for testing (default: all rows)
+        view_name: Name of the SQL view to query (default: ml_training_data)
+        chunk_rows: Rows per yielded chunk
+        itersize: Rows per server round trip (FETCH FORWARD size)
+        as_numpy: Yield ArrayChunk (float64 X, int8 y) instead of DataFrames
+        columns: Columns to select (the target is always added); None selects all
+
+    Yields:
+        Typed DataFrame chunks (features + at_risk) or ArrayChunk tuples
+
+    Raises:
+        ValueError: If DATABASE_URL is not set or the target column is missing
+        RuntimeError: If the database connection or query fails
+    """
+    if chunk_rows <= 0 or itersize <= 0:
+        raise ValueError("chunk_rows and itersize must be positive")
+
+    db_url = get_database_url()
+    query = build_training_query(view_name, limit, columns)
+    keep = columns or ()
+
+    def emit(rows: list[tuple], names: list[str]):
+        df = decode_chunk(rows, names, view_name, keep)
+        return to_array_chunk(df) if as_numpy else df
+
+    try:
+        with psycopg.connect(db_url) as conn:
+            with conn.cursor(name="ml_training_stream") as cur:
+                cur.itersize = itersize
+                cur.execute(query)
+                names = [d.name for d in cur.description]
+                buffer: list[tuple] = []
+                while True:
+                    rows = cur.fetchmany(itersize)
+                    if not rows:
+                        break
+                    buffer.extend(rows)
+                    if len(buffer) >= chunk_rows:
+                        yield emit(buffer, names)
+                        buffer = []
+                if buffer:
+                    yield emit(buffer, names)
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when querying {view_name}: {e}") from e
+
+
+def view_columns(view_name: str) -> list[str]:
+    """Column names of ``view_name``, read from an empty result set."""
+    try:
+        with psycopg.connect(get_database_url()) as conn:
+            with conn.cursor() as cur:
+                cur.execute(f'SELECT * FROM "{view_name}" LIMIT 0')
+                return [d.name for d in cur.description]
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when querying {view_name}: {e}") from e
+
+
+class CopyStream(io.RawIOBase):
+    """Readable binary stream over the data blocks of a ``COPY ... TO STDOUT``."""
+
+    def __init__(self, blocks: Iterable[bytes]):
+        self._blocks = iter(blocks)
+        self._pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._pending:
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._pending = memoryview(block).cast("B")
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+def read_copy_csv(
+    blocks: Iterable[bytes],
+    string_columns: Iterable[str] = (),
+) -> pd.DataFrame:
+    """
+    Parse ``COPY ... (FORMAT csv, HEADER true)`` output into a DataFrame as-is.
+
+    With pyarrow the CSV is decoded straight into typed Arrow columns (multi-
+    threaded, no Python objects per cell); otherwise pandas' C parser is used.
+    ``string_columns`` are kept as text instead of being type-inferred.
+    """
+    stream = io.BufferedReader(CopyStream(blocks), buffer_size=1 << 20)
+    string_columns = list(string_columns)
+    if pa_csv is not None:
+        options = pa_csv.ConvertOptions(column_types={c: pa.string() for c in string_columns})
+        return pa_csv.read_csv(stream, convert_options=options).to_pandas()
+    return pd.read_csv(stream, dtype={c: str for c in string_columns})
+
+
+def parse_copy_csv(
+    blocks: Iterable[bytes],
+    view_name: str = "ml_training_data",
+    keep: Iterable[str] = (),
+) -> pd.DataFrame:
+    """Parse ``COPY`` CSV output into a typed training frame (features + at_risk)."""
+    return decode_frame(read_copy_csv(blocks), view_name, keep)
+
+
+def copy_training_data(
+    limit: int | None = None,
+    view_name: str = "ml_training_data",
+    columns: Sequence[str] | None = TRAINING_COLUMNS,
+) -> pd.DataFrame:
+    """
+    Bulk-extract training data with ``COPY (SELECT ...) TO STDOUT`` in CSV.
+
+    Postgres streams the result as CSV blocks that are parsed directly into
+    typed columns, avoiding per-row tuple construction on the client.
+
+    Raises:
+        ValueError: If DATABASE_URL is not set or the target column is missing
+        RuntimeError: If the database connection or COPY fails
+    """
+    db_url = get_database_url()
+    query = build_training_query(view_name, limit, columns)
+    sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+
+    try:
+        with psycopg.connect(db_url) as conn:
+            with conn.cursor() as cur:
+                with cur.copy(sql) as copy:
+                    return parse_copy_csv(copy, view_name, columns or ())
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when copying {view_name}: {e}") from e
+
+
+def partition_bounds(n_partitions: int) -> list[tuple[str | None, str | None]]:
+    """
+    Split the uuid key space into ``n_partitions`` equal, contiguous ranges.
+
+    Reading ids come from gen_random_uuid(), so equal-width ranges hold about
+    the same number of rows. Bounds are ``[low, high)``; None is unbounded.
+    """
+    if n_partitions <= 0:
+        raise ValueError("n_partitions must be positive")
+    step = (1 << 128) // n_partitions
+    edges = [str(uuid.UUID(int=i * step)) for i in range(1, n_partitions)]
+    return list(zip([None, *edges], [*edges, None]))
+
+
+def _partition_query(
+    view_name: str,
+    columns: Sequence[str] | None,
+    low: str | None,
+    high: str | None,
+) -> tuple[str, tuple]:
+    conditions, params = [], []
+    if low is not None:
+        conditions.append("id >= %s::uuid")
+        params.append(low)
+    if high is not None:
+        conditions.append("id < %s::uuid")
+        params.append(high)
+    # Ordering by id inside each range makes the assembled result deterministic
+    query = build_training_query(view_name, None, columns, where=" AND ".join(conditions), order_by="id")
+    return query, tuple(params)
+
+
+def copy_training_data_parallel(
+    view_name: str = "ml_training_data",
+    columns: Sequence[str] | None = TRAINING_COLUMNS,
+    partitions: int = DEFAULT_PARTITIONS,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    COPY ``partitions`` id ranges concurrently and concatenate them in key order.
+
+    Each of the ``workers`` threads (default: one per partition) holds its own
+    connection, so the ranges are read by separate Postgres backends; CSV
+    parsing in pyarrow releases the GIL. Rows come back sorted by id, so the
+    result does not depend on the partition or worker count.
+
+    Raises:
+        ValueError: If DATABASE_URL is not set or the target column is missing
+        RuntimeError: If a database connection or COPY fails
+    """
+    db_url = get_database_url()
+    bounds = partition_bounds(partitions)
+    workers = min(workers or partitions, partitions)
+    keep = columns or ()
+
+    local = threading.local()
+    connections: list[psycopg.Connection] = []
+    lock = threading.Lock()
+
+    def connection() -> psycopg.Connection:
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = psycopg.connect(db_url)
+            with lock:
+                connections.append(conn)
+        return conn
+
+    def fetch(bound: tuple[str | None, str | None]) -> pd.DataFrame:
+        query, params = _partition_query(view_name, columns, *bound)
+        sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+        with connection().cursor() as cur:
+            with cur.copy(sql, params or None) as copy:
+                return parse_copy_csv(copy, view_name, keep)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ml-extract") as pool:
+            # map() yields in submission (key) order regardless of completion order
+            frames = list(pool.map(fetch, bounds))
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when copying {view_name}: {e}") from e
+    finally:
+        for conn in connections:
+            conn.close()
+
+    frames = [f for f in frames if not f.empty] or frames[:1]
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    return _restore_categories(df)
+
+
+def _restore_categories(df: pd.DataFrame) -> pd.DataFrame:
+    # Frames with different category sets concatenate as object
+    for col, dtype in COLUMN_DTYPES.items():
+        if dtype == "category" and col in df.columns and df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+    return df
+
+
 def load_training_data_from_db(
     limit: int | None = None,
     view_name: str = "ml_training_data",
+    profiler: StageProfiler | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    itersize: int = DEFAULT_ITERSIZE,
+    method: str = "stream",
+    columns: Sequence[str] | None = TRAINING_COLUMNS,
+    partitions: int = DEFAULT_PARTITIONS,
 ) -> pd.DataFrame:
     """
     Load training data from Supabase Postgres.
-    
+
+    ``method="stream"`` concatenates the chunks of iter_training_chunks;
+    ``method="copy"`` bulk-extracts with copy_training_data;
+    ``method="parallel"`` COPYs ``partitions`` id ranges concurrently with
+    copy_training_data_parallel.
+
     Args:
         limit: Optional row limit for testing (default: all rows)
         view_name: Name of the SQL view to query (default: ml_training_data)
-    
+        profiler: Optional stage profiler for the query and type coercion
+        chunk_rows: Rows per streamed chunk
+        itersize: Rows per server round trip
+        method: Extraction method, one of DB_METHODS
+        columns: Columns to select (the target is always added); None selects all
+        partitions: Id ranges read concurrently by ``method="parallel"``
+
     Returns:
         DataFrame with feature columns and at_risk target column
-    
+
     Raises:
         ValueError: If DATABASE_URL is not set
-        psycopg.Error: If database connection or query fails
+        RuntimeError: If database connection or query fails
     """
-    db_url = get_database_url()
+    if method not in DB_METHODS:
+        raise ValueError(f"Unknown db method: {method}. Choose from {DB_METHODS}")
+    if method == "parallel" and limit:
+        raise ValueError("limit is not supported with method='parallel'")
+    prof = profiler or NULL_PROFILER
 
-    query = f'SELECT * FROM "{view_name}"'
-    if limit is not None and limit > 0:
-        query += f" LIMIT {limit}"
-
-    try:
-        with psycopg.connect(db_url) as conn:
-            df = pd.read_sql_query(query, conn)
-    except Exception as e:
-        raise RuntimeError(f"Database error when querying {view_name}: {e}") from e
+    with prof.stage("db_query"):
+        if method == "copy":
+            copied = copy_training_data(limit=limit, view_name=view_name, columns=columns)
+            chunks = [copied] if not copied.empty else []
+        elif method == "parallel":
+            copied = copy_training_data_parallel(
+                view_name=view_name, columns=columns, partitions=partitions
+            )
+            chunks = [copied] if not copied.empty else []
+        else:
+            chunks = list(
+                iter_training_chunks(
+                    limit=limit,
+                    view_name=view_name,
+                    chunk_rows=chunk_rows,
+                    itersize=itersize,
+                    columns=columns,
+                )
+            )
 
-    if df.empty:
+    if not chunks:
         raise ValueError(
             f"No data returned from {view_name}. "
             "Ensure the view exists and contains labeled data "
             "(instructorLabel IS NOT NULL)."
         )
 
-    # Validate required columns
-    if "at_risk" not in df.columns:
-        raise ValueError(f"Target column 'at_risk' not found in {view_name}")
-
-    # Drop metadata columns (keep only features + target)
-    metadata_cols = ["id", "studentId", "patientId", "readingNumber", "submittedAt", "gradedAt"]
-    df = df.drop(columns=[c for c in metadata_cols if c in df.columns], errors="ignore")
-
-    # Ensure numeric types
-    for col in df.columns:
-        if col != "at_risk":
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # Drop rows with NaN in target
-    df = df.dropna(subset=["at_risk"])
+    df = _restore_categories(pd.concat(chunks, ignore_index=True)) if len(chunks) > 1 else chunks[0]
 
     print(f"Loaded {len(df)} training rows from {view_name}")
     print(f"  Features: {[c for c in df.columns if c != 'at_risk']}")
     print(f"  Target distribution: {df['at_risk'].value_counts().to_dict()}")
 
     return df
+
+
+def refresh_training_snapshot(
+    view_name: str = SNAPSHOT_VIEW,
+    concurrently: bool = True,
+) -> dict:
+    """
+    Refresh the materialized training snapshot and log how long it took.
+
+    ``CONCURRENTLY`` keeps the snapshot readable during the refresh (it needs
+    the unique index from migration 002 and cannot run inside a transaction,
+    so the connection is in autocommit mode). Use ``concurrently=False`` for a
+    snapshot that has never been populated.
+
+    Returns:
+        The logged refresh record (view_name, started_at, finished_at,
+        duration_ms, row_count)
+
+    Raises:
+        ValueError: If DATABASE_URL is not set
+        RuntimeError: If the refresh fails
+    """
+    db_url = get_database_url()
+    mode = "CONCURRENTLY " if concurrently else ""
+    try:
+        with psycopg.connect(db_url, autocommit=True) as conn:
+            started_at = datetime.now(timezone.utc)
+            start = time.perf_counter()
+            conn.execute(f'REFRESH MATERIALIZED VIEW {mode}"{view_name}"')
+            duration_ms = (time.perf_counter() - start) * 1e3
+            finished_at = datetime.now(timezone.utc)
+            row_count = conn.execute(f'SELECT count(*) FROM "{view_name}"').fetchone()[0]
+            conn.execute(
+                f'INSERT INTO "{REFRESH_LOG_TABLE}" '
+                "(view_name, started_at, finished_at, duration_ms, row_count) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                (view_name, started_at, finished_at, duration_ms, row_count),
+            )
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when refreshing {view_name}: {e}") from e
+
+    return {
+        "view_name": view_name,
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "duration_ms": duration_ms,
+        "row_count": row_count,
+    }
+
+
+def last_snapshot_refresh(view_name: str = SNAPSHOT_VIEW) -> dict | None:
+    """Most recent logged refresh of ``view_name``, or None if it was never refreshed."""
+    try:
+        with psycopg.connect(get_database_url()) as conn:
+            row = conn.execute(
+                "SELECT started_at, finished_at, duration_ms, row_count "
+                f'FROM "{REFRESH_LOG_TABLE}" WHERE view_name = %s '
+                "ORDER BY finished_at DESC LIMIT 1",
+                (view_name,),
+            ).fetchone()
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error when reading {REFRESH_LOG_TABLE}: {e}") from e
+    if row is None:
+        return None
+    started_at, finished_at, duration_ms, row_count = row
+    return {
+        "view_name": view_name,
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "duration_ms": float(duration_ms),
+        "row_count": int(row_count),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Training data maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh-snapshot", help="REFRESH the materialized training snapshot")
+    refresh.add_argument(
+        "--blocking",
+        action="store_true",
+        help="Plain REFRESH (needed the first time, if the snapshot was created WITH NO DATA)",
+    )
+    status = sub.add_parser("snapshot-status", help="Show the last logged snapshot refresh")
+    for p in (refresh, status):
+        p.add_argument("--view", type=str, default=SNAPSHOT_VIEW)
+    args = parser.parse_args()
+
+    if args.command == "refresh-snapshot":
+        record = refresh_training_snapshot(args.view, concurrently=not args.blocking)
+        print(
+            f"Refreshed {record['view_name']}: {record['row_count']} rows "
+            f"in {record['duration_ms'] / 1e3:.2f}s"
+        )
+    else:
+        record = last_snapshot_refresh(args.view)
+        print(json.dumps(record, indent=2) if record else f"{args.view} has no logged refresh")
+
+
+if __name__ == "__main__":
+    main()
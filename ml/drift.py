@@ -0,0 +1,175 @@
+"""
+Input drift between training data and served requests.
+
+Training records a profile of every feature (``feature_profile``): count,
+mean, variance, min/max and quantile bin edges with the share of training
+rows in each bin. The service feeds each request into a ``DriftMonitor``,
+which keeps Welford moments and fixed-bin counts per feature, so an update is
+O(features) and memory does not grow with traffic. ``scores()`` compares the
+two:
+
+    psi         population stability index over the training bins
+    ks          largest gap between the binned CDFs (a lower bound on the
+                exact two-sample KS statistic)
+    mean_shift  difference in means, in training standard deviations
+
+Rule of thumb for PSI: < 0.1 stable, 0.1-0.25 moderate, > 0.25 major shift.
+"""
+from __future__ import annotations
+
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 10
+MIN_SAMPLES = 100
+PSI_MODERATE = 0.1
+PSI_MAJOR = 0.25
+# Floor for empty bins so PSI stays finite
+_EPS = 1e-4
+
+
+def _bin_index(edges: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Bin i holds edges[i-1] < x <= edges[i]; the first and last bins are open
+    return np.searchsorted(edges, values, side="left")
+
+
+def feature_profile(X: pd.DataFrame, n_bins: int = DEFAULT_BINS) -> dict[str, Any]:
+    """Per-feature training distribution consumed by ``DriftMonitor``."""
+    features = {}
+    for col in X.columns:
+        values = pd.to_numeric(X[col], errors="coerce").to_numpy(dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            continue
+        # Integer vitals repeat quantiles; collapse them to distinct edges
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        counts = np.bincount(_bin_index(edges, values), minlength=len(edges) + 1)
+        features[str(col)] = {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "var": float(values.var()),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "edges": edges.tolist(),
+            "proportions": (counts / values.size).tolist(),
+        }
+    return {"n_bins": n_bins, "features": features}
+
+
+def save_profile(profile: dict[str, Any], path: Path) -> None:
+    path.write_text(json.dumps(profile, indent=2))
+
+
+def load_profile(path: Path) -> dict[str, Any] | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.clip(expected, _EPS, None)
+    a = np.clip(actual, _EPS, None)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def drift_status(psi_value: float) -> str:
+    if psi_value >= PSI_MAJOR:
+        return "major"
+    if psi_value >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+class DriftMonitor:
+    """
+    Streaming counterpart of a training ``feature_profile``.
+
+    All state is preallocated per feature: Welford count/mean/M2 vectors and a
+    (features x bins) count matrix. Missing or non-finite values are skipped
+    for that feature only.
+    """
+
+    def __init__(self, profile: Mapping[str, Any], min_samples: int = MIN_SAMPLES):
+        self.profile = profile["features"]
+        self.features = list(self.profile)
+        self.min_samples = min_samples
+        self._edges = [np.asarray(self.profile[f]["edges"], dtype=float) for f in self.features]
+        n_bins = max(len(e) + 1 for e in self._edges) if self._edges else 1
+        self._lock = threading.Lock()
+        self._n = np.zeros(len(self.features))
+        self._mean = np.zeros(len(self.features))
+        self._m2 = np.zeros(len(self.features))
+        self._hist = np.zeros((len(self.features), n_bins), dtype=np.int64)
+
+    def update(self, payload: Mapping[str, Any]) -> None:
+        x = np.array([_as_float(payload.get(f)) for f in self.features])
+        ok = np.isfinite(x)
+        bins = [int(_bin_index(e, v)) if k else -1 for e, v, k in zip(self._edges, x, ok)]
+        with self._lock:
+            self._n[ok] += 1
+            delta = x[ok] - self._mean[ok]
+            self._mean[ok] += delta / self._n[ok]
+            self._m2[ok] += delta * (x[ok] - self._mean[ok])
+            for i, b in enumerate(bins):
+                if b >= 0:
+                    self._hist[i, b] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._n[:] = 0
+            self._mean[:] = 0
+            self._m2[:] = 0
+            self._hist[:] = 0
+
+    def scores(self) -> dict[str, Any]:
+        with self._lock:
+            n, mean, m2 = self._n.copy(), self._mean.copy(), self._m2.copy()
+            hist = self._hist.copy()
+
+        features = {}
+        for i, name in enumerate(self.features):
+            ref = self.profile[name]
+            count = int(n[i])
+            expected = np.asarray(ref["proportions"], dtype=float)
+            entry: dict[str, Any] = {
+                "n": count,
+                "mean": float(mean[i]) if count else None,
+                "std": math.sqrt(m2[i] / count) if count else None,
+                "train_mean": ref["mean"],
+                "train_std": math.sqrt(ref["var"]),
+            }
+            if count < self.min_samples:
+                entry.update(psi=None, ks=None, mean_shift=None, status="insufficient_data")
+            else:
+                actual = hist[i, : len(expected)] / count
+                train_std = math.sqrt(ref["var"])
+                value = psi(expected, actual)
+                entry.update(
+                    psi=value,
+                    ks=float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected)))),
+                    mean_shift=(mean[i] - ref["mean"]) / train_std if train_std > 0 else None,
+                    status=drift_status(value),
+                )
+            features[name] = entry
+
+        scored = {k: v for k, v in features.items() if v["psi"] is not None}
+        return {
+            "n_requests": int(n.max()) if len(n) else 0,
+            "min_samples": self.min_samples,
+            "max_psi": max((v["psi"] for v in scored.values()), default=None),
+            "drifted": sorted(k for k, v in scored.items() if v["status"] != "stable"),
+            "features": features,
+        }
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
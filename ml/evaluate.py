@@ -0,0 +1,398 @@
+"""
+Evaluate a trained model on a labeled source too large to load at once.
+
+The source (CSV, Parquet, the local training cache or the database view) is
+read in chunks of ``--chunk-rows``. Each chunk is scored with one
+``predict_proba`` call and folded into an ``EvalAccumulator``:
+
+    pos[group, bin], tot[group, bin]   labeled counts per age group and
+                                       score bin
+    boot_pos[b, bin], boot_tot[b, bin] the same under Poisson(1) bootstrap
+                                       weights, one row per resample
+
+Bin edges are a uniform grid plus every threshold that is reported (the
+decision threshold and train.py's per-group candidates), so confusion counts
+at those thresholds are exact; ROC AUC and average precision are computed
+from the bins by metrics_engine, counting pairs within a bin as ties, and are
+approximate to within the bin width. Accumulators only add, so chunks can be
+scored on ``--workers`` processes in any order and merged.
+
+The report has the layout of the eval_report.json written by train.py
+(overall, confidence_intervals, by_age_group, age_group_thresholds).
+
+Usage:
+    python ml/evaluate.py --source parquet --path export.parquet --out eval_report.json
+    python ml/evaluate.py --source db --view ml_training_snapshot --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from ml.data_cache import DATA_CACHE_PATH  # pragma: no cover
+    from ml.data_loader import (  # pragma: no cover
+        DEFAULT_CHUNK_ROWS,
+        TARGET_COLUMN,
+        iter_training_chunks,
+        view_columns,
+    )
+    from ml.metrics_engine import (  # pragma: no cover
+        block_report,
+        metrics_from_blocks,
+        percentile_intervals,
+    )
+    from ml.predict import (  # pragma: no cover
+        AGE_GROUP_NAMES,
+        MODEL_PATH,
+        age_group_codes,
+        get_feature_names,
+        load_metrics,
+        load_model,
+    )
+else:
+    try:
+        from ml.data_cache import DATA_CACHE_PATH
+    except Exception:
+        from data_cache import DATA_CACHE_PATH
+    try:
+        from ml.data_loader import DEFAULT_CHUNK_ROWS, TARGET_COLUMN, iter_training_chunks, view_columns
+    except Exception:
+        from data_loader import DEFAULT_CHUNK_ROWS, TARGET_COLUMN, iter_training_chunks, view_columns
+    try:
+        from ml.metrics_engine import block_report, metrics_from_blocks, percentile_intervals
+    except Exception:
+        from metrics_engine import block_report, metrics_from_blocks, percentile_intervals
+    try:
+        from ml.predict import (
+            AGE_GROUP_NAMES,
+            MODEL_PATH,
+            age_group_codes,
+            get_feature_names,
+            load_metrics,
+            load_model,
+        )
+    except Exception:
+        from predict import (
+            AGE_GROUP_NAMES,
+            MODEL_PATH,
+            age_group_codes,
+            get_feature_names,
+            load_metrics,
+            load_model,
+        )
+
+SOURCES = ("csv", "parquet", "cache", "db")
+GROUPS = [*AGE_GROUP_NAMES, "unknown"]
+DEFAULT_BINS = 1000
+# Same candidates as train.best_threshold
+THRESHOLD_CANDIDATES = np.linspace(0.1, 0.9, 81)
+# Upper bound on bootstrap weights drawn at once
+_BOOTSTRAP_BATCH_CELLS = 1_000_000
+
+
+def score_edges(threshold: float, n_bins: int = DEFAULT_BINS) -> np.ndarray:
+    """Bin edges: a uniform grid on (0, 1) plus every reported threshold."""
+    grid = np.linspace(0.0, 1.0, n_bins + 1)[1:-1]
+    return np.unique(np.concatenate([grid, THRESHOLD_CANDIDATES, [threshold]]))
+
+
+class EvalAccumulator:
+    """
+    Mergeable score histograms per age group (and per bootstrap resample).
+
+    Bin ``i`` holds ``edges[i-1] <= prob < edges[i]``, so ``prob >= t`` for
+    an edge ``t`` is exactly the bins above it.
+    """
+
+    def __init__(self, edges: np.ndarray, n_bootstrap: int = 0):
+        self.edges = np.asarray(edges, dtype=float)
+        self.n_bootstrap = n_bootstrap
+        n_bins = len(self.edges) + 1
+        self.pos = np.zeros((len(GROUPS), n_bins))
+        self.tot = np.zeros((len(GROUPS), n_bins))
+        self.boot_pos = np.zeros((n_bootstrap, n_bins))
+        self.boot_tot = np.zeros((n_bootstrap, n_bins))
+
+    @property
+    def n_rows(self) -> int:
+        return int(self.tot.sum())
+
+    def update(
+        self,
+        y_true: np.ndarray,
+        prob: np.ndarray,
+        ages: np.ndarray | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> None:
+        y = np.asarray(y_true, dtype=float)
+        n_bins = len(self.edges) + 1
+        bins = np.searchsorted(self.edges, np.asarray(prob, dtype=float), side="right")
+        codes = age_group_codes(ages) if ages is not None else np.full(len(y), len(AGE_GROUP_NAMES))
+        keys = codes * n_bins + bins
+        size = len(GROUPS) * n_bins
+        self.pos += np.bincount(keys, weights=y, minlength=size).reshape(len(GROUPS), -1)
+        self.tot += np.bincount(keys, minlength=size).reshape(len(GROUPS), -1)
+
+        if self.n_bootstrap:
+            rng = rng or np.random.default_rng()
+            b = self.n_bootstrap
+            step = max(1, _BOOTSTRAP_BATCH_CELLS // b)
+            offsets = np.arange(b)[:, None] * n_bins
+            for start in range(0, len(y), step):
+                part = slice(start, start + step)
+                # Poisson(1) weights approximate resampling with replacement, one row at a time
+                w = rng.poisson(1.0, size=(b, len(y[part]))).astype(float)
+                rkeys = (offsets + bins[part]).ravel()
+                boot_pos = np.bincount(rkeys, weights=(w * y[part]).ravel(), minlength=b * n_bins)
+                boot_tot = np.bincount(rkeys, weights=w.ravel(), minlength=b * n_bins)
+                self.boot_pos += boot_pos.reshape(b, -1)
+                self.boot_tot += boot_tot.reshape(b, -1)
+
+    def merge(self, other: "EvalAccumulator") -> "EvalAccumulator":
+        if not np.array_equal(self.edges, other.edges) or self.n_bootstrap != other.n_bootstrap:
+            raise ValueError("Can only merge accumulators with the same bin edges and bootstrap count")
+        self.pos += other.pos
+        self.tot += other.tot
+        self.boot_pos += other.boot_pos
+        self.boot_tot += other.boot_tot
+        return self
+
+    def _prefix(self, threshold: float) -> int:
+        # Blocks run from the highest bin down; those at or above threshold come first
+        return len(self.edges) - int(np.searchsorted(self.edges, threshold, side="left"))
+
+    def report(self, threshold: float, confidence: float = 0.95) -> dict[str, Any]:
+        """Metrics in the layout of train.py's eval_report.json."""
+        if self.n_rows == 0:
+            raise ValueError("Cannot compute metrics on an empty set")
+        pos, tot = self.pos[:, ::-1], self.tot[:, ::-1]
+        k = self._prefix(threshold)
+        per_group = metrics_from_blocks(pos, tot, k)
+        present = [i for i in range(len(GROUPS)) if tot[i].sum() > 0]
+
+        intervals: dict[str, Any] = {}
+        if self.n_bootstrap:
+            samples = metrics_from_blocks(self.boot_pos[:, ::-1], self.boot_tot[:, ::-1], k)
+            intervals = percentile_intervals(samples, confidence)
+
+        return {
+            "overall": block_report(metrics_from_blocks(pos.sum(axis=0), tot.sum(axis=0), k)),
+            "confidence_intervals": intervals,
+            "by_age_group": {
+                GROUPS[i]: {
+                    "n": int(tot[i].sum()),
+                    "positive_rate": float(pos[i].sum() / tot[i].sum()),
+                    **block_report(per_group, i),
+                }
+                for i in present
+            },
+            "age_group_thresholds": {GROUPS[i]: self.best_threshold(pos[i], tot[i]) for i in present},
+            "n_rows": self.n_rows,
+        }
+
+    def best_threshold(self, pos: np.ndarray, tot: np.ndarray) -> float:
+        """train.best_threshold from descending block counts: best F1, first candidate on ties."""
+        cpos = np.concatenate([[0.0], np.cumsum(pos)])
+        cneg = np.concatenate([[0.0], np.cumsum(tot - pos)])
+        k = np.array([self._prefix(t) for t in THRESHOLD_CANDIDATES])
+        tp, fp = cpos[k], cneg[k]
+        den = tp + fp + cpos[-1]
+        f1 = np.divide(2 * tp, den, out=np.zeros_like(tp), where=den > 0)
+        return float(THRESHOLD_CANDIDATES[int(np.argmax(f1))])
+
+
+def score_chunk(
+    model: Any,
+    chunk: pd.DataFrame,
+    feature_names: list[str],
+    edges: np.ndarray,
+    n_bootstrap: int = 0,
+    seed: int | None = None,
+) -> tuple[EvalAccumulator, int]:
+    """Accumulator for one chunk and the number of rows skipped for missing values."""
+    missing = [c for c in (*feature_names, TARGET_COLUMN) if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Evaluation source is missing columns {missing}")
+    X = chunk[feature_names].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+    y = pd.to_numeric(chunk[TARGET_COLUMN], errors="coerce")
+    ok = (X.notna().all(axis=1) & y.notna()).to_numpy()
+    acc = EvalAccumulator(edges, n_bootstrap)
+    if ok.any():
+        X = X[ok]
+        prob = model.predict_proba(X)[:, 1]
+        ages = X["age_years"].to_numpy() if "age_years" in X.columns else None
+        acc.update(y[ok].to_numpy(), prob, ages, np.random.default_rng(seed))
+    return acc, int((~ok).sum())
+
+
+def iter_source(
+    source: str,
+    path: Path | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    columns: list[str] | None = None,
+    view_name: str = "ml_training_data",
+    limit: int | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Labeled rows of ``source`` in DataFrame chunks of about ``chunk_rows`` rows.
+
+    ``columns`` limits what is read (None: everything); for ``db`` they must
+    all exist in ``view_name``, which is checked before any rows are fetched.
+    """
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    if source == "db":
+        if columns:
+            available = set(view_columns(view_name))
+            missing = [c for c in columns if c not in available]
+            if missing:
+                raise ValueError(f"View {view_name} has no columns {missing} needed by the model")
+        yield from iter_training_chunks(limit=limit, view_name=view_name, chunk_rows=chunk_rows, columns=columns)
+        return
+    if source == "cache":
+        path = path or DATA_CACHE_PATH
+    if source not in SOURCES:
+        raise ValueError(f"Invalid source: {source}")
+    if path is None or not path.exists():
+        raise FileNotFoundError(f"Evaluation source not found: {path}")
+    if source == "csv":
+        wanted = set(columns) if columns else None
+        yield from pd.read_csv(
+            path, chunksize=chunk_rows, usecols=(lambda c: c in wanted) if wanted else None
+        )
+    else:
+        parquet = pq.ParquetFile(path)
+        present = [c for c in columns if c in parquet.schema_arrow.names] if columns else None
+        for batch in parquet.iter_batches(batch_size=chunk_rows, columns=present):
+            yield batch.to_pandas()
+
+
+# Per-process state of evaluation workers
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(model_path: str, feature_names: list[str], edges: np.ndarray, n_bootstrap: int) -> None:
+    _WORKER.update(
+        model=load_model(Path(model_path)),
+        feature_names=feature_names,
+        edges=edges,
+        n_bootstrap=n_bootstrap,
+    )
+
+
+def _score_task(task: tuple[pd.DataFrame, int]) -> tuple[EvalAccumulator, int]:
+    chunk, seed = task
+    w = _WORKER
+    return score_chunk(w["model"], chunk, w["feature_names"], w["edges"], w["n_bootstrap"], seed)
+
+
+def evaluate_chunks(
+    chunks: Iterator[pd.DataFrame],
+    model_path: Path,
+    feature_names: list[str],
+    threshold: float,
+    n_bins: int = DEFAULT_BINS,
+    n_bootstrap: int = 0,
+    seed: int = 0,
+    workers: int = 1,
+) -> tuple[EvalAccumulator, int]:
+    """
+    Merged accumulator over ``chunks`` and the total rows skipped.
+
+    Chunk ``i`` draws its bootstrap weights from seed ``(seed, i)``, so the
+    result does not depend on ``workers``.
+    """
+    edges = score_edges(threshold, n_bins)
+    total = EvalAccumulator(edges, n_bootstrap)
+    skipped = 0
+    tasks = ((chunk, [seed, i]) for i, chunk in enumerate(chunks))
+
+    if workers <= 1:
+        _init_worker(str(model_path), feature_names, edges, n_bootstrap)
+        for acc, n_skipped in map(_score_task, tasks):
+            total.merge(acc)
+            skipped += n_skipped
+        return total, skipped
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(str(model_path), feature_names, edges, n_bootstrap),
+    ) as pool:
+        # Keep at most 2x workers chunks in flight so memory stays bounded
+        pending: deque[Future] = deque()
+        for task in tasks:
+            pending.append(pool.submit(_score_task, task))
+            if len(pending) >= 2 * workers:
+                acc, n_skipped = pending.popleft().result()
+                total.merge(acc)
+                skipped += n_skipped
+        for future in pending:
+            acc, n_skipped = future.result()
+            total.merge(acc)
+            skipped += n_skipped
+    return total, skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream a labeled source through the model and report metrics")
+    parser.add_argument("--source", choices=SOURCES, required=True)
+    parser.add_argument("--path", type=str, default="", help="CSV/Parquet file (--source cache defaults to ml/.cache/data)")
+    parser.add_argument("--view", type=str, default="ml_training_data", help="Relation read by --source db")
+    parser.add_argument("--limit", type=int, default=None, help="Row limit for --source db")
+    parser.add_argument("--model", type=str, default=str(MODEL_PATH))
+    parser.add_argument("--threshold", type=float, default=None, help="Default: the threshold in metrics.json")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=1, help="Scoring processes")
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS, help="Uniform score bins for ROC/PR AUC")
+    parser.add_argument("--bootstrap", type=int, default=0, help="Poisson bootstrap resamples for CIs (0 disables)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=str, default="", help="Write the report here (eval_report.json layout)")
+    args = parser.parse_args()
+
+    model_path = Path(args.model).expanduser().resolve()
+    if not model_path.exists():
+        raise FileNotFoundError(f"Model not found: {model_path}. Run: python ml/train.py")
+    metrics = load_metrics()
+    feature_names = get_feature_names(load_model(model_path), metrics)
+    threshold = float(metrics.get("threshold", 0.5)) if args.threshold is None else args.threshold
+
+    chunks = iter_source(
+        args.source,
+        Path(args.path).expanduser().resolve() if args.path else None,
+        chunk_rows=args.chunk_rows,
+        columns=[*feature_names, TARGET_COLUMN],
+        view_name=args.view,
+        limit=args.limit,
+    )
+    acc, skipped = evaluate_chunks(
+        chunks,
+        model_path,
+        feature_names,
+        threshold,
+        n_bins=args.bins,
+        n_bootstrap=args.bootstrap,
+        seed=args.seed,
+        workers=args.workers,
+    )
+    report = {**acc.report(threshold), "threshold": threshold, "rows_skipped": skipped}
+
+    if args.out:
+        out_path = Path(args.out).expanduser().resolve()
+        out_path.write_text(json.dumps(report, indent=2))
+        print(f"Wrote {out_path}")
+    print(json.dumps(report["overall"], indent=2))
+    print(f"{report['n_rows']} rows evaluated, {skipped} skipped")
+
+
+if __name__ == "__main__":
+    main()
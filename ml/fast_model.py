@@ -0,0 +1,205 @@
+"""
+Pickle-free artifact format for the standardized logistic regression model.
+
+File layout (all integers little-endian):
+
+    magic            8 bytes   b"GVMODEL\\0"
+    format_version   uint32
+    header_length    uint32
+    header           JSON (utf-8), space-padded so arrays start 64-byte aligned
+    arrays           raw little-endian float64 arrays, each 64-byte aligned
+
+The JSON header holds feature names, thresholds, free-form metadata and the
+offset/shape/dtype of each array (relative to the end of the header). Loading
+memory-maps the file and wraps the arrays with ``np.frombuffer``; no pickle
+opcodes run and neither sklearn nor joblib is imported.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+
+MAGIC = b"GVMODEL\x00"
+FORMAT_VERSION = 1
+MODEL_TYPE = "standardized_logistic"
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 64
+
+
+class FastLinearModel:
+    """StandardScaler + binary LogisticRegression evaluated with plain NumPy."""
+
+    def __init__(
+        self,
+        feature_names: list[str],
+        mean: np.ndarray,
+        scale: np.ndarray,
+        coef: np.ndarray,
+        intercept: float,
+        threshold: float = 0.5,
+        group_thresholds: Mapping[str, float] | None = None,
+        metadata: Mapping[str, Any] | None = None,
+    ):
+        self.feature_names = list(feature_names)
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.threshold = float(threshold)
+        self.group_thresholds = dict(group_thresholds or {})
+        self.metadata = dict(metadata or {})
+
+    @property
+    def feature_names_in_(self) -> np.ndarray:
+        # Mirrors the sklearn attribute so predict.get_feature_names works unchanged
+        return np.asarray(self.feature_names, dtype=object)
+
+    def decision_function(self, X: Any) -> np.ndarray:
+        arr = np.asarray(X, dtype=np.float64)
+        if arr.ndim == 1:
+            arr = arr.reshape(1, -1)
+        if arr.shape[1] != self.coef.shape[0]:
+            raise ValueError(
+                f"Expected {self.coef.shape[0]} features, got {arr.shape[1]}"
+            )
+        # Like sklearn's check_array: a missing vital must not score as "not at risk"
+        if not np.isfinite(arr).all():
+            raise ValueError("Input X contains NaN or infinity.")
+        return ((arr - self.mean) / self.scale) @ self.coef + self.intercept
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        z = self.decision_function(X)
+        p = 1.0 / (1.0 + np.exp(-z))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X: Any) -> np.ndarray:
+        return (self.decision_function(X) > 0).astype(int)
+
+
+def is_exportable(model: Any) -> bool:
+    """True for a fitted Pipeline of StandardScaler followed by binary LogisticRegression."""
+    steps = getattr(model, "steps", None)
+    if not steps or len(steps) != 2:
+        return False
+    scaler, clf = steps[0][1], steps[1][1]
+    return (
+        type(scaler).__name__ == "StandardScaler"
+        and type(clf).__name__ == "LogisticRegression"
+        and hasattr(scaler, "scale_")
+        and getattr(clf, "coef_", np.empty((0, 0))).shape[0] == 1
+    )
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def export_fast_model(
+    model: Any,
+    path: Path,
+    feature_names: list[str],
+    threshold: float = 0.5,
+    group_thresholds: Mapping[str, float] | None = None,
+    metadata: Mapping[str, Any] | None = None,
+) -> Path:
+    """Write ``model`` in the fast format. Raises ValueError if it is not exportable."""
+    if not is_exportable(model):
+        raise ValueError("Only StandardScaler + binary LogisticRegression pipelines can be exported")
+
+    scaler, clf = model.steps[0][1], model.steps[1][1]
+    n_features = len(feature_names)
+    mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+    arrays = {
+        "scaler_mean": np.asarray(mean, dtype="<f8"),
+        "scaler_scale": np.asarray(scale, dtype="<f8"),
+        "coef": np.asarray(clf.coef_[0], dtype="<f8"),
+        "intercept": np.asarray(clf.intercept_[:1], dtype="<f8"),
+    }
+    group_thresholds = dict(group_thresholds or {})
+    group_names = sorted(group_thresholds)
+    arrays["group_thresholds"] = np.asarray(
+        [group_thresholds[g] for g in group_names], dtype="<f8"
+    )
+
+    for name in ("scaler_mean", "scaler_scale", "coef"):
+        if arrays[name].shape != (n_features,):
+            raise ValueError(f"{name} has shape {arrays[name].shape}, expected ({n_features},)")
+
+    specs: dict[str, dict] = {}
+    offset = 0
+    for name, arr in arrays.items():
+        specs[name] = {"offset": offset, "shape": list(arr.shape), "dtype": arr.dtype.str}
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_type": MODEL_TYPE,
+        "feature_names": list(feature_names),
+        "threshold": float(threshold),
+        "group_names": group_names,
+        "arrays": specs,
+        "metadata": dict(metadata or {}),
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    header_bytes += b" " * _pad(_PREFIX.size + len(header_bytes))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for arr in arrays.values():
+            f.write(arr.tobytes())
+            f.write(b"\0" * _pad(arr.nbytes))
+    tmp.replace(path)
+    return path
+
+
+def read_header(buf: Any) -> tuple[dict, int]:
+    """Parse and validate the prefix and JSON header; returns (header, data_offset)."""
+    if len(buf) < _PREFIX.size:
+        raise ValueError("File too short to be a fast model artifact")
+    magic, version, header_len = _PREFIX.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a fast model artifact (bad magic)")
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"Fast model format version {version} is newer than supported ({FORMAT_VERSION})"
+        )
+    start = _PREFIX.size
+    header = json.loads(bytes(buf[start:start + header_len]).decode("utf-8"))
+    if header.get("model_type") != MODEL_TYPE:
+        raise ValueError(f"Unsupported model type: {header.get('model_type')}")
+    return header, start + header_len
+
+
+def load_fast_model(path: Path) -> FastLinearModel:
+    """Memory-map a fast model artifact; arrays are read-only views into the mapping."""
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header, data_offset = read_header(buf)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = np.frombuffer(
+            buf, dtype=dtype, count=count, offset=data_offset + spec["offset"]
+        ).reshape(spec["shape"])
+
+    return FastLinearModel(
+        feature_names=header["feature_names"],
+        mean=arrays["scaler_mean"],
+        scale=arrays["scaler_scale"],
+        coef=arrays["coef"],
+        intercept=float(arrays["intercept"][0]),
+        threshold=header["threshold"],
+        group_thresholds=dict(zip(header["group_names"], arrays["group_thresholds"].tolist())),
+        metadata=header["metadata"],
+    )
@@ -0,0 +1,161 @@
+"""
+Permutation feature importance for the training report.
+
+Importance of a feature is the drop in a metric (ROC AUC by default) on the
+held-out split when that feature's column is shuffled, averaged over
+``n_repeats`` shuffles, with a t-interval across repeats.
+
+The features x repeats shuffles run on ``workers`` processes. The test
+matrix is placed once in shared memory and every worker maps it read-only;
+each worker keeps one private copy as its scratch buffer, and a shuffle only
+overwrites the one column being permuted and restores it afterwards, so no
+task copies the full matrix. Shuffle ``(feature, repeat)`` uses its own seed,
+so results do not depend on the number of workers.
+"""
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+if TYPE_CHECKING:
+    from ml.metrics_engine import METRIC_NAMES, ScoreBlocks, metrics_from_blocks  # pragma: no cover
+else:
+    try:
+        from ml.metrics_engine import METRIC_NAMES, ScoreBlocks, metrics_from_blocks
+    except Exception:
+        from metrics_engine import METRIC_NAMES, ScoreBlocks, metrics_from_blocks
+
+DEFAULT_REPEATS = 5
+DEFAULT_METRIC = "roc_auc"
+
+
+def score(y_true: np.ndarray, prob: np.ndarray, metric: str = DEFAULT_METRIC, threshold: float = 0.5) -> float:
+    """One metric from metrics_engine (threshold metrics at ``prob >= threshold``)."""
+    blocks = ScoreBlocks(prob)
+    pos, tot = blocks.counts(np.asarray(y_true, dtype=float))
+    return float(metrics_from_blocks(pos[0], tot[0], blocks.prefix_len(threshold))[metric])
+
+
+# Per-process state: the model, the shared matrix and this worker's scratch copy
+_STATE: dict[str, Any] = {}
+
+
+def _init(
+    model: Any,
+    shm_name: str | None,
+    X: np.ndarray | None,
+    shape: tuple[int, int],
+    y: np.ndarray,
+    columns: list[str],
+    metric: str,
+    threshold: float,
+) -> None:
+    if shm_name is not None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        X.flags.writeable = False
+        _STATE["shm"] = shm
+    _STATE.update(
+        model=model,
+        X=X,
+        buffer=X.copy(),
+        y=y,
+        columns=columns,
+        metric=metric,
+        threshold=threshold,
+    )
+
+
+def _permuted_score(task: tuple[int, int, int]) -> tuple[int, int, float]:
+    j, repeat, seed = task
+    s = _STATE
+    X, buffer = s["X"], s["buffer"]
+    rng = np.random.default_rng([seed, j, repeat])
+    buffer[:, j] = X[rng.permutation(len(X)), j]
+    try:
+        frame = pd.DataFrame(buffer, columns=s["columns"], copy=False)
+        prob = s["model"].predict_proba(frame)[:, 1]
+    finally:
+        buffer[:, j] = X[:, j]
+    return j, repeat, score(s["y"], prob, s["metric"], s["threshold"])
+
+
+def permutation_importance(
+    model: Any,
+    X: pd.DataFrame,
+    y: pd.Series | np.ndarray,
+    n_repeats: int = DEFAULT_REPEATS,
+    seed: int = 7,
+    workers: int | None = 1,
+    metric: str = DEFAULT_METRIC,
+    threshold: float = 0.5,
+    confidence: float = 0.95,
+) -> dict[str, Any]:
+    """
+    Mean drop in ``metric`` per shuffled feature, with a ``confidence`` t-interval.
+
+    ``workers`` processes share the shuffles (None: one per CPU, 1: in-process).
+    Features are listed from most to least important.
+    """
+    if metric not in METRIC_NAMES:
+        raise ValueError(f"Unknown metric: {metric}. Choose from {list(METRIC_NAMES)}")
+    if n_repeats <= 0:
+        raise ValueError("n_repeats must be positive")
+    columns = [str(c) for c in X.columns]
+    matrix = np.ascontiguousarray(X.to_numpy(dtype=np.float64))
+    labels = np.asarray(y, dtype=float)
+    baseline = score(labels, model.predict_proba(X)[:, 1], metric, threshold)
+    tasks = [(j, r, seed) for j in range(len(columns)) for r in range(n_repeats)]
+    drops = np.empty((len(columns), n_repeats))
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        _init(model, None, matrix, matrix.shape, labels, columns, metric, threshold)
+        try:
+            results = [_permuted_score(t) for t in tasks]
+        finally:
+            _STATE.clear()
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+            initargs = (model, shm.name, None, matrix.shape, labels, columns, metric, threshold)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=initargs) as pool:
+                chunksize = max(1, len(tasks) // (4 * workers))
+                results = list(pool.map(_permuted_score, tasks, chunksize=chunksize))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    for j, r, value in results:
+        drops[j, r] = baseline - value
+
+    t = stats.t.ppf(0.5 + confidence / 2, n_repeats - 1) if n_repeats > 1 else math.nan
+    features = []
+    for j, name in enumerate(columns):
+        mean = float(drops[j].mean())
+        std = float(drops[j].std(ddof=1)) if n_repeats > 1 else 0.0
+        half = t * std / math.sqrt(n_repeats) if n_repeats > 1 else None
+        features.append({
+            "feature": name,
+            "importance_mean": mean,
+            "importance_std": std,
+            "confidence_interval": [mean - half, mean + half] if half is not None else None,
+            "repeats": drops[j].tolist(),
+        })
+    features.sort(key=lambda f: f["importance_mean"], reverse=True)
+    return {
+        "metric": metric,
+        "baseline": baseline,
+        "n_repeats": n_repeats,
+        "n_rows": len(matrix),
+        "confidence": confidence,
+        "features": features,
+    }
@@ -0,0 +1,304 @@
+"""
+Live model accuracy from instructor grades.
+
+Readings are scored at submission (ml_prediction) and graded later by an
+instructor (is_correct, graded_at). This job reads readings graded since its
+watermark, a ``(graded_at, id)`` pair, using a keyset query on the
+idx_vital_readings_graded_at index (migrations/004), so each run only touches
+new labels. Each label adds one to a confusion cell (tn/fp/fn/tp) of its age
+group in an hourly ring buffer that spans the longest window. Precision,
+recall and F1 over the sliding windows are sums over buckets, independent of
+how much history exists.
+
+The label is the training target: at_risk = 1 when is_correct is false.
+Only the latest grade of a reading counts: the state keeps each reading's
+current cell, and a regraded reading (which comes back with a newer
+graded_at) has its earlier grade subtracted before the new one is added.
+
+State (watermark and buckets) is saved atomically after every batch, so the
+job can run from cron or with ``--follow``. The prediction service serves the
+saved report at GET /live-accuracy.
+
+Usage:
+    python ml/live_accuracy.py update [--follow --interval 60]
+    python ml/live_accuracy.py report
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import psycopg
+
+if TYPE_CHECKING:
+    from ml.data_loader import get_database_url  # pragma: no cover
+    from ml.metrics_engine import rates_from_counts  # pragma: no cover
+    from ml.predict import AGE_GROUP_NAMES, age_group_codes  # pragma: no cover
+else:
+    try:
+        from ml.data_loader import get_database_url
+    except Exception:
+        from data_loader import get_database_url
+    try:
+        from ml.metrics_engine import rates_from_counts
+    except Exception:
+        from metrics_engine import rates_from_counts
+    try:
+        from ml.predict import AGE_GROUP_NAMES, age_group_codes
+    except Exception:
+        from predict import AGE_GROUP_NAMES, age_group_codes
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+STATE_PATH = REPO_ROOT / "ml" / ".cache" / "live_accuracy" / "state.json"
+
+DEFAULT_BATCH_SIZE = 5_000
+BUCKET_SECONDS = 3600
+WINDOWS = {"1h": 3600, "24h": 86_400, "7d": 7 * 86_400, "30d": 30 * 86_400}
+GROUPS = [*AGE_GROUP_NAMES, "unknown"]
+# Cell order within a bucket: 2 * y_true + y_pred
+CELLS = ("tn", "fp", "fn", "tp")
+
+GRADED_QUERY = """
+SELECT vr.id::text, vr.graded_at, vr.is_correct, vr.ml_prediction, p.age::float AS age_years
+FROM vital_readings vr
+LEFT JOIN patients p ON p.id = vr.patient_id
+WHERE vr.graded_at IS NOT NULL
+  AND vr.ml_prediction IS NOT NULL
+  AND (vr.graded_at, vr.id) > (%(graded_at)s, %(id)s::uuid)
+ORDER BY vr.graded_at, vr.id
+LIMIT %(limit)s
+"""
+# Lower bound for the first run
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MIN_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+class RollingConfusion:
+    """
+    Confusion counts per age group in a ring of fixed-width time buckets.
+
+    ``counts[slot, group, cell]`` holds bucket ``epochs[slot]``; a slot is
+    cleared when a newer bucket reuses it. Labels older than the ring are
+    only added to the all-time ``totals``.
+    """
+
+    def __init__(self, bucket_seconds: int = BUCKET_SECONDS, horizon_seconds: int = max(WINDOWS.values())):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = math.ceil(horizon_seconds / bucket_seconds)
+        self.counts = np.zeros((self.n_buckets, len(GROUPS), len(CELLS)), dtype=np.int64)
+        self.epochs = np.full(self.n_buckets, -1, dtype=np.int64)
+        self.totals = np.zeros((len(GROUPS), len(CELLS)), dtype=np.int64)
+
+    def add(self, ts: float, group: int, y_true: int, y_pred: int) -> None:
+        cell = 2 * int(y_true) + int(y_pred)
+        self.totals[group, cell] += 1
+        bucket = int(ts // self.bucket_seconds)
+        slot = bucket % self.n_buckets
+        if self.epochs[slot] > bucket:
+            return
+        if self.epochs[slot] < bucket:
+            self.counts[slot] = 0
+            self.epochs[slot] = bucket
+        self.counts[slot, group, cell] += 1
+
+    def remove(self, ts: float, group: int, y_true: int, y_pred: int) -> None:
+        """Undo ``add`` with the same arguments (its bucket only if still in the ring)."""
+        cell = 2 * int(y_true) + int(y_pred)
+        self.totals[group, cell] -= 1
+        bucket = int(ts // self.bucket_seconds)
+        slot = bucket % self.n_buckets
+        if self.epochs[slot] == bucket:
+            self.counts[slot, group, cell] -= 1
+
+    def window(self, seconds: int, now: float) -> np.ndarray:
+        """Counts per (group, cell) for labels in the ``seconds`` before ``now``."""
+        current = int(now // self.bucket_seconds)
+        span = min(math.ceil(seconds / self.bucket_seconds), self.n_buckets)
+        live = (self.epochs > current - span) & (self.epochs <= current)
+        return self.counts[live].sum(axis=0)
+
+    def report(self, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        out = {name: _rates(self.window(seconds, now)) for name, seconds in WINDOWS.items()}
+        out["all_time"] = _rates(self.totals)
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        live = self.epochs >= 0
+        return {
+            "bucket_seconds": self.bucket_seconds,
+            "n_buckets": self.n_buckets,
+            "totals": self.totals.tolist(),
+            "buckets": {
+                str(int(e)): self.counts[slot].tolist()
+                for slot, e in zip(np.flatnonzero(live), self.epochs[live])
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "RollingConfusion":
+        rc = cls(data["bucket_seconds"], data["bucket_seconds"] * data["n_buckets"])
+        rc.totals[:] = data["totals"]
+        for epoch, counts in data["buckets"].items():
+            slot = int(epoch) % rc.n_buckets
+            rc.epochs[slot] = int(epoch)
+            rc.counts[slot] = counts
+        return rc
+
+
+def _rates(counts: np.ndarray) -> dict[str, Any]:
+    """Overall and per-group metrics from (group, cell) counts."""
+
+    def summary(c: np.ndarray) -> dict[str, Any]:
+        rates = rates_from_counts(c[3], c[1], c[2], c[0])
+        return {
+            "n": int(c.sum()),
+            **{k: float(rates[k]) for k in ("precision", "recall", "f1", "accuracy")},
+            "confusion_matrix": {name: int(c[i]) for i, name in enumerate(CELLS)},
+        }
+
+    return {
+        "overall": summary(counts.sum(axis=0)),
+        "by_age_group": {g: summary(counts[i]) for i, g in enumerate(GROUPS) if counts[i].sum() > 0},
+    }
+
+
+@dataclass
+class TrackerState:
+    graded_at: str | None = None
+    last_id: str | None = None
+    labels: int = 0
+    confusion: RollingConfusion | None = None
+    regrades: int = 0
+    # Reading id -> [graded_at timestamp, group, y_true, y_pred] of its counted grade
+    grades: dict[str, list] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "TrackerState":
+        if not path.exists():
+            return cls(confusion=RollingConfusion())
+        data = json.loads(path.read_text())
+        return cls(
+            graded_at=data["graded_at"],
+            last_id=data["last_id"],
+            labels=data["labels"],
+            confusion=RollingConfusion.from_dict(data["confusion"]),
+            regrades=data.get("regrades", 0),
+            grades=data.get("grades", {}),
+        )
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "graded_at": self.graded_at,
+            "last_id": self.last_id,
+            "labels": self.labels,
+            "regrades": self.regrades,
+            "grades": self.grades,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "confusion": self.confusion.to_dict(),
+        }
+        tmp = path.with_name(f"{path.name}.tmp{os.getpid()}")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
+
+
+def apply_labels(state: TrackerState, rows: list[tuple]) -> None:
+    """
+    Add graded rows ``(id, graded_at, is_correct, ml_prediction, age_years)`` in watermark order.
+
+    A reading already counted is regraded: its previous grade is removed first.
+    """
+    if not rows:
+        return
+    ages = np.array([np.nan if r[4] is None else r[4] for r in rows], dtype=float)
+    groups = age_group_codes(ages)
+    for row, group in zip(rows, groups):
+        reading_id, graded_at, is_correct, prediction, _ = row
+        previous = state.grades.get(reading_id)
+        if previous is not None:
+            state.confusion.remove(*previous)
+            state.regrades += 1
+        else:
+            state.labels += 1
+        grade = [graded_at.timestamp(), int(group), int(not is_correct), int(prediction)]
+        state.confusion.add(*grade)
+        state.grades[reading_id] = grade
+    state.graded_at = rows[-1][1].isoformat()
+    state.last_id = rows[-1][0]
+
+
+def update(state_path: Path = STATE_PATH, batch_size: int = DEFAULT_BATCH_SIZE) -> TrackerState:
+    """Fold every reading graded since the watermark into the saved state."""
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+    state = TrackerState.load(state_path)
+    try:
+        with psycopg.connect(get_database_url()) as conn:
+            while True:
+                params = {
+                    "graded_at": datetime.fromisoformat(state.graded_at) if state.graded_at else _EPOCH,
+                    "id": state.last_id or _MIN_UUID,
+                    "limit": batch_size,
+                }
+                rows = conn.execute(GRADED_QUERY, params).fetchall()
+                apply_labels(state, rows)
+                if rows:
+                    state.save(state_path)
+                if len(rows) < batch_size:
+                    break
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error while reading graded readings: {e}") from e
+    return state
+
+
+def load_report(state_path: Path = STATE_PATH, now: float | None = None) -> dict[str, Any] | None:
+    """Sliding-window metrics from the saved state; None before the first update."""
+    if not state_path.exists():
+        return None
+    state = TrackerState.load(state_path)
+    return {
+        "labels": state.labels,
+        "regrades": state.regrades,
+        "watermark": {"graded_at": state.graded_at, "id": state.last_id},
+        "windows": state.confusion.report(now),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Track live model accuracy from instructor grades")
+    parser.add_argument("--state", type=str, default=str(STATE_PATH))
+    sub = parser.add_subparsers(dest="command", required=True)
+    up = sub.add_parser("update", help="Fold newly graded readings into the rolling counts")
+    up.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    up.add_argument("--follow", action="store_true", help="Keep polling for new grades")
+    up.add_argument("--interval", type=float, default=60.0, help="Seconds between polls with --follow")
+    sub.add_parser("report", help="Print sliding-window precision/recall/F1")
+    args = parser.parse_args()
+
+    state_path = Path(args.state).expanduser().resolve()
+    if args.command == "update":
+        while True:
+            before = TrackerState.load(state_path).labels
+            state = update(state_path, args.batch_size)
+            print(f"{state.labels - before} new labels ({state.labels} total), watermark {state.graded_at}")
+            if not args.follow:
+                break
+            time.sleep(args.interval)
+    else:
+        report = load_report(state_path)
+        if report is None:
+            raise SystemExit(f"No state at {state_path}. Run: python ml/live_accuracy.py update")
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
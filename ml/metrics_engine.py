@@ -0,0 +1,233 @@
+"""
+Single-pass classification metrics for the training and evaluation reports.
+
+Scores are sorted once (``np.unique``) into tied-score blocks. Every metric is
+then derived from per-block positive/total counts:
+
+- threshold metrics (accuracy, precision, recall, F1, ...) from the confusion
+  counts at the threshold's block prefix,
+- ROC AUC (Mann-Whitney, ties counted as 1/2) and average precision from
+  cumulative block sums.
+
+Per-group breakdowns and bootstrap resamples reuse the same blocks, so neither
+needs another sort. Results match sklearn's ``roc_auc_score`` and
+``average_precision_score``.
+"""
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import numpy as np
+
+THRESHOLD_METRICS = ("accuracy", "balanced_accuracy", "precision", "recall", "f1")
+RANKING_METRICS = ("roc_auc", "pr_auc")
+METRIC_NAMES = THRESHOLD_METRICS + RANKING_METRICS
+
+# Upper bound on resampled rows held in memory per bootstrap batch
+_BOOTSTRAP_BATCH_CELLS = 1_000_000
+
+
+class ScoreBlocks:
+    """Distinct scores in descending order plus each row's block index."""
+
+    def __init__(self, prob: np.ndarray):
+        uniq, inverse = np.unique(np.asarray(prob, dtype=float), return_inverse=True)
+        self.scores = uniq[::-1]
+        self.block = (len(uniq) - 1 - inverse).astype(np.intp)
+        self.n_blocks = len(uniq)
+
+    def prefix_len(self, threshold: float) -> int:
+        """Number of leading blocks predicted positive at ``prob >= threshold``."""
+        return int(np.searchsorted(-self.scores, -threshold, side="right"))
+
+    def counts(
+        self,
+        y_true: np.ndarray,
+        codes: np.ndarray | None = None,
+        n_codes: int = 1,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Positive and total counts per (code, block), shape ``(n_codes, n_blocks)``."""
+        keys = self.block if codes is None else codes * self.n_blocks + self.block
+        size = n_codes * self.n_blocks
+        pos = np.bincount(keys, weights=y_true, minlength=size)
+        tot = np.bincount(keys, minlength=size).astype(float)
+        return pos.reshape(n_codes, -1), tot.reshape(n_codes, -1)
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray, fill: float) -> np.ndarray:
+    num, den = np.broadcast_arrays(np.asarray(num, dtype=float), np.asarray(den, dtype=float))
+    out = np.full(num.shape, fill, dtype=float)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def rates_from_counts(tp, fp, fn, tn) -> dict[str, np.ndarray]:
+    """Threshold metrics from confusion counts (sklearn ``zero_division=0`` semantics)."""
+    tp, fp, fn, tn = (np.asarray(a, dtype=float) for a in (tp, fp, fn, tn))
+    sensitivity = _safe_div(tp, tp + fn, np.nan)
+    specificity = _safe_div(tn, tn + fp, np.nan)
+    # Like sklearn, average only the per-class recalls that are defined
+    balanced = np.where(
+        np.isnan(sensitivity),
+        specificity,
+        np.where(np.isnan(specificity), sensitivity, (sensitivity + specificity) / 2),
+    )
+    return {
+        "accuracy": _safe_div(tp + tn, tp + fp + fn + tn, 0.0),
+        "balanced_accuracy": balanced,
+        "precision": _safe_div(tp, tp + fp, 0.0),
+        "recall": np.nan_to_num(sensitivity, nan=0.0),
+        "f1": _safe_div(2 * tp, 2 * tp + fp + fn, 0.0),
+    }
+
+
+def metrics_from_blocks(
+    pos: np.ndarray, tot: np.ndarray, k: int
+) -> dict[str, np.ndarray]:
+    """All metrics from block counts; leading axes are broadcast (groups, resamples)."""
+    neg = tot - pos
+    cpos = np.cumsum(pos, axis=-1)
+    cneg = np.cumsum(neg, axis=-1)
+    n_pos = cpos[..., -1]
+    n_neg = cneg[..., -1]
+
+    tp = cpos[..., k - 1] if k > 0 else np.zeros_like(n_pos)
+    fp = cneg[..., k - 1] if k > 0 else np.zeros_like(n_neg)
+    out = rates_from_counts(tp, fp, n_pos - tp, n_neg - fp)
+
+    # Positives beat negatives in lower-score blocks, tie with their own block
+    wins = np.sum(pos * (n_neg[..., None] - cneg + 0.5 * neg), axis=-1)
+    out["roc_auc"] = np.where((n_pos > 0) & (n_neg > 0), _safe_div(wins, n_pos * n_neg, np.nan), np.nan)
+    precision_at = _safe_div(cpos, cpos + cneg, 0.0)
+    out["pr_auc"] = _safe_div(np.sum(pos * precision_at, axis=-1), n_pos, np.nan)
+
+    out["tp"], out["fp"], out["fn"], out["tn"] = tp, fp, n_pos - tp, n_neg - fp
+    return out
+
+
+def _as_float(x: Any) -> float | None:
+    x = float(x)
+    return None if np.isnan(x) else x
+
+
+def block_report(values: dict[str, np.ndarray], index: Any = ()) -> dict[str, Any]:
+    """Report entry (metrics + confusion_matrix) at ``index`` of ``metrics_from_blocks`` output."""
+    report: dict[str, Any] = {name: _as_float(values[name][index]) for name in METRIC_NAMES}
+    report["confusion_matrix"] = {c: int(values[c][index]) for c in ("tn", "fp", "fn", "tp")}
+    return report
+
+
+def f1_at_thresholds(y_true: np.ndarray, prob: np.ndarray, thresholds: Sequence[float]) -> np.ndarray:
+    """F1 score at each threshold, from a single sort of ``prob``."""
+    y = np.asarray(y_true, dtype=float)
+    blocks = ScoreBlocks(prob)
+    pos, tot = blocks.counts(y)
+    cpos = np.concatenate([[0.0], np.cumsum(pos[0])])
+    cneg = np.concatenate([[0.0], np.cumsum(tot[0] - pos[0])])
+    k = np.array([blocks.prefix_len(t) for t in thresholds])
+    tp, fp = cpos[k], cneg[k]
+    return _safe_div(2 * tp, tp + fp + cpos[-1], 0.0)
+
+
+def evaluate_predictions(
+    y_true: np.ndarray,
+    prob: np.ndarray,
+    threshold: float = 0.5,
+    groups: np.ndarray | None = None,
+    n_bootstrap: int = 0,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Compute threshold and ranking metrics in one pass.
+
+    Args:
+        y_true: Binary labels (0/1)
+        prob: Predicted probability of the positive class
+        threshold: Decision threshold for ``prob >= threshold``
+        groups: Optional per-row group labels (e.g. age group) for breakdowns
+        n_bootstrap: Number of bootstrap resamples for confidence intervals (0 disables)
+        confidence: Two-sided confidence level of the percentile intervals
+        seed: Seed for the bootstrap resampling
+
+    Returns:
+        Dict with ``overall`` metrics (including ``confusion_matrix``),
+        ``by_group`` metrics when ``groups`` is given, and
+        ``confidence_intervals`` (``{metric: [low, high]}``) when bootstrapping.
+        Undefined metrics (e.g. ROC AUC with one class) are ``None``.
+    """
+    y = np.asarray(y_true, dtype=float)
+    p = np.asarray(prob, dtype=float)
+    if y.shape != p.shape or y.ndim != 1:
+        raise ValueError("y_true and prob must be 1-D arrays of the same length")
+    if y.size == 0:
+        raise ValueError("Cannot compute metrics on an empty set")
+
+    blocks = ScoreBlocks(p)
+    k = blocks.prefix_len(threshold)
+
+    if groups is None:
+        codes, labels = None, []
+    else:
+        labels, codes = np.unique(np.asarray(groups).astype(str), return_inverse=True)
+    n_codes = max(len(labels), 1)
+
+    pos, tot = blocks.counts(y, codes, n_codes)
+    overall = metrics_from_blocks(pos.sum(axis=0), tot.sum(axis=0), k)
+    result: dict[str, Any] = {"overall": block_report(overall)}
+
+    if codes is not None:
+        per_group = metrics_from_blocks(pos, tot, k)
+        result["by_group"] = {
+            str(label): {
+                "n": int(tot[i].sum()),
+                "positive_rate": float(pos[i].sum() / tot[i].sum()),
+                **block_report(per_group, i),
+            }
+            for i, label in enumerate(labels)
+        }
+
+    if n_bootstrap > 0:
+        samples = _bootstrap(y, blocks, k, n_bootstrap, seed)
+        result["confidence_intervals"] = percentile_intervals(samples, confidence)
+
+    return result
+
+
+def percentile_intervals(samples: dict[str, np.ndarray], confidence: float = 0.95) -> dict[str, Any]:
+    """Two-sided percentile interval per metric over resampled values (NaNs ignored)."""
+    alpha = (1.0 - confidence) / 2.0
+    intervals: dict[str, Any] = {}
+    for name in METRIC_NAMES:
+        vals = samples[name][~np.isnan(samples[name])]
+        if vals.size == 0:
+            intervals[name] = None
+            continue
+        lo, hi = np.quantile(vals, [alpha, 1.0 - alpha])
+        intervals[name] = [float(lo), float(hi)]
+    return intervals
+
+
+def _bootstrap(
+    y: np.ndarray, blocks: ScoreBlocks, k: int, n_bootstrap: int, seed: int
+) -> dict[str, np.ndarray]:
+    """Metric distributions over ``n_bootstrap`` resamples, vectorized in batches."""
+    rng = np.random.default_rng(seed)
+    n = y.size
+    nb = blocks.n_blocks
+    batch = max(1, min(n_bootstrap, _BOOTSTRAP_BATCH_CELLS // n))
+
+    parts: dict[str, list[np.ndarray]] = {name: [] for name in METRIC_NAMES}
+    done = 0
+    while done < n_bootstrap:
+        b = min(batch, n_bootstrap - done)
+        idx = rng.integers(0, n, size=(b, n))
+        keys = (np.arange(b)[:, None] * nb + blocks.block[idx]).ravel()
+        pos = np.bincount(keys, weights=y[idx].ravel(), minlength=b * nb).reshape(b, nb)
+        tot = np.bincount(keys, minlength=b * nb).reshape(b, nb).astype(float)
+        values = metrics_from_blocks(pos, tot, k)
+        for name in METRIC_NAMES:
+            parts[name].append(values[name])
+        done += b
+
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
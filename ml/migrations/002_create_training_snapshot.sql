@@ -0,0 +1,71 @@
+-- ML Training Data Snapshot
+-- Run this in your Supabase SQL Editor after 001_create_training_view.sql
+--
+-- Materialized copy of ml_training_data so training reads scan a precomputed,
+-- indexed table instead of re-scanning vital_readings. Refresh it with:
+--   python ml/data_loader.py refresh-snapshot
+-- which runs REFRESH MATERIALIZED VIEW CONCURRENTLY and logs the refresh time.
+
+-- Row order is not part of a view's contract; sorting every read only costs
+-- a sort of vital_readings. Consumers that need an order ask for it.
+CREATE OR REPLACE VIEW ml_training_data AS
+SELECT
+  vr.id,
+  vr.student_id,
+  vr.patient_id,
+  vr.reading_number,
+
+  -- Core vital sign features
+  vr.blood_pressure_sys AS bp_systolic,
+  vr.blood_pressure_dia AS bp_diastolic,
+  vr.heart_rate,
+  CAST(vr.temperature AS FLOAT) AS temperature,
+  vr.respiratory_rate,
+  vr.oxygen_saturation,
+
+  -- Derived features
+  (vr.blood_pressure_sys - vr.blood_pressure_dia) AS pulse_pressure,
+
+  -- Optional features (handle nulls)
+  0 AS pain_level,
+
+  -- Target label (is_correct: FALSE = needs recheck/at_risk, TRUE = ok)
+  CASE
+    WHEN vr.is_correct IS NULL THEN NULL
+    WHEN vr.is_correct = FALSE THEN 1
+    ELSE 0
+  END AS at_risk,
+
+  vr.submitted_at,
+  vr.entered_by_role
+
+FROM vital_readings vr
+WHERE vr.is_correct IS NOT NULL;  -- Only include labeled data
+
+-- Snapshot with the same columns as ml_training_data
+CREATE MATERIALIZED VIEW IF NOT EXISTS ml_training_snapshot AS
+SELECT * FROM ml_training_data
+WITH DATA;
+
+-- Required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ml_training_snapshot_id
+ON ml_training_snapshot(id);
+
+-- Watermark index for incremental syncs (WHERE submitted_at >= ...)
+CREATE INDEX IF NOT EXISTS idx_ml_training_snapshot_submitted_at_id
+ON ml_training_snapshot(submitted_at, id);
+
+GRANT SELECT ON ml_training_snapshot TO authenticated;
+
+-- One row per refresh, written by the refresh-snapshot command
+CREATE TABLE IF NOT EXISTS ml_snapshot_refreshes (
+  id BIGSERIAL PRIMARY KEY,
+  view_name TEXT NOT NULL,
+  started_at TIMESTAMPTZ NOT NULL,
+  finished_at TIMESTAMPTZ NOT NULL,
+  duration_ms DOUBLE PRECISION NOT NULL,
+  row_count BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ml_snapshot_refreshes_view_finished
+ON ml_snapshot_refreshes(view_name, finished_at DESC);
@@ -0,0 +1,21 @@
+-- ML Prediction Log
+-- Run this in your Supabase SQL Editor after 002_create_training_snapshot.sql
+--
+-- Append-only audit log of /predict calls, written in batches by the
+-- prediction service when started with PREDICTION_LOG_SINK=postgres.
+
+CREATE TABLE IF NOT EXISTS ml_prediction_log (
+  id BIGSERIAL PRIMARY KEY,
+  logged_at TIMESTAMPTZ NOT NULL,
+  request_id TEXT NOT NULL,
+  model_version TEXT NOT NULL,
+  model_sha256 TEXT,
+  features JSONB NOT NULL,
+  output JSONB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_ml_prediction_log_logged_at
+ON ml_prediction_log(logged_at);
+
+CREATE INDEX IF NOT EXISTS idx_ml_prediction_log_model
+ON ml_prediction_log(model_sha256, logged_at);
@@ -0,0 +1,13 @@
+-- Grading timestamp for live accuracy tracking
+-- Run this in your Supabase SQL Editor after 003_create_prediction_log.sql
+--
+-- The instructor grading route sets graded_at alongside is_correct.
+-- python ml/live_accuracy.py update reads readings graded after its
+-- (graded_at, id) watermark through the index below.
+
+ALTER TABLE vital_readings
+ADD COLUMN IF NOT EXISTS graded_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_vital_readings_graded_at
+ON vital_readings(graded_at, id)
+WHERE graded_at IS NOT NULL;
@@ -0,0 +1,55 @@
+-- Grading time in the training view
+-- Run this in your Supabase SQL Editor after 004_add_graded_at.sql
+--
+-- Student history features (python ml/train.py --student-history) only count
+-- a grade from its graded_at, so the view exposes it. The snapshot was
+-- created from the old column list and is rebuilt.
+
+CREATE OR REPLACE VIEW ml_training_data AS
+SELECT
+  vr.id,
+  vr.student_id,
+  vr.patient_id,
+  vr.reading_number,
+
+  -- Core vital sign features
+  vr.blood_pressure_sys AS bp_systolic,
+  vr.blood_pressure_dia AS bp_diastolic,
+  vr.heart_rate,
+  CAST(vr.temperature AS FLOAT) AS temperature,
+  vr.respiratory_rate,
+  vr.oxygen_saturation,
+
+  -- Derived features
+  (vr.blood_pressure_sys - vr.blood_pressure_dia) AS pulse_pressure,
+
+  -- Optional features (handle nulls)
+  0 AS pain_level,
+
+  -- Target label (is_correct: FALSE = needs recheck/at_risk, TRUE = ok)
+  CASE
+    WHEN vr.is_correct IS NULL THEN NULL
+    WHEN vr.is_correct = FALSE THEN 1
+    ELSE 0
+  END AS at_risk,
+
+  vr.submitted_at,
+  vr.entered_by_role,
+  vr.graded_at
+
+FROM vital_readings vr
+WHERE vr.is_correct IS NOT NULL;  -- Only include labeled data
+
+DROP MATERIALIZED VIEW IF EXISTS ml_training_snapshot;
+
+CREATE MATERIALIZED VIEW ml_training_snapshot AS
+SELECT * FROM ml_training_data
+WITH DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ml_training_snapshot_id
+ON ml_training_snapshot(id);
+
+CREATE INDEX IF NOT EXISTS idx_ml_training_snapshot_submitted_at_id
+ON ml_training_snapshot(submitted_at, id);
+
+GRANT SELECT ON ml_training_snapshot TO authenticated;
@@ -0,0 +1,68 @@
+-- Patient reference vitals in the training view
+-- Run this in your Supabase SQL Editor after 005_add_graded_at_to_training_view.sql
+--
+-- Reference deviation features (python ml/train.py --patient-reference) are
+-- computed from the reading and its patient's correct_vitals; the view
+-- exposes the reference as ref_* columns. The snapshot is rebuilt again.
+
+CREATE OR REPLACE VIEW ml_training_data AS
+SELECT
+  vr.id,
+  vr.student_id,
+  vr.patient_id,
+  vr.reading_number,
+
+  -- Core vital sign features
+  vr.blood_pressure_sys AS bp_systolic,
+  vr.blood_pressure_dia AS bp_diastolic,
+  vr.heart_rate,
+  CAST(vr.temperature AS FLOAT) AS temperature,
+  vr.respiratory_rate,
+  vr.oxygen_saturation,
+
+  -- Derived features
+  (vr.blood_pressure_sys - vr.blood_pressure_dia) AS pulse_pressure,
+
+  -- Optional features (handle nulls)
+  0 AS pain_level,
+
+  -- Target label (is_correct: FALSE = needs recheck/at_risk, TRUE = ok)
+  CASE
+    WHEN vr.is_correct IS NULL THEN NULL
+    WHEN vr.is_correct = FALSE THEN 1
+    ELSE 0
+  END AS at_risk,
+
+  vr.submitted_at,
+  vr.entered_by_role,
+  vr.graded_at,
+
+  -- Patient reference vitals (NULL until an instructor records them)
+  cv.blood_pressure_sys AS ref_bp_systolic,
+  cv.blood_pressure_dia AS ref_bp_diastolic,
+  cv.heart_rate AS ref_heart_rate,
+  CAST(cv.temperature AS FLOAT) AS ref_temperature,
+  cv.respiratory_rate AS ref_respiratory_rate,
+  cv.oxygen_saturation AS ref_oxygen_saturation
+
+FROM vital_readings vr
+LEFT JOIN correct_vitals cv ON cv.patient_id = vr.patient_id
+WHERE vr.is_correct IS NOT NULL;  -- Only include labeled data
+
+DROP MATERIALIZED VIEW IF EXISTS ml_training_snapshot;
+
+CREATE MATERIALIZED VIEW ml_training_snapshot AS
+SELECT * FROM ml_training_data
+WITH DATA;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ml_training_snapshot_id
+ON ml_training_snapshot(id);
+
+CREATE INDEX IF NOT EXISTS idx_ml_training_snapshot_submitted_at_id
+ON ml_training_snapshot(submitted_at, id);
+
+GRANT SELECT ON ml_training_snapshot TO authenticated;
+
+-- Incremental refreshes of the service's patient reference index
+CREATE INDEX IF NOT EXISTS idx_correct_vitals_created_at_id
+ON correct_vitals(created_at, id);
@@ -0,0 +1,131 @@
+"""
+Candidate estimators and latency-aware model selection for train.py.
+
+Each candidate is fitted on the same split and scored on a validation set
+held out from the training rows (SELECTION_SIZE), never on the test split
+that the final report is computed from. Its inference latency is measured
+on the training box the way the service calls it (one-row DataFrame per
+request) and in batches, and the most accurate candidate whose single-row p99
+fits the latency budget is selected.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+DEFAULT_LATENCY_BUDGET_MS = 5.0
+SELECTION_METRIC = "roc_auc"
+# Share of the training split held out to score candidates
+SELECTION_SIZE = 0.2
+
+
+def _logreg(seed: int) -> Any:
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("clf", LogisticRegression(max_iter=2000, class_weight="balanced")),
+    ])
+
+
+def _hgb(seed: int) -> Any:
+    return HistGradientBoostingClassifier(
+        max_iter=200,
+        learning_rate=0.1,
+        class_weight="balanced",
+        random_state=seed,
+    )
+
+
+ESTIMATORS: dict[str, Callable[[int], Any]] = {
+    "logreg": _logreg,
+    "hgb": _hgb,
+}
+
+
+def build_estimator(name: str, seed: int = 7) -> Any:
+    if name not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator: {name}. Choose from {sorted(ESTIMATORS)}")
+    return ESTIMATORS[name](seed)
+
+
+def _percentiles_ms(samples: list[float]) -> dict[str, float]:
+    arr = np.asarray(samples) * 1e3
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p99_ms": float(np.percentile(arr, 99)),
+    }
+
+
+def measure_latency(
+    model: Any,
+    X: pd.DataFrame,
+    n_single: int = 200,
+    batch_size: int = 1000,
+    n_batches: int = 10,
+    warmup: int = 5,
+) -> dict[str, Any]:
+    """
+    Time ``predict_proba`` for single rows and for batches of ``batch_size``.
+
+    Single-row calls use a one-row DataFrame, matching predict_from_json.
+    """
+    if X.empty:
+        raise ValueError("Need at least one row to measure latency")
+
+    rows = [X.iloc[[i % len(X)]] for i in range(n_single)]
+    for row in rows[:warmup]:
+        model.predict_proba(row)
+    single = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single.append(time.perf_counter() - start)
+
+    reps = -(-batch_size // len(X))
+    batch_X = pd.concat([X] * reps, ignore_index=True).iloc[:batch_size] if reps > 1 else X.iloc[:batch_size]
+    model.predict_proba(batch_X)
+    batches = []
+    for _ in range(n_batches):
+        start = time.perf_counter()
+        model.predict_proba(batch_X)
+        batches.append(time.perf_counter() - start)
+
+    batch_stats = _percentiles_ms(batches)
+    return {
+        "single_row": _percentiles_ms(single),
+        "batch": {
+            "batch_size": int(len(batch_X)),
+            **batch_stats,
+            "rows_per_second": float(len(batch_X) / np.median(batches)),
+        },
+    }
+
+
+def select_model(
+    candidates: dict[str, dict[str, Any]],
+    latency_budget_ms: float,
+    metric: str = SELECTION_METRIC,
+) -> str:
+    """
+    Pick the best ``metric`` among candidates whose single-row p99 fits the budget.
+
+    ``candidates`` maps name -> {metric: float | None, "latency": measure_latency(...)}.
+    If nothing fits, the fastest candidate is returned.
+    """
+    if not candidates:
+        raise ValueError("No candidates to select from")
+
+    def p99(name: str) -> float:
+        return candidates[name]["latency"]["single_row"]["p99_ms"]
+
+    within = [n for n in candidates if p99(n) <= latency_budget_ms]
+    if not within:
+        return min(candidates, key=p99)
+    # Ties on the metric go to the faster model
+    return max(within, key=lambda n: (candidates[n].get(metric) or 0.0, -p99(n)))
@@ -1,17 +1,32 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import sys
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, BinaryIO
 
 import joblib
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from ml.fast_model import load_fast_model  # pragma: no cover
+else:
+    try:
+        from ml.fast_model import load_fast_model
+    except Exception:
+        from fast_model import load_fast_model
+
 REPO_ROOT = Path(__file__).resolve().parents[1]
 MODEL_PATH = REPO_ROOT / "ml" / "artifacts" / "model.joblib"
+FAST_MODEL_PATH = REPO_ROOT / "ml" / "artifacts" / "model.gvm"
 METRICS_PATH = REPO_ROOT / "ml" / "artifacts" / "metrics.json"
+CALIBRATION_PATH = REPO_ROOT / "ml" / "artifacts" / "calibration.json"
+
+DEFAULT_STDIO_BATCH = 64
+_STDIO_READ_SIZE = 1 << 16
 
 
 def load_metrics() -> dict[str, Any]:
@@ -25,6 +40,46 @@ def load_metrics() -> dict[str, Any]:
     return data
 
 
+def model_fingerprint(path: Path) -> str:
+    """SHA-256 of a model artifact, recorded with each prediction it makes."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_model(model_path: Path) -> Any:
+    """
+    Load a model artifact, preferring the pickle-free fast format.
+
+    A ``.gvm`` path is loaded directly. For a ``.joblib`` path, a sibling
+    ``model.gvm`` that is at least as new is used instead, which avoids
+    unpickling and importing sklearn. A sibling calibration.json (written by
+    ``train.py --calibration``) wraps the model in a ``CalibratedModel``.
+    """
+    model = _load_raw_model(model_path)
+    calibration_path = model_path.with_name(CALIBRATION_PATH.name)
+    if calibration_path.exists():
+        return CalibratedModel(model, Calibrator(json.loads(calibration_path.read_text())))
+    return model
+
+
+def _load_raw_model(model_path: Path) -> Any:
+    if model_path.suffix == FAST_MODEL_PATH.suffix:
+        return load_fast_model(model_path)
+
+    fast_path = model_path.with_name(FAST_MODEL_PATH.name)
+    if fast_path.exists() and (
+        not model_path.exists() or fast_path.stat().st_mtime >= model_path.stat().st_mtime
+    ):
+        return load_fast_model(fast_path)
+    obj = joblib.load(model_path)
+    if isinstance(obj, dict) and obj.get("format") == AGE_GROUP_BUNDLE_FORMAT:
+        return AgeGroupModel.from_bundle(obj)
+    return obj
+
+
 def get_feature_names(model: Any, metrics: dict[str, Any]) -> list[str]:
     # Best case: sklearn stores feature names when trained on a DataFrame
     names = getattr(model, "feature_names_in_", None)
@@ -64,6 +119,164 @@ def _age_group(age: float) -> str:
     return "senior"
 
 
+# Upper age bounds (exclusive) of each group, matching _age_group
+_AGE_GROUP_EDGES = [1, 13, 18, 65]
+AGE_GROUP_NAMES = ["neonate", "child", "teen", "adult", "senior"]
+
+
+def age_group_codes(ages: np.ndarray) -> np.ndarray:
+    """Index into AGE_GROUP_NAMES per age; missing ages get len(AGE_GROUP_NAMES)."""
+    ages = np.asarray(ages, dtype=np.float64)
+    idx = np.digitize(ages, _AGE_GROUP_EDGES)
+    idx[np.isnan(ages)] = len(AGE_GROUP_NAMES)
+    return idx
+
+
+AGE_GROUP_BUNDLE_FORMAT = "age_group_models/v1"
+
+
+class AgeGroupModel:
+    """
+    One model per age group behind a single ``predict_proba``.
+
+    Rows are routed by ``age_years``; groups without a model of their own go
+    to ``fallback``. Rows are not imputed, so a missing age is rejected like
+    any other missing feature. A batch is split by model, scored with one
+    call per model and merged back in the original order.
+
+    Saved to model.joblib as a plain dict of fitted estimators (``to_bundle``)
+    so the artifact does not depend on how this module was imported.
+    """
+
+    def __init__(self, models: dict[str, Any], fallback: Any):
+        unknown = sorted(set(models) - set(AGE_GROUP_NAMES))
+        if unknown:
+            raise ValueError(f"Unknown age groups: {unknown}. Expected some of {AGE_GROUP_NAMES}")
+        self.models = dict(models)
+        self.fallback = fallback
+        # _route[age_group_codes() value] indexes _targets; 0 is the fallback
+        owned = [g for g in AGE_GROUP_NAMES if g in self.models]
+        self._targets = [fallback] + [self.models[g] for g in owned]
+        self._route = np.array(
+            [owned.index(g) + 1 if g in self.models else 0 for g in AGE_GROUP_NAMES] + [0]
+        )
+
+    @property
+    def feature_names_in_(self) -> np.ndarray:
+        return self.fallback.feature_names_in_
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.fallback.classes_
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        route = self._route[age_group_codes(X["age_years"].to_numpy(dtype=np.float64))]
+        if len(route) == 1:
+            return self._targets[route[0]].predict_proba(X)
+
+        out = np.empty((len(X), len(self.classes_)))
+        for target in np.unique(route):
+            rows = np.flatnonzero(route == target)
+            out[rows] = self._targets[target].predict_proba(X.iloc[rows])
+        return out
+
+    def to_bundle(self) -> dict[str, Any]:
+        return {"format": AGE_GROUP_BUNDLE_FORMAT, "models": self.models, "fallback": self.fallback}
+
+    @classmethod
+    def from_bundle(cls, bundle: dict[str, Any]) -> "AgeGroupModel":
+        return cls(bundle["models"], bundle["fallback"])
+
+
+CALIBRATION_FORMAT = "piecewise_calibration/v1"
+
+
+class Calibrator:
+    """
+    Piecewise-linear map from raw to calibrated probability, per age group.
+
+    ``table`` holds knots ``{"x": [...], "y": [...]}`` (x increasing) under
+    ``"default"`` and, optionally, per age group under ``"groups"``; rows of a
+    group without its own curve, or without an age, use the default. Applying
+    it is one ``np.interp`` (a binary search over the knots) per group.
+    """
+
+    def __init__(self, table: dict[str, Any]):
+        if table.get("format") != CALIBRATION_FORMAT:
+            raise ValueError(f"Unsupported calibration format: {table.get('format')!r}")
+        self.table = table
+        self.method = table.get("method")
+        groups = table.get("groups", {})
+        default = self._curve(table["default"])
+        # Curve per age_group_codes() value, the last entry being missing ages
+        self._curves = [
+            self._curve(groups[g]) if g in groups else default for g in AGE_GROUP_NAMES
+        ] + [default]
+
+    @staticmethod
+    def _curve(knots: dict[str, Any]) -> tuple[np.ndarray, np.ndarray]:
+        x = np.asarray(knots["x"], dtype=np.float64)
+        y = np.asarray(knots["y"], dtype=np.float64)
+        if x.ndim != 1 or x.shape != y.shape or len(x) == 0 or np.any(np.diff(x) < 0):
+            raise ValueError("Calibration knots must be non-empty, equal-length, increasing arrays")
+        return x, y
+
+    def apply(self, prob: np.ndarray, ages: np.ndarray | None = None) -> np.ndarray:
+        prob = np.asarray(prob, dtype=np.float64)
+        if ages is None:
+            return np.interp(prob, *self._curves[-1])
+        codes = age_group_codes(ages)
+        if len(codes) == 1:
+            return np.interp(prob, *self._curves[codes[0]])
+        out = np.empty_like(prob)
+        for code in np.unique(codes):
+            rows = codes == code
+            out[rows] = np.interp(prob[rows], *self._curves[code])
+        return out
+
+
+class CalibratedModel:
+    """A model whose positive-class probability goes through a ``Calibrator``."""
+
+    def __init__(self, model: Any, calibrator: Calibrator):
+        self.model = model
+        self.calibrator = calibrator
+
+    @property
+    def feature_names_in_(self) -> np.ndarray:
+        return self.model.feature_names_in_
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return getattr(self.model, "classes_", np.array([0, 1]))
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        raw = self.model.predict_proba(X)[:, 1]
+        if isinstance(X, pd.DataFrame):
+            ages = X["age_years"].to_numpy(dtype=np.float64) if "age_years" in X.columns else None
+        else:
+            names = list(self.feature_names_in_)
+            ages = np.asarray(X, dtype=np.float64)[:, names.index("age_years")] if "age_years" in names else None
+        prob = self.calibrator.apply(raw, ages)
+        return np.column_stack([1 - prob, prob])
+
+
+def resolve_thresholds(
+    metrics: dict[str, Any],
+    ages: np.ndarray | None,
+    default_threshold: float,
+) -> np.ndarray | float:
+    """Vectorized _resolve_threshold: per-row thresholds for an array of ages."""
+    thresholds = metrics.get("age_group_thresholds")
+    if ages is None or not isinstance(thresholds, dict):
+        return default_threshold
+    # Missing ages use the default threshold (the last entry)
+    table = np.array(
+        [float(thresholds.get(g, default_threshold)) for g in AGE_GROUP_NAMES] + [default_threshold]
+    )
+    return table[age_group_codes(ages)]
+
+
 def _resolve_threshold(metrics: dict[str, Any], payload: dict[str, Any], default_threshold: float) -> float:
     thresholds = metrics.get("age_group_thresholds")
     if not isinstance(thresholds, dict):
@@ -118,15 +331,178 @@ def predict_from_json(
     }
 
 
+def predict_batch_from_json(
+    model: Any,
+    payloads: list[Any],
+    feature_names: list[str],
+    threshold: float,
+    metrics: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    ``predict_from_json`` for many payloads with one ``predict_proba`` call.
+
+    Results come back in input order; a payload that fails validation
+    (including null or non-finite values) gets ``{"error": message}`` in its
+    slot instead of failing the batch. If the batched call raises anyway, the
+    rows are scored one by one so only the failing ones get an error.
+    """
+    results: list[dict[str, Any]] = [{} for _ in payloads]
+    rows, valid = [], []
+    for i, payload in enumerate(payloads):
+        try:
+            if not isinstance(payload, dict):
+                raise ValueError("Payload must be a JSON object (dictionary).")
+            data = _coerce_payload(payload, feature_names)
+            missing = sorted(set(feature_names) - set(data))
+            if missing:
+                results[i] = {"error": "Missing required features", "missing": missing}
+                continue
+            try:
+                row = np.array([data[k] for k in feature_names], dtype=np.float64)
+            except (TypeError, ValueError) as exc:
+                raise ValueError(f"Non-numeric feature value: {exc}") from exc
+            bad = [k for k, v in zip(feature_names, row) if not np.isfinite(v)]
+            if bad:
+                results[i] = {"error": "Missing or non-finite feature values", "features": bad}
+                continue
+            rows.append(row)
+        except ValueError as exc:
+            results[i] = {"error": str(exc)}
+            continue
+        valid.append(i)
+        results[i] = {
+            "threshold": _resolve_threshold(metrics or {}, data, threshold),
+            "extra_fields_ignored": sorted(set(data) - set(feature_names)),
+        }
+
+    if valid:
+        df = pd.DataFrame(np.vstack(rows), columns=feature_names)
+        try:
+            probs = model.predict_proba(df)[:, 1].tolist()
+        except Exception:
+            probs = [_score_row(model, df.iloc[[j]]) for j in range(len(df))]
+        for i, prob in zip(valid, probs):
+            if isinstance(prob, dict):
+                results[i] = prob
+                continue
+            threshold_used = results[i]["threshold"]
+            results[i] = {
+                "pred": int(prob >= threshold_used),
+                "risk_probability": prob,
+                "threshold": threshold_used,
+                "extra_fields_ignored": results[i]["extra_fields_ignored"],
+            }
+    return results
+
+
+def _score_row(model: Any, row: pd.DataFrame) -> float | dict[str, str]:
+    try:
+        return float(model.predict_proba(row)[0, 1])
+    except Exception as exc:
+        return {"error": f"Scoring failed: {type(exc).__name__}: {exc}"}
+
+
+def serve_stdio(
+    model: Any,
+    feature_names: list[str],
+    threshold: float,
+    metrics: dict[str, Any] | None,
+    stdin: BinaryIO,
+    stdout: BinaryIO,
+    max_batch: int = DEFAULT_STDIO_BATCH,
+) -> int:
+    """
+    Answer newline-delimited JSON requests until EOF; returns how many.
+
+    Each input line gets exactly one output line, in order. A request's
+    optional ``"id"`` is echoed back and not treated as a feature. Lines that
+    have already arrived when a read returns are scored together, up to
+    ``max_batch`` per ``predict_proba`` call, so a pipelining client gets
+    batched throughput while a one-at-a-time client is answered immediately.
+    """
+    if max_batch <= 0:
+        raise ValueError("max_batch must be positive")
+    served = 0
+    pending = b""
+    while True:
+        # read1 returns what is available (blocking only when nothing is)
+        chunk = stdin.read1(_STDIO_READ_SIZE)
+        if chunk:
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+        else:
+            lines, pending = [pending], b""
+        lines = [line for line in lines if line.strip()]
+        for start in range(0, len(lines), max_batch):
+            stdout.write(_answer_lines(
+                model, lines[start : start + max_batch], feature_names, threshold, metrics
+            ))
+            stdout.flush()
+            served += len(lines[start : start + max_batch])
+        if not chunk:
+            return served
+
+
+def _answer_lines(
+    model: Any,
+    lines: list[bytes],
+    feature_names: list[str],
+    threshold: float,
+    metrics: dict[str, Any] | None,
+) -> bytes:
+    payloads: list[Any] = []
+    ids: list[Any] = []
+    results: dict[int, dict[str, Any]] = {}
+    for i, line in enumerate(lines):
+        request_id = None
+        try:
+            payload = json.loads(line)
+        except ValueError as exc:
+            results[i] = {"error": f"Invalid JSON: {exc}"}
+            payload = None
+        if isinstance(payload, dict) and "id" in payload:
+            payload = dict(payload)
+            request_id = payload.pop("id")
+        payloads.append(payload)
+        ids.append(request_id)
+
+    scorable = [i for i in range(len(lines)) if i not in results]
+    scored = predict_batch_from_json(
+        model, [payloads[i] for i in scorable], feature_names, threshold, metrics
+    )
+    results.update(zip(scorable, scored))
+    out = []
+    for i, request_id in enumerate(ids):
+        result = results[i] if request_id is None else {"id": request_id, **results[i]}
+        out.append(json.dumps(result, separators=(",", ":")) + "\n")
+    return "".join(out).encode()
+
+
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--model", type=str, default=str(MODEL_PATH), help="Path to model.joblib")
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=str(MODEL_PATH),
+        help="Path to model.joblib or model.gvm (a newer model.gvm next to model.joblib is preferred)",
+    )
     parser.add_argument(
         "--json",
         type=str,
         default="",
         help="JSON string with feature values (must match training feature names).",
     )
+    parser.add_argument(
+        "--serve-stdio",
+        action="store_true",
+        help="Load the model once, then answer one JSON request per stdin line on stdout",
+    )
+    parser.add_argument(
+        "--max-batch",
+        type=int,
+        default=DEFAULT_STDIO_BATCH,
+        help="Most buffered --serve-stdio lines scored per model call (1 disables micro-batching)",
+    )
     args = parser.parse_args()
 
     model_path = Path(args.model).expanduser().resolve()
@@ -134,10 +510,16 @@ def main() -> None:
         raise FileNotFoundError(f"Model not found: {model_path}. Run: python ml/train.py")
 
     metrics = load_metrics()
-    model = joblib.load(model_path)
+    model = load_model(model_path)
     feature_names = get_feature_names(model, metrics)
     threshold = float(metrics.get("threshold", 0.5))
 
+    if args.serve_stdio:
+        serve_stdio(
+            model, feature_names, threshold, metrics, sys.stdin.buffer, sys.stdout.buffer, args.max_batch
+        )
+        return
+
     if not args.json:
         # Build a safe example matching the trained feature names
         defaults = {
@@ -0,0 +1,87 @@
+"""
+Per-stage wall time and peak memory profiling for the training pipeline.
+
+Peak memory comes from ``tracemalloc``, which sees Python and NumPy
+allocations (pandas/sklearn buffers included) but not memory held by native
+libraries that bypass the Python allocator (e.g. libpq result buffers).
+"""
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator
+
+
+@dataclass
+class StageTiming:
+    name: str
+    wall_seconds: float
+    peak_mem_bytes: int
+    rows: int | None = None
+
+
+class StageProfiler:
+    """
+    Records wall time and peak traced memory for named stages.
+
+    Stages may nest; an outer stage's peak includes its inner stages. A
+    disabled profiler records nothing and adds no tracing overhead.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages: list[StageTiming] = []
+        self._child_peaks: list[int] = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self._child_peaks:
+            # Fold the running peak into the enclosing stage before resetting
+            self._child_peaks[-1] = max(self._child_peaks[-1], tracemalloc.get_traced_memory()[1])
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        self._child_peaks.append(0)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            peak = max(tracemalloc.get_traced_memory()[1], self._child_peaks.pop())
+            self.stages.append(
+                StageTiming(name=name, wall_seconds=wall, peak_mem_bytes=max(peak - baseline, 0), rows=rows)
+            )
+            if self._child_peaks:
+                self._child_peaks[-1] = max(self._child_peaks[-1], peak)
+            elif self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def report(self) -> list[dict]:
+        return [asdict(s) for s in self.stages]
+
+    def format_table(self) -> str:
+        lines = [f"{'stage':<20} {'wall_s':>10} {'peak_MiB':>10}"]
+        for s in self.stages:
+            lines.append(f"{s.name:<20} {s.wall_seconds:>10.4f} {s.peak_mem_bytes / 2**20:>10.1f}")
+        return "\n".join(lines)
+
+    def write_json(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2))
+
+
+# Shared no-op profiler for callers that don't profile
+NULL_PROFILER = StageProfiler(enabled=False)
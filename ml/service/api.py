@@ -1,20 +1,77 @@
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-import joblib
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException
 
-from ml.predict import get_feature_names, load_metrics, predict_from_json
+from ml.drift import DriftMonitor, load_profile
+from ml.live_accuracy import STATE_PATH as LIVE_ACCURACY_STATE, load_report
+from ml.predict import (
+    get_feature_names,
+    load_metrics,
+    load_model,
+    model_fingerprint,
+    predict_from_json,
+)
+from ml.service.inference import model_from_env
+from ml.service.patient_reference import DEVIATION_FEATURES, PatientReferenceIndex
+from ml.service.prediction_log import logger_from_env
 from ml.service.schemas import PredictOut, VitalsIn
+from ml.service.traffic_capture import capture_from_env
+from ml.student_history import HISTORY_FEATURES, StudentHistoryStore
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
-
-app = FastAPI(title="GitVitals Prediction Service", version="0.1.0")
+MODEL_VERSION = "0.1.0"
 
 metrics = load_metrics()
 model_path = REPO_ROOT / "ml" / "artifacts" / "model.joblib"
-model = joblib.load(model_path)
+model = load_model(model_path)
+model_sha256 = model_fingerprint(model_path) if model_path.exists() else None
 feature_names = get_feature_names(model, metrics)
 threshold = float(metrics.get("threshold", 0.5))
+# In-process until startup; INFERENCE_BACKEND=process then swaps in warm
+# worker processes, so importing the app never spawns any
+scorer = model
+prediction_log = logger_from_env()
+# Off unless TRAFFIC_CAPTURE_DIR is set; replay with python -m ml.benchmarks.replay
+traffic_capture = capture_from_env()
+# Absent until the model is retrained with a feature profile
+feature_profile = load_profile(REPO_ROOT / "ml" / "artifacts" / "feature_profile.json")
+drift_monitor = DriftMonitor(feature_profile) if feature_profile else None
+# Only models trained with --student-history need the store
+history_store = StudentHistoryStore() if set(HISTORY_FEATURES) & set(feature_names) else None
+# Likewise --patient-reference
+reference_index = PatientReferenceIndex() if set(DEVIATION_FEATURES) & set(feature_names) else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global scorer
+    scorer = model_from_env(model, model_path, feature_names)
+    has_db = bool(os.getenv("DATABASE_URL") or os.getenv("SUPABASE_DB_URL"))
+    if history_store is not None:
+        if has_db:
+            history_store.start_sync(float(os.getenv("STUDENT_HISTORY_REFRESH_SECONDS", "30")))
+        else:
+            print("No DATABASE_URL; student history features use cold-start values")
+    if reference_index is not None:
+        if has_db:
+            reference_index.start_sync(float(os.getenv("PATIENT_REFERENCE_REFRESH_SECONDS", "60")))
+        else:
+            print("No DATABASE_URL; patient reference features report no reference")
+    yield
+    # Flush whatever is still queued before the process exits
+    prediction_log.close()
+    if traffic_capture is not None:
+        traffic_capture.close()
+    if scorer is not model:
+        scorer.close()
+        scorer = model
+
+
+app = FastAPI(title="GitVitals Prediction Service", version=MODEL_VERSION, lifespan=lifespan)
 
 
 @app.get("/health")
@@ -22,8 +79,38 @@ def health():
     return {"ok": True}
 
 
+@app.get("/prediction-log")
+def prediction_log_stats():
+    return prediction_log.stats()
+
+
+@app.get("/drift")
+def drift():
+    if drift_monitor is None:
+        raise HTTPException(
+            status_code=503, detail="No feature_profile.json in ml/artifacts; retrain the model"
+        )
+    return drift_monitor.scores()
+
+
+@app.get("/live-accuracy")
+def live_accuracy():
+    # Written by: python ml/live_accuracy.py update
+    report = load_report(LIVE_ACCURACY_STATE)
+    if report is None:
+        raise HTTPException(status_code=503, detail="No live accuracy state; run ml/live_accuracy.py update")
+    return report
+
+
+async def arrival_time() -> float:
+    # Resolved on the event loop, before the handler waits for a threadpool slot
+    return time.time()
+
+
 @app.post("/predict", response_model=PredictOut)
-def predict(v: VitalsIn):
+def predict(v: VitalsIn, arrived_at: float = Depends(arrival_time)):
+    if traffic_capture is not None:
+        traffic_capture.record("/predict", v.model_dump(exclude_none=True), arrived_at)
     payload = {
         "age_years": v.age_years,
         "bp_systolic": v.systolic_bp,
@@ -35,12 +122,26 @@ def predict(v: VitalsIn):
         "pulse_pressure": v.systolic_bp - v.diastolic_bp,
         "pain_level": v.pain_0_10,
     }
+    if history_store is not None:
+        payload.update(history_store.features(v.student_id))
+    if reference_index is not None:
+        payload.update(reference_index.features(v.patient_id, payload))
 
-    result = predict_from_json(model, payload, feature_names, threshold, metrics)
+    result = predict_from_json(scorer, payload, feature_names, threshold, metrics)
+    if drift_monitor is not None:
+        drift_monitor.update(payload)
+    prediction_log.log({
+        "ts": time.time(),
+        "request_id": uuid.uuid4().hex,
+        "model_version": MODEL_VERSION,
+        "model_sha256": model_sha256,
+        "features": payload,
+        "output": result,
+    })
     return PredictOut(
         p_flag=result["risk_probability"],
         pred_flag=result["pred"],
         threshold=result["threshold"],
         reasons=["Risk probability compared to threshold"],
-        model_version="0.1.0",
+        model_version=MODEL_VERSION,
     )
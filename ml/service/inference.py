@@ -0,0 +1,220 @@
+"""
+Inference backends for the prediction service.
+
+By default /predict scores in the handler thread, sharing the GIL with
+request parsing and response serialization. ``ProcessPoolModel`` instead
+keeps ``workers`` warm processes, each holding its own copy of the model,
+and stands in for the model wherever ``predict_proba`` is called.
+
+Every worker owns a pair of shared-memory blocks: a (max_rows x features)
+float64 input matrix and a max_rows output vector. A call takes an idle
+worker, copies the feature matrix into its input block, sends the row count
+over a pipe and reads the probabilities back from the output block, so only
+two small integers are pickled per call. Batches larger than ``max_rows``
+are scored in chunks. Concurrent callers (the service's threadpool) use
+different workers; a caller waits only when all of them are busy.
+
+Workers are spawned, not forked, because the service process already runs
+threads. A worker that dies is replaced on the next call that needs it.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from ml.predict import load_model  # pragma: no cover
+else:
+    try:
+        from ml.predict import load_model
+    except Exception:
+        from predict import load_model
+
+BACKENDS = ("thread", "process")
+DEFAULT_MAX_ROWS = 4096
+
+
+def _worker(
+    model_path: str,
+    feature_names: list[str],
+    in_name: str,
+    out_name: str,
+    max_rows: int,
+    conn: Any,
+) -> None:
+    model = load_model(Path(model_path))
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    X = np.ndarray((max_rows, len(feature_names)), dtype=np.float64, buffer=in_shm.buf)
+    prob = np.ndarray((max_rows,), dtype=np.float64, buffer=out_shm.buf)
+    conn.send(("ready", None))
+    try:
+        while True:
+            n = conn.recv()
+            if n is None:
+                break
+            try:
+                frame = pd.DataFrame(X[:n], columns=feature_names, copy=False)
+                prob[:n] = model.predict_proba(frame)[:, 1]
+                conn.send(("ok", None))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        del X, prob
+        in_shm.close()
+        out_shm.close()
+
+
+class _Worker:
+    def __init__(self, ctx: Any, model_path: Path, feature_names: list[str], max_rows: int):
+        self.in_shm = shared_memory.SharedMemory(create=True, size=max_rows * len(feature_names) * 8)
+        self.out_shm = shared_memory.SharedMemory(create=True, size=max_rows * 8)
+        self.X = np.ndarray((max_rows, len(feature_names)), dtype=np.float64, buffer=self.in_shm.buf)
+        self.prob = np.ndarray((max_rows,), dtype=np.float64, buffer=self.out_shm.buf)
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker,
+            args=(str(model_path), feature_names, self.in_shm.name, self.out_shm.name, max_rows, child),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+    def wait_ready(self) -> None:
+        status, _ = self._recv()
+        if status != "ready":
+            raise RuntimeError(f"Inference worker failed to start: {status}")
+
+    def _recv(self) -> tuple[str, Any]:
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Inference worker {self.process.pid} exited") from e
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        n = len(X)
+        self.X[:n] = X
+        self.conn.send(n)
+        status, detail = self._recv()
+        if status != "ok":
+            raise ValueError(detail)
+        return self.prob[:n].copy()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        del self.X, self.prob
+        for shm in (self.in_shm, self.out_shm):
+            shm.close()
+            shm.unlink()
+
+
+class ProcessPoolModel:
+    """
+    ``predict_proba`` served by a pool of warm worker processes.
+
+    ``model_path`` is loaded in each worker with ``predict.load_model``, so
+    it may be a model.joblib, an age-group bundle or a model.gvm.
+    """
+
+    def __init__(
+        self,
+        model_path: Path,
+        feature_names: Sequence[str],
+        workers: int | None = None,
+        max_rows: int = DEFAULT_MAX_ROWS,
+    ):
+        if max_rows <= 0:
+            raise ValueError("max_rows must be positive")
+        self.model_path = Path(model_path)
+        self.feature_names_in_ = np.array(list(feature_names), dtype=object)
+        self.classes_ = np.array([0, 1])
+        self.max_rows = max_rows
+        self.n_workers = workers or os.cpu_count() or 1
+        self._ctx = mp.get_context("spawn")
+        self._idle: queue.Queue[int] = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [self._start() for _ in range(self.n_workers)]
+        # Start them all before waiting so the model loads overlap
+        for i, worker in enumerate(self._workers):
+            worker.wait_ready()
+            self._idle.put(i)
+
+    def _start(self) -> _Worker:
+        return _Worker(self._ctx, self.model_path, list(self.feature_names_in_), self.max_rows)
+
+    def predict_proba(self, X: pd.DataFrame | np.ndarray) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)].to_numpy(dtype=np.float64)
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if X.shape[1] != len(self.feature_names_in_):
+            raise ValueError(f"Expected {len(self.feature_names_in_)} features, got {X.shape[1]}")
+
+        prob = np.concatenate(
+            [self._score(X[i : i + self.max_rows]) for i in range(0, len(X), self.max_rows)]
+        ) if len(X) else np.empty(0)
+        return np.column_stack([1 - prob, prob])
+
+    def _score(self, X: np.ndarray) -> np.ndarray:
+        if self._closed:
+            raise RuntimeError("ProcessPoolModel is closed")
+        i = self._idle.get()
+        try:
+            return self._workers[i].score(X)
+        except RuntimeError:
+            # The worker died; replace it so the pool keeps its size
+            with self._lock:
+                self._workers[i].close()
+                self._workers[i] = self._start()
+                self._workers[i].wait_ready()
+            raise
+        finally:
+            self._idle.put(i)
+
+    def close(self) -> None:
+        self._closed = True
+        for _ in range(self.n_workers):
+            worker = self._workers[self._idle.get()]
+            worker.close()
+
+    def __enter__(self) -> "ProcessPoolModel":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def model_from_env(model: Any, model_path: Path, feature_names: Sequence[str]) -> Any:
+    """
+    The model the service scores with, per INFERENCE_BACKEND.
+
+    ``thread`` (default) returns ``model`` itself; ``process`` returns a
+    ``ProcessPoolModel`` with INFERENCE_WORKERS processes (default: CPU count).
+    """
+    backend = os.getenv("INFERENCE_BACKEND", "thread").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {BACKENDS}, got {backend!r}")
+    if backend == "thread":
+        return model
+    workers = os.getenv("INFERENCE_WORKERS")
+    return ProcessPoolModel(
+        model_path,
+        feature_names,
+        workers=int(workers) if workers else None,
+        max_rows=int(os.getenv("INFERENCE_MAX_ROWS", DEFAULT_MAX_ROWS)),
+    )
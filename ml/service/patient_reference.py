@@ -0,0 +1,244 @@
+"""
+Patient reference vitals and the deviation features derived from them.
+
+Instructors record each simulated patient's correct vitals once
+(correct_vitals, one row per patient). A student's reading is then judged
+against them, so the error per vital is a direct signal:
+
+    ref_available        1 if the patient has reference vitals, else 0
+    <vital>_abs_err      |reading - reference|
+    <vital>_rel_err      |reading - reference| / reference
+
+for the six vitals in REFERENCE_VITALS. Without a reference the errors are 0
+and ref_available tells the model so.
+
+``PatientReferenceIndex`` holds every patient's reference as one row of a
+float64 matrix keyed by patient_id. It is bulk-loaded with one COPY and then
+refreshed with a keyset query on (created_at, id); the app only ever inserts
+into correct_vitals, so that sees every change. ``deviation_features`` is
+shared with train.py, which reads the same references from the ref_* columns
+of ml_training_data (migrations/006).
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Mapping
+
+import numpy as np
+import pandas as pd
+import psycopg
+
+if TYPE_CHECKING:
+    from ml.data_loader import get_database_url, read_copy_csv  # pragma: no cover
+else:
+    try:
+        from ml.data_loader import get_database_url, read_copy_csv
+    except Exception:
+        from data_loader import get_database_url, read_copy_csv
+
+# Reading column -> correct_vitals column
+REFERENCE_VITALS = {
+    "bp_systolic": "blood_pressure_sys",
+    "bp_diastolic": "blood_pressure_dia",
+    "heart_rate": "heart_rate",
+    "temperature": "temperature",
+    "respiratory_rate": "respiratory_rate",
+    "oxygen_saturation": "oxygen_saturation",
+}
+_VITALS = list(REFERENCE_VITALS)
+
+# Reference columns exposed by ml_training_data for training
+REFERENCE_COLUMNS = tuple(f"ref_{v}" for v in _VITALS)
+DEVIATION_FEATURES = ("ref_available",) + tuple(
+    f"{v}_{kind}" for v in _VITALS for kind in ("abs_err", "rel_err")
+)
+
+REFERENCE_QUERY = """
+SELECT
+  cv.id::text AS id,
+  cv.patient_id::text AS patient_id,
+  cv.created_at,
+""" + ",\n".join(
+    f"  cv.{src}::float AS {dst}" for dst, src in REFERENCE_VITALS.items()
+) + """
+FROM correct_vitals cv
+"""
+NEW_REFERENCES_QUERY = REFERENCE_QUERY + """
+WHERE (cv.created_at, cv.id) > (%(ts)s, %(id)s::uuid)
+ORDER BY cv.created_at, cv.id
+"""
+_MIN_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def deviation_features(readings: np.ndarray, references: np.ndarray) -> np.ndarray:
+    """
+    DEVIATION_FEATURES for rows of readings against rows of references.
+
+    Both arrays are (n, 6) in REFERENCE_VITALS order; a reference row of NaN
+    means the patient has none.
+    """
+    readings = np.atleast_2d(np.asarray(readings, dtype=np.float64))
+    references = np.atleast_2d(np.asarray(references, dtype=np.float64))
+    available = ~np.isnan(references).all(axis=1)
+    abs_err = np.abs(readings - references)
+    rel_err = np.divide(
+        abs_err, np.abs(references), out=np.zeros_like(abs_err), where=np.abs(references) > 0
+    )
+    out = np.empty((len(readings), len(DEVIATION_FEATURES)))
+    out[:, 0] = available
+    out[:, 1::2] = np.nan_to_num(abs_err)
+    out[:, 2::2] = np.nan_to_num(rel_err)
+    return out
+
+
+def add_reference_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Training frame with DEVIATION_FEATURES added and the ref_* columns dropped."""
+    missing = [c for c in (*_VITALS, *REFERENCE_COLUMNS) if c not in df.columns]
+    if missing:
+        raise ValueError(f"Reference deviation features need columns {missing}")
+    features = deviation_features(
+        df[_VITALS].astype(np.float64).to_numpy(),
+        df[list(REFERENCE_COLUMNS)].astype(np.float64).to_numpy(),
+    )
+    out = df.drop(columns=list(REFERENCE_COLUMNS))
+    return pd.concat(
+        [out, pd.DataFrame(features, columns=list(DEVIATION_FEATURES), index=df.index)], axis=1
+    )
+
+
+class PatientReferenceIndex:
+    """
+    Reference vitals per patient in one (patients x 6) float64 matrix.
+
+    Lookups read the ``(matrix, index)`` pair without locking; loads swap in
+    a new pair and incremental inserts happen under a lock.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._data: tuple[np.ndarray, dict[str, int]] = (
+            np.full((capacity, len(_VITALS)), np.nan),
+            {},
+        )
+        self.watermark: tuple[datetime, str] | None = None
+        self.refreshed_at: float | None = None
+        self._lock = threading.Lock()
+        self._missing = np.full(len(_VITALS), np.nan)
+
+    def __len__(self) -> int:
+        return len(self._data[1])
+
+    def reference(self, patient_id: str | None) -> np.ndarray:
+        """Reference row for ``patient_id``; all NaN when unknown."""
+        matrix, index = self._data
+        row = index.get(patient_id) if patient_id is not None else None
+        if row is None or row >= len(matrix):
+            return self._missing
+        return matrix[row]
+
+    def features(self, patient_id: str | None, vitals: Mapping[str, Any]) -> dict[str, float]:
+        """DEVIATION_FEATURES of one reading (keyed by reading column names)."""
+        reference = self.reference(patient_id).tolist()
+        available = any(not math.isnan(r) for r in reference)
+        out = {"ref_available": float(available)}
+        # Scalar version of deviation_features; numpy per-call overhead dominates one row
+        for vital, ref in zip(_VITALS, reference):
+            err = abs(_as_float(vitals.get(vital)) - ref)
+            if math.isnan(err):
+                err = 0.0
+            out[f"{vital}_abs_err"] = err
+            out[f"{vital}_rel_err"] = err / abs(ref) if abs(ref) > 0 else 0.0
+        return out
+
+    def load_frame(self, rows: pd.DataFrame) -> None:
+        """Replace the index with ``rows`` (columns of REFERENCE_QUERY)."""
+        patients = rows["patient_id"].astype(str).tolist()
+        matrix = np.full((max(len(patients), 1), len(_VITALS)), np.nan)
+        matrix[: len(patients)] = rows[_VITALS].astype(np.float64).to_numpy()
+        index = {p: i for i, p in enumerate(patients)}
+        with self._lock:
+            self._data = (matrix, index)
+            self.watermark = _watermark(rows) or self.watermark
+            self.refreshed_at = time.time()
+
+    def upsert(self, rows: pd.DataFrame) -> None:
+        """Add or replace references for the patients in ``rows``."""
+        values = rows[_VITALS].astype(np.float64).to_numpy()
+        with self._lock:
+            matrix, index = self._data
+            for patient_id, ref in zip(rows["patient_id"].astype(str), values):
+                row = index.get(patient_id)
+                if row is None:
+                    row = len(index)
+                    if row == len(matrix):
+                        grown = np.full((2 * len(matrix), len(_VITALS)), np.nan)
+                        grown[: len(matrix)] = matrix
+                        matrix = grown
+                        self._data = (matrix, index)
+                    index[patient_id] = row
+                matrix[row] = ref
+            self.watermark = _watermark(rows) or self.watermark
+            self.refreshed_at = time.time()
+
+    def bootstrap(self, db_url: str | None = None) -> None:
+        """Load every patient's reference vitals with one COPY."""
+        self.load_frame(_copy_references(db_url or get_database_url(), REFERENCE_QUERY, None))
+
+    def refresh(self, db_url: str | None = None) -> int:
+        """Apply references created after the watermark; returns how many."""
+        ts, last_id = self.watermark or (datetime(1970, 1, 1, tzinfo=timezone.utc), _MIN_UUID)
+        rows = _copy_references(
+            db_url or get_database_url(), NEW_REFERENCES_QUERY, {"ts": ts, "id": last_id}
+        )
+        if not rows.empty:
+            self.upsert(rows)
+        return len(rows)
+
+    def start_sync(self, interval: float = 60.0, db_url: str | None = None) -> threading.Thread:
+        """Bootstrap, then refresh every ``interval`` seconds on a daemon thread."""
+
+        def run() -> None:
+            loaded = False
+            while True:
+                try:
+                    if loaded:
+                        self.refresh(db_url)
+                    else:
+                        self.bootstrap(db_url)
+                        loaded = True
+                except RuntimeError as e:
+                    # Keep serving the last state; retry on the next tick
+                    print(f"patient reference sync failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name="patient-reference-sync", daemon=True)
+        thread.start()
+        return thread
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _watermark(rows: pd.DataFrame) -> tuple[datetime, str] | None:
+    if rows.empty:
+        return None
+    created = pd.to_datetime(rows["created_at"], utc=True)
+    last = np.lexsort((rows["id"].astype(str).to_numpy(), created.dt.tz_convert(None).to_numpy()))[-1]
+    return created.iloc[last].to_pydatetime(), str(rows["id"].iloc[last])
+
+
+def _copy_references(db_url: str, query: str, params: dict[str, Any] | None) -> pd.DataFrame:
+    sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+    try:
+        with psycopg.connect(db_url) as conn:
+            with conn.cursor() as cur:
+                with cur.copy(sql, params) as copy:
+                    return read_copy_csv(copy, string_columns=("id", "patient_id", "created_at"))
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error while loading patient references: {e}") from e
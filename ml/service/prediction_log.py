@@ -0,0 +1,261 @@
+"""
+Append-only prediction log written off the request path.
+
+Handlers call ``PredictionLogger.log(record)``, which only does a
+non-blocking put on a bounded in-memory queue; when the queue is full the
+record is dropped and counted instead of slowing the request down. A daemon
+thread drains the queue in batches (up to ``batch_size`` records or every
+``flush_interval`` seconds) and hands each batch to a sink:
+
+    NDJSONSink     gzip-compressed NDJSON files, rotated by size
+    PostgresSink   COPY into ml_prediction_log (migrations/003)
+
+Counters (enqueued, written, dropped, failed, flushes) are exposed through
+``stats()`` for the service's /prediction-log endpoint. With the ``off``
+sink nothing is queued or counted and no writer thread is started.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Protocol
+
+import psycopg
+
+DEFAULT_MAX_QUEUE = 10_000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_FILE_BYTES = 64 * 2**20
+DEFAULT_LOG_DIR = Path(__file__).resolve().parents[1] / "logs" / "predictions"
+SINKS = ("ndjson", "postgres", "off")
+
+
+class Sink(Protocol):
+    def write(self, records: list[dict[str, Any]]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class NDJSONSink:
+    """
+    Gzip NDJSON files named ``<prefix>-<UTC timestamp>.ndjson.gz``.
+
+    Each batch is appended as its own gzip member, so a file is readable up to
+    the last completed flush even if the process dies. A new file is started
+    once the current one reaches ``max_bytes`` (compressed).
+    """
+
+    def __init__(
+        self, directory: Path, max_bytes: int = DEFAULT_MAX_FILE_BYTES, prefix: str = "predictions"
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.path: Path | None = None
+
+    def _new_path(self) -> Path:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return self.directory / f"{self.prefix}-{stamp}.ndjson.gz"
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        if self.path is None or (self.path.exists() and self.path.stat().st_size >= self.max_bytes):
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.path = self._new_path()
+        payload = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records)
+        with gzip.open(self.path, "ab", compresslevel=6) as f:
+            f.write(payload.encode())
+
+    def close(self) -> None:
+        self.path = None
+
+
+class PostgresSink:
+    """
+    COPY batches into ``ml_prediction_log`` over one long-lived connection.
+
+    Only the writer thread uses the sink, so a single connection is the whole
+    pool; it is reopened after a failure.
+    """
+
+    def __init__(self, dsn: str, table: str = "ml_prediction_log"):
+        self.dsn = dsn
+        self.table = table
+        self._conn: psycopg.Connection | None = None
+
+    def _connection(self) -> psycopg.Connection:
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg.connect(self.dsn)
+        return self._conn
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        conn = self._connection()
+        try:
+            with conn.cursor() as cur:
+                with cur.copy(
+                    f'COPY "{self.table}" '
+                    "(logged_at, request_id, model_version, model_sha256, features, output) "
+                    "FROM STDIN"
+                ) as copy:
+                    for r in records:
+                        copy.write_row((
+                            datetime.fromtimestamp(r["ts"], timezone.utc),
+                            r.get("request_id"),
+                            r.get("model_version"),
+                            r.get("model_sha256"),
+                            json.dumps(r.get("features")),
+                            json.dumps(r.get("output")),
+                        ))
+            conn.commit()
+        except psycopg.Error:
+            conn.close()
+            raise
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class PredictionLogger:
+    """Bounded queue plus a background writer that flushes batches to a sink."""
+
+    def __init__(
+        self,
+        sink: Sink,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.sink = sink
+        # NullSink (PREDICTION_LOG_SINK=off): skip the queue and writer entirely
+        self.enabled = not getattr(sink, "discards", False)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._counters = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+        self._last_flush: float | None = None
+        self._last_error: str | None = None
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="prediction-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def log(self, record: dict[str, Any]) -> bool:
+        """Enqueue ``record`` without blocking; False if it was dropped (counted) or logging is off."""
+        if not self.enabled:
+            return False
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def _flush(self, batch: list[dict[str, Any]]) -> None:
+        try:
+            self.sink.write(batch)
+        except Exception as e:  # the writer must survive sink failures
+            self._count("failed", len(batch))
+            self._last_error = f"{type(e).__name__}: {e}"
+        else:
+            self._count("written", len(batch))
+            self._count("flushes")
+            self._last_flush = time.time()
+
+    def _run(self) -> None:
+        batch: list[dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while not (self._stop.is_set() and self._queue.empty()):
+            timeout = max(deadline - time.monotonic(), 0.0)
+            try:
+                batch.append(self._queue.get(timeout=min(timeout, 0.1)))
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+        if batch:
+            self._flush(batch)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the writer after draining the queue, then close the sink."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.sink.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            out: dict[str, Any] = dict(self._counters)
+        out["enabled"] = self.enabled
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_capacity"] = self._queue.maxsize
+        out["last_flush_at"] = (
+            datetime.fromtimestamp(self._last_flush, timezone.utc).isoformat()
+            if self._last_flush
+            else None
+        )
+        out["last_error"] = self._last_error
+        return out
+
+
+class NullSink:
+    discards = True
+
+    def write(self, records: list[dict[str, Any]]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def logger_from_env() -> PredictionLogger:
+    """
+    Build the service's logger from the environment.
+
+    PREDICTION_LOG_SINK     ndjson, postgres or off (default: ndjson when
+                            PREDICTION_LOG_DIR is set, otherwise off)
+    PREDICTION_LOG_DIR      NDJSON directory (default ml/logs/predictions)
+    PREDICTION_LOG_QUEUE    queue capacity before records are dropped
+    DATABASE_URL            connection string for the postgres sink
+    """
+    # Opt-in, so importing the app (tests, notebooks) writes nothing into the tree
+    default = "ndjson" if os.getenv("PREDICTION_LOG_DIR") else "off"
+    kind = os.getenv("PREDICTION_LOG_SINK", default).lower()
+    if kind not in SINKS:
+        raise ValueError(f"PREDICTION_LOG_SINK must be one of {SINKS}, got {kind!r}")
+    sink: Sink
+    if kind == "postgres":
+        dsn = os.getenv("DATABASE_URL")
+        if not dsn:
+            raise RuntimeError("PREDICTION_LOG_SINK=postgres requires DATABASE_URL")
+        sink = PostgresSink(dsn)
+    elif kind == "ndjson":
+        sink = NDJSONSink(Path(os.getenv("PREDICTION_LOG_DIR", DEFAULT_LOG_DIR)))
+    else:
+        sink = NullSink()
+    return PredictionLogger(sink, max_queue=int(os.getenv("PREDICTION_LOG_QUEUE", DEFAULT_MAX_QUEUE)))
@@ -26,6 +26,10 @@ class VitalsIn(BaseModel):
     length_in: Optional[float] = Field(default=None, ge=0)
     head_circumference_in: Optional[float] = Field(default=None, ge=0)
 
+    # Look up student history / patient reference features when the model uses them
+    student_id: Optional[str] = None
+    patient_id: Optional[str] = None
+
 
 class PredictOut(BaseModel):
     p_flag: float
@@ -0,0 +1,99 @@
+"""
+Opt-in capture of /predict traffic for replay (benchmarks/replay.py).
+
+Synthetic payloads don't reproduce the real request mix (bursts when a lab
+section submits, many repeated patients), so the service can record what it
+actually receives: each validated request body with its arrival time, as
+compact gzip NDJSON records ``{"t": <unix time>, "path": ..., "body": ...}``.
+
+Identifiers are anonymised with a keyed hash before they are queued, so the
+file never holds a raw student or patient id while a repeated id still maps
+to the same token within a capture. Recording reuses PredictionLogger, so a
+full queue drops capture records instead of slowing requests down.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from ml.service.prediction_log import DEFAULT_MAX_QUEUE, NDJSONSink, PredictionLogger  # pragma: no cover
+else:
+    try:
+        from ml.service.prediction_log import DEFAULT_MAX_QUEUE, NDJSONSink, PredictionLogger
+    except Exception:
+        from service.prediction_log import DEFAULT_MAX_QUEUE, NDJSONSink, PredictionLogger
+
+FILE_PREFIX = "traffic"
+ID_FIELDS = ("student_id", "patient_id")
+
+
+def anonymise(body: dict[str, Any], salt: bytes) -> dict[str, Any]:
+    """``body`` with every identifier replaced by a 16-hex-digit HMAC-SHA256 token."""
+    out = dict(body)
+    for field in ID_FIELDS:
+        if out.get(field) is not None:
+            digest = hmac.new(salt, str(out[field]).encode(), hashlib.sha256).hexdigest()
+            out[field] = digest[:16]
+    return out
+
+
+class TrafficCapture:
+    """Queue anonymised request bodies for a background NDJSON writer."""
+
+    def __init__(self, directory: Path, salt: bytes | None = None, max_queue: int = DEFAULT_MAX_QUEUE):
+        # A random salt still keeps repeats linked within one process's capture
+        self.salt = salt or secrets.token_bytes(16)
+        self.logger = PredictionLogger(NDJSONSink(Path(directory), prefix=FILE_PREFIX), max_queue=max_queue)
+
+    def record(self, path: str, body: dict[str, Any], arrived_at: float | None = None) -> bool:
+        """Enqueue one request; False if the queue was full and it was dropped."""
+        return self.logger.log({
+            "t": time.time() if arrived_at is None else arrived_at,
+            "path": path,
+            "body": anonymise(body, self.salt),
+        })
+
+    def stats(self) -> dict[str, Any]:
+        return self.logger.stats()
+
+    def close(self) -> None:
+        self.logger.close()
+
+
+def capture_from_env() -> TrafficCapture | None:
+    """
+    Build the service's traffic capture from the environment, or None (the default).
+
+    TRAFFIC_CAPTURE_DIR     directory for traffic-*.ndjson.gz; capture is off when unset
+    TRAFFIC_CAPTURE_SALT    key for anonymising ids (default: random per process)
+    TRAFFIC_CAPTURE_QUEUE   queue capacity before records are dropped
+    """
+    directory = os.getenv("TRAFFIC_CAPTURE_DIR")
+    if not directory:
+        return None
+    salt = os.getenv("TRAFFIC_CAPTURE_SALT")
+    return TrafficCapture(
+        Path(directory),
+        salt=salt.encode() if salt else None,
+        max_queue=int(os.getenv("TRAFFIC_CAPTURE_QUEUE", DEFAULT_MAX_QUEUE)),
+    )
+
+
+def read_capture(path: Path) -> list[dict[str, Any]]:
+    """Records of a capture file, or of every traffic-*.ndjson.gz in a directory, by arrival time."""
+    path = Path(path)
+    files = sorted(path.glob(f"{FILE_PREFIX}-*.ndjson.gz")) if path.is_dir() else [path]
+    records = []
+    for file in files:
+        with gzip.open(file, "rt") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda r: r["t"])
+    return records
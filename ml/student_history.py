@@ -0,0 +1,448 @@
+"""
+Per-student history features for training and serving.
+
+A student's recent record is summarised by five features:
+
+    student_submissions   readings submitted before this one
+    student_graded        grades the student had received by then
+    student_error_rate    exponentially weighted share of graded readings
+                          that needed a recheck (at_risk), shrunk towards
+                          PRIOR_RATE while there are few grades
+    student_dev_mean      exponentially weighted mean and standard deviation
+    student_dev_std       of reading deviation (mean |z| of the core vitals
+                          against VITAL_REFERENCE) over prior submissions
+
+Weights decay by half every HALF_LIFE events, so the state per student is a
+handful of running sums. A submission is known from its submitted_at; its
+grade only from its graded_at, so training never sees a label that was not
+available when the reading was taken.
+
+``history_features`` computes the features point-in-time for a training
+frame. ``StudentHistoryStore`` keeps the same running sums for the service in
+one float64 matrix (a row per student), bootstrapped from a single bulk query
+and kept fresh by keyset queries on submitted_at and graded_at. A regraded
+reading is read again and counts as another grade.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Mapping
+
+import numpy as np
+import pandas as pd
+import psycopg
+from scipy.signal import lfilter
+
+if TYPE_CHECKING:
+    from ml.data_loader import get_database_url, read_copy_csv  # pragma: no cover
+else:
+    try:
+        from ml.data_loader import get_database_url, read_copy_csv
+    except Exception:
+        from data_loader import get_database_url, read_copy_csv
+
+HISTORY_FEATURES = (
+    "student_submissions",
+    "student_graded",
+    "student_error_rate",
+    "student_dev_mean",
+    "student_dev_std",
+)
+# Metadata the training frame must keep to compute the features
+HISTORY_SOURCE_COLUMNS = ("student_id", "submitted_at", "graded_at")
+
+HALF_LIFE = 10
+DECAY = 0.5 ** (1 / HALF_LIFE)
+PRIOR_RATE = 0.5
+PRIOR_WEIGHT = 2.0
+
+# Adult resting ranges as (center, spread); deviation is the mean |z|
+VITAL_REFERENCE = {
+    "bp_systolic": (120.0, 15.0),
+    "bp_diastolic": (80.0, 10.0),
+    "heart_rate": (75.0, 12.0),
+    "temperature": (98.6, 0.7),
+    "respiratory_rate": (16.0, 3.0),
+    "oxygen_saturation": (97.5, 1.5),
+}
+
+_REF_COLUMNS = list(VITAL_REFERENCE)
+_REF_CENTER = np.array([c for c, _ in VITAL_REFERENCE.values()])
+_REF_SPREAD = np.array([s for _, s in VITAL_REFERENCE.values()])
+
+# Columns of StudentHistoryStore.state
+N_SUB, DEV_W, DEV_S1, DEV_S2, N_LAB, LAB_W, ERR_S = range(7)
+_N_STATE = 7
+
+READINGS_QUERY = """
+SELECT
+  vr.id::text AS id,
+  vr.student_id::text AS student_id,
+  vr.submitted_at,
+  vr.graded_at,
+  CASE WHEN vr.is_correct THEN 0 ELSE 1 END AS at_risk,
+  vr.blood_pressure_sys AS bp_systolic,
+  vr.blood_pressure_dia AS bp_diastolic,
+  vr.heart_rate,
+  vr.temperature::float AS temperature,
+  vr.respiratory_rate,
+  vr.oxygen_saturation
+FROM vital_readings vr
+"""
+SUBMISSIONS_QUERY = READINGS_QUERY + """
+WHERE (vr.submitted_at, vr.id) > (%(ts)s, %(id)s::uuid)
+ORDER BY vr.submitted_at, vr.id
+"""
+GRADES_QUERY = READINGS_QUERY + """
+WHERE vr.graded_at IS NOT NULL AND (vr.graded_at, vr.id) > (%(ts)s, %(id)s::uuid)
+ORDER BY vr.graded_at, vr.id
+"""
+_MIN_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def deviation(vitals: pd.DataFrame) -> np.ndarray:
+    """Mean |z| of the available core vitals per row (0 when none are present)."""
+    cols = [c for c in _REF_COLUMNS if c in vitals.columns]
+    if not cols:
+        return np.zeros(len(vitals))
+    idx = [_REF_COLUMNS.index(c) for c in cols]
+    x = vitals[cols].astype(np.float64).to_numpy()
+    z = np.abs(x - _REF_CENTER[idx]) / _REF_SPREAD[idx]
+    counts = np.sum(~np.isnan(z), axis=1)
+    return np.divide(np.nansum(z, axis=1), counts, out=np.zeros(len(x)), where=counts > 0)
+
+
+def _deviation_one(payload: Mapping[str, Any]) -> float:
+    total, n = 0.0, 0
+    for col, (center, spread) in VITAL_REFERENCE.items():
+        value = payload.get(col)
+        if value is None:
+            continue
+        value = float(value)
+        if not math.isnan(value):
+            total += abs(value - center) / spread
+            n += 1
+    return total / n if n else 0.0
+
+
+def _ew_sums(values: np.ndarray, group_start: np.ndarray) -> np.ndarray:
+    """
+    Inclusive decayed sums ``sum(DECAY**(j - i) * values[i])`` within each group.
+
+    Rows are sorted by group and time; ``group_start[j]`` is the index of the
+    first row of row j's group. One IIR pass over all rows, then the part
+    carried over from earlier groups is subtracted.
+    """
+    if len(values) == 0:
+        return np.zeros(0)
+    y = lfilter([1.0], [1.0, -DECAY], values)
+    carry = np.where(group_start > 0, y[np.maximum(group_start - 1, 0)], 0.0)
+    offset = np.arange(len(values)) - group_start
+    return y - carry * DECAY ** (offset + 1)
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    new = np.ones(len(keys), dtype=bool)
+    new[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(new, np.arange(len(keys)), 0))
+
+
+def _submission_sums(students: np.ndarray, dev: np.ndarray) -> np.ndarray:
+    """Inclusive (count, weight, sum, sum of squares) per submission, rows sorted by student."""
+    starts = _group_starts(students)
+    out = np.empty((len(students), 4))
+    out[:, 0] = np.arange(len(students)) - starts + 1
+    out[:, 1] = _ew_sums(np.ones(len(students)), starts)
+    out[:, 2] = _ew_sums(dev, starts)
+    out[:, 3] = _ew_sums(dev * dev, starts)
+    return out
+
+
+def _label_sums(students: np.ndarray, at_risk: np.ndarray) -> np.ndarray:
+    """Inclusive (count, weight, error sum) per grade, rows sorted by student."""
+    starts = _group_starts(students)
+    out = np.empty((len(students), 3))
+    out[:, 0] = np.arange(len(students)) - starts + 1
+    out[:, 1] = _ew_sums(np.ones(len(students)), starts)
+    out[:, 2] = _ew_sums(at_risk.astype(np.float64), starts)
+    return out
+
+
+def _features_from_state(state: np.ndarray) -> np.ndarray:
+    """Feature matrix (rows x HISTORY_FEATURES) from state rows."""
+    state = np.atleast_2d(state)
+    w = state[:, DEV_W]
+    mean = np.divide(state[:, DEV_S1], w, out=np.zeros(len(w)), where=w > 0)
+    second = np.divide(state[:, DEV_S2], w, out=np.zeros(len(w)), where=w > 0)
+    return np.column_stack([
+        state[:, N_SUB],
+        state[:, N_LAB],
+        (state[:, ERR_S] + PRIOR_WEIGHT * PRIOR_RATE) / (state[:, LAB_W] + PRIOR_WEIGHT),
+        mean,
+        np.sqrt(np.maximum(second - mean * mean, 0.0)),
+    ])
+
+
+def _utc(values: pd.Series) -> pd.Series:
+    # Naive UTC, so to_numpy() gives datetime64 rather than Timestamp objects
+    return pd.to_datetime(values, utc=True).dt.tz_convert(None)
+
+
+def history_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Point-in-time history features for every row of a training frame.
+
+    ``df`` needs student_id, submitted_at and at_risk; graded_at is optional
+    (without it no grades are known and the error rate stays at the prior).
+    Each row only sees the student's earlier submissions and the grades given
+    strictly before its submitted_at. Returns a frame aligned with ``df``.
+    """
+    missing = [c for c in ("student_id", "submitted_at") if c not in df.columns]
+    if missing:
+        raise ValueError(f"Student history features need columns {missing}")
+    n = len(df)
+    students = df["student_id"].astype(str).to_numpy()
+    submitted = _utc(df["submitted_at"])
+    state = np.zeros((n, _N_STATE))
+
+    # Submissions: sums over strictly earlier submissions of the same student
+    order = np.lexsort((submitted.to_numpy(), students))
+    sums = _submission_sums(students[order], deviation(df.iloc[order]))
+    prior = np.zeros_like(sums)
+    same = np.zeros(n, dtype=bool)
+    same[1:] = students[order][1:] == students[order][:-1]
+    prior[1:][same[1:]] = sums[:-1][same[1:]]
+    state[order, N_SUB] = prior[:, 0]
+    state[order, DEV_W] = prior[:, 1]
+    state[order, DEV_S1] = prior[:, 2]
+    state[order, DEV_S2] = prior[:, 3]
+
+    # Grades: last grade given before each submission (as-of join per student)
+    if "graded_at" in df.columns:
+        graded = _utc(df["graded_at"])
+        has = graded.notna().to_numpy()
+        if has.any():
+            g_students = students[has]
+            g_time = graded[has].to_numpy()
+            g_order = np.lexsort((g_time, g_students))
+            g_sums = _label_sums(
+                g_students[g_order], df["at_risk"].to_numpy()[has][g_order]
+            )
+            labels = pd.DataFrame({
+                "student_id": g_students[g_order],
+                "time": g_time[g_order],
+                "n": g_sums[:, 0],
+                "w": g_sums[:, 1],
+                "err": g_sums[:, 2],
+            }).sort_values("time", kind="stable")
+            queries = pd.DataFrame({
+                "student_id": students,
+                "time": submitted.to_numpy(),
+                "row": np.arange(n),
+            }).sort_values("time", kind="stable")
+            joined = pd.merge_asof(
+                queries, labels, on="time", by="student_id", allow_exact_matches=False
+            ).fillna({"n": 0.0, "w": 0.0, "err": 0.0})
+            rows = joined["row"].to_numpy()
+            state[rows, N_LAB] = joined["n"].to_numpy()
+            state[rows, LAB_W] = joined["w"].to_numpy()
+            state[rows, ERR_S] = joined["err"].to_numpy()
+
+    return pd.DataFrame(_features_from_state(state), columns=list(HISTORY_FEATURES), index=df.index)
+
+
+def add_history_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Training frame with HISTORY_FEATURES added and the source metadata dropped."""
+    features = history_features(df)
+    out = df.drop(columns=[c for c in HISTORY_SOURCE_COLUMNS if c in df.columns])
+    return pd.concat([out, features], axis=1)
+
+
+class StudentHistoryStore:
+    """
+    History state for every student, one row of ``state`` each.
+
+    ``features(student_id)`` is a dict lookup plus a few float operations.
+    Writers (bootstrap and refresh) hold a lock. Readers take no lock: they
+    read the ``(state, index)`` pair once, and a row added after a resize is
+    treated as unknown until the next lookup.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._data: tuple[np.ndarray, dict[str, int]] = (np.zeros((capacity, _N_STATE)), {})
+        self.submissions_watermark: tuple[datetime, str] | None = None
+        self.grades_watermark: tuple[datetime, str] | None = None
+        self.refreshed_at: float | None = None
+        self._lock = threading.Lock()
+        self._cold = dict(zip(HISTORY_FEATURES, _features_from_state(np.zeros(_N_STATE))[0].tolist()))
+
+    def __len__(self) -> int:
+        return len(self._data[1])
+
+    def _state_row(self, student_id: str) -> np.ndarray:
+        state, index = self._data
+        row = index.get(student_id)
+        if row is None:
+            row = len(index)
+            if row == len(state):
+                grown = np.zeros((2 * len(state), _N_STATE))
+                grown[: len(state)] = state
+                state = grown
+                self._data = (state, index)
+            index[student_id] = row
+        return state[row]
+
+    def features(self, student_id: str | None) -> dict[str, float]:
+        """History features for ``student_id``; cold-start values for unknown students."""
+        state, index = self._data
+        row = index.get(student_id) if student_id is not None else None
+        if row is None or row >= len(state):
+            return dict(self._cold)
+        # Scalar version of _features_from_state; numpy per-call overhead dominates here
+        n_sub, dev_w, dev_s1, dev_s2, n_lab, lab_w, err_s = state[row].tolist()
+        mean = dev_s1 / dev_w if dev_w > 0 else 0.0
+        second = dev_s2 / dev_w if dev_w > 0 else 0.0
+        return {
+            "student_submissions": n_sub,
+            "student_graded": n_lab,
+            "student_error_rate": (err_s + PRIOR_WEIGHT * PRIOR_RATE) / (lab_w + PRIOR_WEIGHT),
+            "student_dev_mean": mean,
+            "student_dev_std": math.sqrt(max(second - mean * mean, 0.0)),
+        }
+
+    def record_submission(self, student_id: str, vitals: Mapping[str, Any]) -> None:
+        d = _deviation_one(vitals)
+        with self._lock:
+            s = self._state_row(student_id)
+            s[N_SUB] += 1
+            s[DEV_W] = DECAY * s[DEV_W] + 1
+            s[DEV_S1] = DECAY * s[DEV_S1] + d
+            s[DEV_S2] = DECAY * s[DEV_S2] + d * d
+
+    def record_grade(self, student_id: str, at_risk: int) -> None:
+        with self._lock:
+            s = self._state_row(student_id)
+            s[N_LAB] += 1
+            s[LAB_W] = DECAY * s[LAB_W] + 1
+            s[ERR_S] = DECAY * s[ERR_S] + float(at_risk)
+
+    def load_frame(self, readings: pd.DataFrame) -> None:
+        """Replace the state with the history in ``readings`` (columns of READINGS_QUERY)."""
+        students = readings["student_id"].astype(str).to_numpy()
+        submitted = _utc(readings["submitted_at"])
+        graded = _utc(readings["graded_at"])
+        uniq = np.unique(students)
+        state = np.zeros((max(len(uniq), 1), _N_STATE))
+        index = {s: i for i, s in enumerate(uniq.tolist())}
+
+        if len(students):
+            order = np.lexsort((submitted.to_numpy(), students))
+            sums = _submission_sums(students[order], deviation(readings.iloc[order]))
+            last = np.r_[students[order][1:] != students[order][:-1], True]
+            rows = np.searchsorted(uniq, students[order][last])
+            state[rows, N_SUB : DEV_S2 + 1] = sums[last]
+
+            has = graded.notna().to_numpy()
+            if has.any():
+                g_students = students[has]
+                g_order = np.lexsort((graded[has].to_numpy(), g_students))
+                g_sums = _label_sums(g_students[g_order], readings["at_risk"].to_numpy()[has][g_order])
+                g_last = np.r_[g_students[g_order][1:] != g_students[g_order][:-1], True]
+                rows = np.searchsorted(uniq, g_students[g_order][g_last])
+                state[rows, N_LAB : ERR_S + 1] = g_sums[g_last]
+
+        with self._lock:
+            self._data = (state, index)
+            self.submissions_watermark = _watermark(readings, submitted)
+            self.grades_watermark = _watermark(readings[graded.notna().to_numpy()], graded.dropna())
+            self.refreshed_at = time.time()
+
+    def apply_submissions(self, rows: pd.DataFrame) -> None:
+        """Fold readings submitted after the watermark, in (submitted_at, id) order."""
+        for rec in rows.to_dict("records"):
+            self.record_submission(rec["student_id"], rec)
+        mark = _watermark(rows, _utc(rows["submitted_at"]))
+        self.submissions_watermark = mark or self.submissions_watermark
+
+    def apply_grades(self, rows: pd.DataFrame) -> None:
+        """Fold readings graded after the watermark, in (graded_at, id) order."""
+        for student_id, at_risk in zip(rows["student_id"], rows["at_risk"]):
+            self.record_grade(student_id, int(at_risk))
+        mark = _watermark(rows, _utc(rows["graded_at"]))
+        self.grades_watermark = mark or self.grades_watermark
+
+    def bootstrap(self, db_url: str | None = None) -> None:
+        """Load every reading with one COPY and rebuild the state."""
+        self.load_frame(_copy_readings(db_url or get_database_url(), READINGS_QUERY, None))
+
+    def refresh(self, db_url: str | None = None) -> tuple[int, int]:
+        """Apply submissions and grades newer than the watermarks; returns their counts."""
+        db_url = db_url or get_database_url()
+        subs = _copy_readings(db_url, SUBMISSIONS_QUERY, _params(self.submissions_watermark))
+        grades = _copy_readings(db_url, GRADES_QUERY, _params(self.grades_watermark))
+        self.apply_submissions(subs)
+        self.apply_grades(grades)
+        self.refreshed_at = time.time()
+        return len(subs), len(grades)
+
+    def start_sync(self, interval: float = 30.0, db_url: str | None = None) -> threading.Thread:
+        """Bootstrap, then refresh every ``interval`` seconds on a daemon thread."""
+
+        def run() -> None:
+            loaded = False
+            while True:
+                try:
+                    if loaded:
+                        self.refresh(db_url)
+                    else:
+                        self.bootstrap(db_url)
+                        loaded = True
+                except RuntimeError as e:
+                    # Keep serving the last state; retry on the next tick
+                    print(f"student history sync failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=run, name="student-history-sync", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "students": len(self._data[1]),
+            "state_bytes": int(self._data[0].nbytes),
+            "refreshed_at": (
+                datetime.fromtimestamp(self.refreshed_at, timezone.utc).isoformat()
+                if self.refreshed_at
+                else None
+            ),
+        }
+
+
+def _watermark(rows: pd.DataFrame, times: pd.Series) -> tuple[datetime, str] | None:
+    if rows.empty:
+        return None
+    order = np.lexsort((rows["id"].astype(str).to_numpy(), times.to_numpy()))
+    last = order[-1]
+    ts = times.iloc[last].to_pydatetime().replace(tzinfo=timezone.utc)
+    return ts, str(rows["id"].iloc[last])
+
+
+def _params(watermark: tuple[datetime, str] | None) -> dict[str, Any]:
+    ts, last_id = watermark or (datetime(1970, 1, 1, tzinfo=timezone.utc), _MIN_UUID)
+    return {"ts": ts, "id": last_id}
+
+
+def _copy_readings(db_url: str, query: str, params: dict[str, Any] | None) -> pd.DataFrame:
+    sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)"
+    try:
+        with psycopg.connect(db_url) as conn:
+            with conn.cursor() as cur:
+                with cur.copy(sql, params) as copy:
+                    return read_copy_csv(
+                        copy, string_columns=("id", "student_id", "submitted_at", "graded_at")
+                    )
+    except psycopg.Error as e:
+        raise RuntimeError(f"Database error while loading student history: {e}") from e
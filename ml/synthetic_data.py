@@ -0,0 +1,278 @@
+"""
+Synthetic vitals generator for load tests and training-scale experiments.
+
+Rows are produced in fixed-size chunks. Each chunk draws from its own child of
+``SeedSequence(seed).spawn(n_chunks)``, so the generated rows depend only on
+``seed`` and ``chunk_rows`` -- never on how many worker processes did the work.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Age ranges (in years) matching train.age_group / predict._age_group
+AGE_GROUP_RANGES: dict[str, tuple[float, float]] = {
+    "neonate": (0.0, 1.0),
+    "child": (1.0, 13.0),
+    "teen": (13.0, 18.0),
+    "adult": (18.0, 65.0),
+    "senior": (65.0, 100.0),
+}
+
+# Named age mixes; "uniform" keeps the original U(0, 100) draw
+AGE_DISTRIBUTIONS: dict[str, dict[str, float] | None] = {
+    "uniform": None,
+    "pediatric": {"neonate": 0.15, "child": 0.45, "teen": 0.25, "adult": 0.10, "senior": 0.05},
+    "adult": {"neonate": 0.02, "child": 0.08, "teen": 0.10, "adult": 0.60, "senior": 0.20},
+    "geriatric": {"neonate": 0.01, "child": 0.04, "teen": 0.05, "adult": 0.30, "senior": 0.60},
+}
+
+# Risk-score cutoff used when no positive rate is requested
+RISK_CUTOFF = 0.45
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    # None keeps the natural positive rate of the fixed RISK_CUTOFF
+    positive_rate: float | None = None
+    # Name from AGE_DISTRIBUTIONS, or explicit {age_group: weight}
+    age_distribution: str | Mapping[str, float] = "uniform"
+
+    def age_weights(self) -> dict[str, float] | None:
+        if isinstance(self.age_distribution, str):
+            if self.age_distribution not in AGE_DISTRIBUTIONS:
+                raise ValueError(
+                    f"Unknown age distribution: {self.age_distribution}. "
+                    f"Choose from {sorted(AGE_DISTRIBUTIONS)}"
+                )
+            return AGE_DISTRIBUTIONS[self.age_distribution]
+        unknown = sorted(set(self.age_distribution) - set(AGE_GROUP_RANGES))
+        if unknown:
+            raise ValueError(f"Unknown age groups in age distribution: {unknown}")
+        return dict(self.age_distribution)
+
+    def validate(self) -> None:
+        if self.positive_rate is not None and not 0.0 < self.positive_rate < 1.0:
+            raise ValueError("positive_rate must be between 0 and 1 (exclusive)")
+        weights = self.age_weights()
+        if weights is not None and (min(weights.values()) < 0 or sum(weights.values()) <= 0):
+            raise ValueError("Age distribution weights must be non-negative and sum to > 0")
+
+
+def _draw_ages(rng: np.random.Generator, n: int, weights: dict[str, float] | None) -> np.ndarray:
+    if weights is None:
+        return rng.uniform(0, 100, size=n)
+
+    groups = [g for g in AGE_GROUP_RANGES if weights.get(g, 0.0) > 0]
+    p = np.array([weights[g] for g in groups], dtype=float)
+    lo = np.array([AGE_GROUP_RANGES[g][0] for g in groups])
+    hi = np.array([AGE_GROUP_RANGES[g][1] for g in groups])
+
+    idx = rng.choice(len(groups), size=n, p=p / p.sum())
+    return rng.uniform(lo[idx], hi[idx])
+
+
+def simulate_vitals(
+    rng: np.random.Generator,
+    n: int,
+    config: SyntheticConfig | None = None,
+) -> pd.DataFrame:
+    """Generate ``n`` rows of age-aware synthetic vitals from ``rng``."""
+    config = config or SyntheticConfig()
+    config.validate()
+
+    age_years = _draw_ages(rng, n, config.age_weights())
+    age_factor = np.clip((age_years - 18) / 50, 0, 1)
+
+    bp_systolic = rng.integers(90, 180, size=n) + (age_factor * 12)
+    bp_diastolic = rng.integers(60, 110, size=n) + (age_factor * 6)
+    heart_rate = rng.integers(50, 120, size=n) + (age_years < 12) * 15
+    temperature = rng.uniform(96.0, 102.0, size=n)
+    respiratory_rate = rng.integers(10, 30, size=n) + (age_years < 2) * 6
+    oxygen_saturation = rng.integers(85, 100, size=n)
+    pulse_pressure = bp_systolic - bp_diastolic
+    pain_level = rng.integers(0, 11, size=n)
+
+    risk_score = (
+        0.18 * ((bp_systolic > 140) | (bp_systolic < 90)).astype(int)
+        + 0.14 * ((bp_diastolic > 90) | (bp_diastolic < 60)).astype(int)
+        + 0.18 * (heart_rate > 100).astype(int)
+        + 0.14 * (temperature > 100.4).astype(int)
+        + 0.10 * (respiratory_rate > 20).astype(int)
+        + 0.10 * (oxygen_saturation < 95).astype(int)
+        + 0.10 * (pain_level >= 7).astype(int)
+        + 0.06 * (age_years > 70).astype(int)
+    ) + rng.normal(0, 0.12, size=n)
+
+    if config.positive_rate is None:
+        cutoff = RISK_CUTOFF
+    else:
+        cutoff = float(np.quantile(risk_score, 1.0 - config.positive_rate))
+    at_risk = (risk_score >= cutoff).astype(int)
+
+    return pd.DataFrame({
+        "age_years": age_years.round(1),
+        "bp_systolic": bp_systolic,
+        "bp_diastolic": bp_diastolic,
+        "heart_rate": heart_rate,
+        "temperature": temperature,
+        "respiratory_rate": respiratory_rate,
+        "oxygen_saturation": oxygen_saturation,
+        "pulse_pressure": pulse_pressure,
+        "pain_level": pain_level,
+        "at_risk": at_risk,
+    })
+
+
+def _chunk_plan(
+    n_rows: int, seed: int, chunk_rows: int
+) -> list[tuple[int, np.random.SeedSequence]]:
+    if n_rows <= 0:
+        raise ValueError("n_rows must be positive")
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    n_chunks = -(-n_rows // chunk_rows)
+    sizes = [chunk_rows] * (n_chunks - 1) + [n_rows - chunk_rows * (n_chunks - 1)]
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(n_chunks)))
+
+
+def _generate_chunk(task: tuple[int, np.random.SeedSequence, SyntheticConfig]) -> pd.DataFrame:
+    n, seed_seq, config = task
+    return simulate_vitals(np.random.default_rng(seed_seq), n, config)
+
+
+def _write_shard(
+    task: tuple[int, np.random.SeedSequence, SyntheticConfig, Path, str],
+) -> Path:
+    n, seed_seq, config, path, fmt = task
+    df = _generate_chunk((n, seed_seq, config))
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def _run_ordered(fn, tasks: list, workers: int) -> Iterator:
+    """Map ``fn`` over ``tasks`` in order, keeping at most 2x``workers`` results in flight."""
+    if workers <= 1:
+        for task in tasks:
+            yield fn(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future] = deque()
+        todo = iter(tasks)
+        for task in todo:
+            pending.append(pool.submit(fn, task))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(fn, nxt))
+            yield result
+
+
+def iter_synthetic_chunks(
+    n_rows: int,
+    seed: int = 7,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+    config: SyntheticConfig | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream synthetic rows as DataFrame chunks, generated across ``workers`` processes.
+
+    Chunks are yielded in order and the result is reproducible for a given
+    ``seed``/``chunk_rows`` regardless of ``workers``.
+    """
+    config = config or SyntheticConfig()
+    config.validate()
+    tasks = [(n, ss, config) for n, ss in _chunk_plan(n_rows, seed, chunk_rows)]
+    yield from _run_ordered(_generate_chunk, tasks, workers)
+
+
+def write_synthetic_shards(
+    out_dir: Path,
+    n_rows: int,
+    seed: int = 7,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+    fmt: str = "parquet",
+    config: SyntheticConfig | None = None,
+) -> list[Path]:
+    """
+    Write synthetic rows to ``out_dir`` as one shard per chunk.
+
+    Each worker writes its own shards, so nothing larger than a chunk is held
+    in memory. A ``_manifest.json`` next to the shards records how to
+    regenerate them.
+    """
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Invalid shard format: {fmt}")
+    config = config or SyntheticConfig()
+    config.validate()
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    plan = _chunk_plan(n_rows, seed, chunk_rows)
+    tasks = [
+        (n, ss, config, out_dir / f"part-{i:05d}.{fmt}", fmt)
+        for i, (n, ss) in enumerate(plan)
+    ]
+    paths = list(_run_ordered(_write_shard, tasks, workers))
+
+    manifest = {
+        "n_rows": n_rows,
+        "seed": seed,
+        "chunk_rows": chunk_rows,
+        "format": fmt,
+        "positive_rate": config.positive_rate,
+        "age_distribution": config.age_weights() or "uniform",
+        "shards": [p.name for p in paths],
+    }
+    (out_dir / "_manifest.json").write_text(json.dumps(manifest, indent=2))
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate sharded synthetic vitals data")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", type=str, required=True, help="Output directory for shards")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--positive-rate", type=float, default=None)
+    parser.add_argument("--age-distribution", choices=sorted(AGE_DISTRIBUTIONS), default="uniform")
+    args = parser.parse_args()
+
+    config = SyntheticConfig(
+        positive_rate=args.positive_rate,
+        age_distribution=args.age_distribution,
+    )
+    paths = write_synthetic_shards(
+        Path(args.out).expanduser().resolve(),
+        n_rows=args.rows,
+        seed=args.seed,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers,
+        fmt=args.format,
+        config=config,
+    )
+    print(f"Wrote {len(paths)} shards ({args.rows} rows) to {paths[0].parent}")
+
+
+if __name__ == "__main__":
+    main()
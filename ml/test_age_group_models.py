@@ -0,0 +1,90 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from age_group_models import fit_age_group_models
+from model_selection import build_estimator
+from predict import AgeGroupModel, load_model
+from train import age_group, make_synthetic_data, save_artifacts, train_model
+
+
+class ConstantModel:
+    """Scores every row with a fixed probability and records batch sizes."""
+
+    def __init__(self, p, feature_names=("age_years", "heart_rate")):
+        self.p = p
+        self.calls = []
+        self.feature_names_in_ = np.array(feature_names)
+        self.classes_ = np.array([0, 1])
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        return np.column_stack([np.full(len(X), 1 - self.p), np.full(len(X), self.p)])
+
+
+def test_routes_rows_and_preserves_order():
+    child, adult, fallback = ConstantModel(0.2), ConstantModel(0.6), ConstantModel(0.9)
+    model = AgeGroupModel({"child": child, "adult": adult}, fallback)
+    X = pd.DataFrame({
+        "age_years": [30, 5, 0.5, 40, np.nan, 8, 70],
+        "heart_rate": [70, 90, 130, 75, 80, 95, 65],
+    })
+
+    prob = model.predict_proba(X)[:, 1]
+
+    np.testing.assert_allclose(prob, [0.6, 0.2, 0.9, 0.6, 0.9, 0.2, 0.9])
+    # One vectorized call per model; neonate, senior and missing ages share the fallback
+    assert child.calls == [2] and adult.calls == [2] and fallback.calls == [3]
+
+
+def test_single_row_goes_straight_to_group_model():
+    teen, fallback = ConstantModel(0.3), ConstantModel(0.9)
+    model = AgeGroupModel({"teen": teen}, fallback)
+
+    prob = model.predict_proba(pd.DataFrame({"age_years": [15.0], "heart_rate": [80.0]}))
+
+    assert prob[0, 1] == pytest.approx(0.3)
+    assert fallback.calls == []
+
+
+def test_unknown_group_rejected():
+    with pytest.raises(ValueError, match="Unknown age groups"):
+        AgeGroupModel({"toddler": ConstantModel(0.5)}, ConstantModel(0.5))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_fit_matches_individual_models(workers):
+    df = make_synthetic_data(n=1500, seed=3)
+    X, y = df.drop(columns="at_risk").astype(float), df["at_risk"]
+    groups = X["age_years"].map(age_group)
+
+    model, summary = fit_age_group_models(X, y, "logreg", seed=3, workers=workers, min_rows=250)
+
+    assert set(model.models) == {g for g, s in summary["groups"].items() if s["model"] == "own"}
+    assert model.models
+    assert sum(s["train_rows"] for s in summary["groups"].values()) == len(X)
+    for group in model.models:
+        mask = groups == group
+        alone = build_estimator("logreg", 3).fit(X[mask], y[mask])
+        np.testing.assert_allclose(model.predict_proba(X[mask]), alone.predict_proba(X[mask]))
+    rest = ~groups.isin(list(model.models))
+    alone = build_estimator("logreg", 3).fit(X, y)
+    np.testing.assert_allclose(model.predict_proba(X[rest]), alone.predict_proba(X[rest]))
+
+
+def test_train_model_per_age_group_round_trips(tmp_path):
+    df = make_synthetic_data(n=1200, seed=5)
+    out = train_model(df, n_bootstrap=0, per_age_group=True, group_workers=1)
+
+    assert set(out["model"].models) <= {"neonate", "child", "teen", "adult", "senior"}
+    assert out["metrics"]["age_group_models"]["estimator"] == "logreg"
+
+    save_artifacts(out["model"], out["metrics"], artifacts_dir=tmp_path)
+    assert joblib.load(tmp_path / "model.joblib")["format"] == "age_group_models/v1"
+    assert not (tmp_path / "model.gvm").exists()
+
+    loaded = load_model(tmp_path / "model.joblib")
+    assert isinstance(loaded, AgeGroupModel)
+    X = df.drop(columns="at_risk").astype(float).iloc[:50]
+    np.testing.assert_allclose(loaded.predict_proba(X), out["model"].predict_proba(X))
@@ -153,3 +153,83 @@ def test_predict_model_version():
     
     assert "model_version" in data
     assert data["model_version"] == "0.1.0"
+
+
+def test_predict_is_logged(monkeypatch):
+    import service.api as api
+    from service.prediction_log import PredictionLogger
+
+    records = []
+
+    class Sink:
+        def write(self, batch):
+            records.extend(batch)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(api, "prediction_log", PredictionLogger(Sink(), batch_size=1))
+    client = get_client()
+    payload = {"age_years": 30, "heart_rate": 72, "resp_rate": 16, "temp_f": 98.6, "spo2_pct": 98, "systolic_bp": 120, "diastolic_bp": 80, "height_ft": 5, "height_in": 8, "weight_lb": 160, "pain_0_10": 2}
+    response = client.post("/predict", json=payload)
+    api.prediction_log.close()
+
+    assert records[0]["features"]["heart_rate"] == 72
+    assert records[0]["output"]["risk_probability"] == response.json()["p_flag"]
+    assert records[0]["model_version"] == "0.1.0"
+    stats = client.get("/prediction-log").json()
+    assert stats["written"] == 1 and stats["dropped"] == 0
+
+
+def test_drift_endpoint(monkeypatch):
+    import pandas as pd
+
+    import service.api as api
+    from drift import DriftMonitor, feature_profile
+
+    client = get_client()
+    monkeypatch.setattr(api, "drift_monitor", None)
+    assert client.get("/drift").status_code == 503
+
+    reference = pd.DataFrame({"heart_rate": range(60, 100), "temperature": [98.6] * 40})
+    monkeypatch.setattr(api, "drift_monitor", DriftMonitor(feature_profile(reference), min_samples=1))
+    payload = {"age_years": 30, "heart_rate": 72, "resp_rate": 16, "temp_f": 98.6, "spo2_pct": 98, "systolic_bp": 120, "diastolic_bp": 80, "height_ft": 5, "height_in": 8, "weight_lb": 160, "pain_0_10": 2}
+    client.post("/predict", json=payload)
+
+    data = client.get("/drift").json()
+    assert data["n_requests"] == 1
+    assert data["features"]["heart_rate"]["mean"] == 72
+
+
+def test_live_accuracy_endpoint(monkeypatch, tmp_path):
+    import service.api as api
+    from live_accuracy import RollingConfusion, TrackerState
+
+    client = get_client()
+    monkeypatch.setattr(api, "LIVE_ACCURACY_STATE", tmp_path / "state.json")
+    assert client.get("/live-accuracy").status_code == 503
+
+    state = TrackerState(labels=1, confusion=RollingConfusion())
+    state.confusion.add(0, 0, 1, 1)
+    state.save(tmp_path / "state.json")
+    data = client.get("/live-accuracy").json()
+    assert data["labels"] == 1
+    assert data["windows"]["all_time"]["overall"]["f1"] == 1.0
+
+
+def test_process_backend_starts_with_the_app(monkeypatch):
+    import pytest
+
+    import service.api as api
+
+    monkeypatch.setenv("INFERENCE_BACKEND", "process")
+    monkeypatch.setenv("INFERENCE_WORKERS", "1")
+    payload = {"age_years": 30, "heart_rate": 72, "resp_rate": 16, "temp_f": 98.6, "spo2_pct": 98, "systolic_bp": 120, "diastolic_bp": 80, "height_ft": 5, "height_in": 8, "weight_lb": 160, "pain_0_10": 2}
+    # Importing the app only sets up the in-process scorer
+    assert api.scorer is api.model
+    expected = get_client().post("/predict", json=payload).json()["p_flag"]
+
+    with TestClient(api.app) as client:
+        assert api.scorer is not api.model and api.scorer.n_workers == 1
+        assert client.post("/predict", json=payload).json()["p_flag"] == pytest.approx(expected)
+    assert api.scorer is api.model
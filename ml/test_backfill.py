@@ -0,0 +1,206 @@
+import uuid
+from types import SimpleNamespace
+
+import joblib
+import numpy as np
+import pandas as pd
+import psycopg
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+import backfill
+from backfill import Checkpoint, build_select, run_backfill, score_batch
+from predict import predict_from_json
+
+FEATURES = ["age_years", "bp_systolic", "heart_rate", "temperature"]
+METRICS = {
+    "threshold": 0.5,
+    "feature_names": FEATURES,
+    "age_group_thresholds": {"neonate": 0.3, "child": 0.4, "teen": 0.45, "adult": 0.5, "senior": 0.6},
+}
+
+
+def readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = sorted(str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, n))
+    return pd.DataFrame({
+        "id": ids,
+        "age_years": rng.uniform(0, 90, n),
+        "bp_systolic": rng.normal(120, 20, n).round(),
+        "heart_rate": rng.normal(80, 15, n).round(),
+        "temperature": rng.normal(98.6, 1.0, n),
+    })
+
+
+def fitted_model():
+    df = readings(300, seed=1)
+    y = (df["heart_rate"] > 85).astype(int)
+    model = Pipeline([("scaler", StandardScaler()), ("clf", LogisticRegression())])
+    return model.fit(df[FEATURES], y)
+
+
+def test_score_batch_matches_single_row_predictions():
+    model = fitted_model()
+    batch = readings(50)
+    batch.loc[3, "temperature"] = None
+    scores, skipped = score_batch(model, batch, FEATURES, METRICS, 0.5)
+
+    assert skipped == 1
+    assert list(scores.columns) == backfill.SCORE_COLUMNS
+    assert batch["id"][3] not in set(scores["id"])
+    for _, row in scores.sample(10, random_state=0).iterrows():
+        payload = batch.loc[batch["id"] == row["id"], FEATURES].iloc[0].to_dict()
+        single = predict_from_json(model, payload, FEATURES, 0.5, METRICS)
+        assert row["ml_risk_score"] == pytest.approx(single["risk_probability"])
+        assert row["ml_prediction"] == single["pred"]
+        assert row["ml_confidence"] == pytest.approx(abs(single["risk_probability"] - 0.5) * 2)
+
+
+def test_build_select_rejects_unknown_features():
+    sql = build_select(FEATURES, only_missing=True)
+    assert sql.startswith("SELECT id, age_years, bp_systolic")
+    assert "ml_risk_score IS NULL" in sql
+    assert sql.endswith("ORDER BY id")
+    with pytest.raises(ValueError, match="not available"):
+        build_select(["shoe_size"], only_missing=False)
+
+
+class FakeReadConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, name=None):
+        return FakeStreamCursor(self.db)
+
+
+class FakeStreamCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        df = self.db.readings
+        if params["after"] is not None:
+            df = df[df["id"] > params["after"]]
+        self.description = [SimpleNamespace(name=c) for c in df.columns]
+        self.rows = list(df.itertuples(index=False, name=None))
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+
+class FakeWriteConnection:
+    def __init__(self, db):
+        self.db = db
+        self.staged = ""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        assert sql.startswith(("CREATE TEMP TABLE", "UPDATE vital_readings"))
+
+    def cursor(self):
+        return self
+
+    def copy(self, sql):
+        conn = self
+
+        class Copy:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def write(self, data):
+                conn.staged += data
+
+        return Copy()
+
+    def commit(self):
+        if self.staged:
+            self.db.committed.append(self.staged)
+            self.staged = ""
+
+    @property
+    def rowcount(self):
+        return 0
+
+
+class FakeDatabase:
+    def __init__(self, df):
+        self.readings = df
+        self.committed = []
+        self.opened = 0
+
+    def connect(self, url):
+        self.opened += 1
+        # run_backfill opens the read connection first, then the write one
+        return FakeReadConnection(self) if self.opened % 2 else FakeWriteConnection(self)
+
+    def written_ids(self):
+        return [line.split(",")[0] for block in self.committed for line in block.splitlines()]
+
+
+@pytest.fixture
+def fake_backfill(monkeypatch, tmp_path):
+    model_path = tmp_path / "model.joblib"
+    joblib.dump(fitted_model(), model_path)
+    db = FakeDatabase(readings(23))
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setattr(psycopg, "connect", db.connect)
+    monkeypatch.setattr(backfill, "load_metrics", lambda: METRICS)
+    return db, model_path, tmp_path / "checkpoint.json"
+
+
+def test_backfill_resumes_from_checkpoint(fake_backfill):
+    db, model_path, checkpoint_path = fake_backfill
+    stats, checkpoint = run_backfill(model_path, checkpoint_path, batch_size=5, max_rows=10)
+
+    assert stats.rows_scored == 10
+    assert Checkpoint.load(checkpoint_path).last_id == db.readings["id"][9]
+
+    stats, checkpoint = run_backfill(model_path, checkpoint_path, batch_size=5)
+    assert stats.rows_scored == 13
+    assert checkpoint.rows_scored == 23
+    assert checkpoint.batches == 5
+    # Every reading written exactly once, in id order
+    assert db.written_ids() == list(db.readings["id"])
+
+
+def test_backfill_dry_run_writes_nothing(fake_backfill):
+    db, model_path, checkpoint_path = fake_backfill
+    stats, _ = run_backfill(model_path, checkpoint_path, batch_size=10, dry_run=True)
+
+    assert stats.rows_scored == 23
+    assert db.committed == []
+    assert not checkpoint_path.exists()
+
+
+def test_backfill_rejects_checkpoint_from_other_model(fake_backfill):
+    _, model_path, checkpoint_path = fake_backfill
+    Checkpoint(model_sha256="not-this-model", last_id="x").save(checkpoint_path)
+    with pytest.raises(ValueError, match="different model"):
+        run_backfill(model_path, checkpoint_path)
+
+    stats, _ = run_backfill(model_path, checkpoint_path, restart=True)
+    assert stats.rows_scored == 23
@@ -0,0 +1,94 @@
+
+import numpy as np
+import pytest
+
+from calibration import fit_calibration, fit_curve
+from predict import CALIBRATION_FORMAT, CalibratedModel, Calibrator, load_model
+from train import make_synthetic_data, save_artifacts, train_model
+
+
+def miscalibrated(n, seed):
+    rng = np.random.default_rng(seed)
+    true_p = rng.uniform(0, 1, n)
+    y = (rng.uniform(0, 1, n) < true_p).astype(int)
+    # Raw scores rank correctly but are squashed towards 0
+    return true_p**3, y, true_p
+
+
+@pytest.mark.parametrize("method", ["isotonic", "platt"])
+def test_calibration_reduces_error(method):
+    raw, y, _ = miscalibrated(20_000, 1)
+    calibrator = Calibrator(fit_calibration(raw, y, method=method))
+
+    test_raw, test_y, _ = miscalibrated(5_000, 2)
+    calibrated = calibrator.apply(test_raw)
+
+    brier = lambda p: float(np.mean((p - test_y) ** 2))
+    assert brier(calibrated) < brier(test_raw) - 0.02
+    assert abs(calibrated.mean() - test_y.mean()) < 0.02
+    # Monotone, so the ranking (and ROC AUC) is preserved
+    order = np.argsort(test_raw)
+    assert np.all(np.diff(calibrated[order]) >= -1e-12)
+
+
+def test_fit_curve_unknown_method():
+    with pytest.raises(ValueError, match="Unknown calibration method"):
+        fit_curve(np.array([0.1, 0.9]), np.array([0, 1]), method="beta")
+
+
+def test_per_group_curves_route_by_age():
+    table = {
+        "format": CALIBRATION_FORMAT,
+        "method": "isotonic",
+        "default": {"x": [0.0, 1.0], "y": [0.0, 1.0]},
+        "groups": {"senior": {"x": [0.0, 1.0], "y": [0.5, 0.5]}},
+    }
+    calibrator = Calibrator(table)
+    prob = np.array([0.2, 0.2, 0.8, 0.8])
+    ages = np.array([70, 30, np.nan, 90])
+
+    np.testing.assert_allclose(calibrator.apply(prob, ages), [0.5, 0.2, 0.8, 0.5])
+    np.testing.assert_allclose(calibrator.apply(prob[:1], ages[:1]), [0.5])
+    np.testing.assert_allclose(calibrator.apply(prob), prob)
+
+
+def test_fit_calibration_groups_need_enough_rows():
+    raw, y, _ = miscalibrated(3000, 3)
+    ages = np.where(np.arange(3000) < 2600, 40.0, 5.0)
+    table = fit_calibration(raw, y, ages, min_group_rows=500)
+    assert list(table["groups"]) == ["adult"]
+    with pytest.raises(ValueError, match="both classes"):
+        fit_calibration(raw, np.zeros_like(y))
+
+
+def test_calibrator_rejects_bad_tables():
+    with pytest.raises(ValueError, match="format"):
+        Calibrator({"default": {"x": [0, 1], "y": [0, 1]}})
+    with pytest.raises(ValueError, match="increasing"):
+        Calibrator({"format": CALIBRATION_FORMAT, "default": {"x": [1, 0], "y": [0, 1]}})
+
+
+def test_train_and_serve_calibrated_model(tmp_path):
+    df = make_synthetic_data(n=3000, seed=4)
+    out = train_model(df, n_bootstrap=0, importance_repeats=0, calibration="isotonic")
+    assert out["metrics"]["calibration"]["method"] == "isotonic"
+
+    save_artifacts(out["model"], out["metrics"], artifacts_dir=tmp_path, calibration=out["calibration"])
+    loaded = load_model(tmp_path / "model.joblib")
+    assert isinstance(loaded, CalibratedModel)
+
+    X = df.drop(columns="at_risk").astype(float).iloc[:200]
+    raw = out["model"].predict_proba(X)[:, 1]
+    expected = Calibrator(out["calibration"]).apply(raw, X["age_years"].to_numpy())
+    np.testing.assert_allclose(loaded.predict_proba(X)[:, 1], expected)
+    np.testing.assert_allclose(loaded.predict_proba(X.to_numpy())[:, 1], expected)
+
+    # Retraining without calibration removes the stale table
+    save_artifacts(out["model"], out["metrics"], artifacts_dir=tmp_path)
+    assert not (tmp_path / "calibration.json").exists()
+    assert not isinstance(load_model(tmp_path / "model.joblib"), CalibratedModel)
+
+
+def test_train_model_unknown_calibration():
+    with pytest.raises(ValueError, match="Unknown calibration"):
+        train_model(make_synthetic_data(n=200, seed=1), calibration="beta")
@@ -0,0 +1,203 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import psycopg
+import pyarrow.parquet as pq
+import pytest
+
+import data_cache
+from data_cache import (
+    Watermark,
+    build_sync_query,
+    merge_rows,
+    read_cache_metadata,
+    read_training_cache,
+    sync_training_cache,
+)
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_view(n, start=0, at_risk=0):
+    return pd.DataFrame({
+        "id": [f"id-{i:04d}" for i in range(start, start + n)],
+        "student_id": "student-1",
+        "heart_rate": [60 + i for i in range(start, start + n)],
+        "temperature": 98.6,
+        "at_risk": at_risk,
+        "submitted_at": [T0 + timedelta(days=i) for i in range(start, start + n)],
+        "entered_by_role": "STUDENT",
+        "graded_at": [T0 + timedelta(days=i, hours=1) for i in range(start, start + n)],
+    })
+
+
+class FakeView:
+    """Answers COPY (SELECT ...) TO STDOUT from an in-memory view."""
+
+    def __init__(self, df):
+        self.df = df
+        self.copies = []
+
+    def __call__(self, url):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+    def copy(self, sql, params=None):
+        self.copies.append((sql, params))
+        df = self.df
+        if params:
+            params = list(params)
+            graded_after = params.pop() if "graded_at >" in sql else None
+            if len(params) == 1:
+                keep = df["submitted_at"] >= params[0]
+            else:
+                key = list(zip(df["submitted_at"], df["id"]))
+                keep = pd.Series([k > tuple(params) for k in key], index=df.index)
+            if graded_after is not None:
+                keep |= df["graded_at"] > graded_after
+            df = df[keep]
+        out = df.copy()
+        for col in ("submitted_at", "graded_at"):
+            out[col] = out[col].dt.strftime("%Y-%m-%d %H:%M:%S+00")
+        data = out.to_csv(index=False).encode()
+        return FakeCopy(data)
+
+
+class FakeCopy:
+    def __init__(self, data):
+        self.data = data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        yield self.data
+
+
+@pytest.fixture
+def view(monkeypatch):
+    fake = FakeView(make_view(10))
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setattr(psycopg, "connect", fake)
+    return fake
+
+
+def test_initial_sync_stores_watermark(view, tmp_path):
+    path = tmp_path / "cache.parquet"
+    result = sync_training_cache(path)
+
+    assert (result.fetched, result.inserted, result.total) == (10, 10, 10)
+    assert view.copies[0][1] is None
+    meta = read_cache_metadata(path)
+    assert meta["view"] == "ml_training_data"
+    assert meta["watermark"] == {
+        "submitted_at": (T0 + timedelta(days=9)).isoformat(),
+        "id": "id-0009",
+        "graded_at": (T0 + timedelta(days=9, hours=1)).isoformat(),
+    }
+
+
+def test_incremental_sync_fetches_only_new_and_relabeled_rows(view, tmp_path):
+    path = tmp_path / "cache.parquet"
+    sync_training_cache(path, lookback=timedelta(days=2))
+
+    relabeled = make_view(10)
+    relabeled.loc[8, "at_risk"] = 1
+    view.df = pd.concat([relabeled, make_view(3, start=10)], ignore_index=True)
+    result = sync_training_cache(path, lookback=timedelta(days=2))
+
+    # Rows from day 7 onwards: 3 already cached (one relabeled) + 3 new
+    assert (result.fetched, result.inserted, result.updated, result.total) == (6, 3, 3, 13)
+    assert view.copies[-1][1] == (T0 + timedelta(days=7), T0 + timedelta(days=9, hours=1))
+    df = pq.read_table(path).to_pandas()
+    assert df["id"].is_unique
+    assert df.loc[df["id"] == "id-0008", "at_risk"].item() == 1
+    assert result.watermark == Watermark(
+        T0 + timedelta(days=12), "id-0012", T0 + timedelta(days=12, hours=1)
+    )
+
+
+def test_late_grade_outside_lookback_is_refetched(view, tmp_path):
+    path = tmp_path / "cache.parquet"
+    sync_training_cache(path, lookback=timedelta(days=2))
+
+    # Submitted on day 0, regraded on day 30: long past the lookback window
+    regraded = make_view(10)
+    regraded.loc[0, ["at_risk", "graded_at"]] = [1, T0 + timedelta(days=30)]
+    view.df = regraded
+    result = sync_training_cache(path, lookback=timedelta(days=2))
+
+    df = pq.read_table(path).to_pandas()
+    assert df.loc[df["id"] == "id-0000", "at_risk"].item() == 1
+    assert result.updated == 4  # days 7-9 from the lookback plus the regrade
+    assert result.watermark.graded_at == T0 + timedelta(days=30)
+    assert read_cache_metadata(path)["watermark"]["graded_at"] == (T0 + timedelta(days=30)).isoformat()
+
+
+def test_zero_lookback_uses_strict_watermark(view, tmp_path):
+    path = tmp_path / "cache.parquet"
+    sync_training_cache(path, lookback=timedelta(0))
+    result = sync_training_cache(path, lookback=timedelta(0))
+
+    assert result.fetched == 0
+    assert result.total == 10
+    assert view.copies[-1][1] == (T0 + timedelta(days=9), "id-0009", T0 + timedelta(days=9, hours=1))
+
+
+def test_read_training_cache_projects_training_columns(view, tmp_path):
+    path = tmp_path / "cache.parquet"
+    sync_training_cache(path)
+    df = read_training_cache(path)
+
+    assert list(df.columns) == ["heart_rate", "temperature", "at_risk"]
+    assert len(df) == 10
+    assert df["at_risk"].dtype == np.int8
+    assert df["heart_rate"].dtype == np.int16
+
+
+def test_read_training_cache_missing(tmp_path):
+    with pytest.raises(FileNotFoundError, match="data_cache.py sync"):
+        read_training_cache(tmp_path / "missing.parquet")
+
+
+def test_cache_for_other_view_is_rejected(view, tmp_path):
+    path = tmp_path / "cache.parquet"
+    sync_training_cache(path)
+    with pytest.raises(ValueError, match="mirrors ml_training_data"):
+        sync_training_cache(path, view_name="other_view")
+
+
+def test_merge_rows_upserts_by_id():
+    cached = data_cache._normalize(make_view(3))
+    fresh = data_cache._normalize(make_view(2, start=2, at_risk=1))
+    merged, inserted, updated = merge_rows(cached, fresh)
+
+    assert (inserted, updated) == (1, 1)
+    assert list(merged["id"]) == ["id-0000", "id-0001", "id-0002", "id-0003"]
+    assert list(merged["at_risk"]) == [0, 0, 1, 1]
+
+
+def test_build_sync_query():
+    assert build_sync_query("v", None) == ('SELECT * FROM "v"', ())
+    sql, params = build_sync_query("v", Watermark(T0, "x"), timedelta(hours=1))
+    assert sql.endswith("WHERE submitted_at >= %s")
+    assert params == (T0 - timedelta(hours=1),)
+
+    graded = T0 + timedelta(days=3)
+    sql, params = build_sync_query("v", Watermark(T0, "x", graded), timedelta(0))
+    assert sql.endswith("WHERE (submitted_at, id::text) > (%s, %s) OR graded_at > %s")
+    assert params == (T0, "x", graded)
+    # Metadata written before graded_at was tracked still loads
+    assert Watermark.from_json({"submitted_at": T0.isoformat(), "id": "x"}).graded_at is None
@@ -0,0 +1,366 @@
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import psycopg
+import pytest
+
+import data_loader
+from data_loader import (
+    ArrayChunk,
+    CopyStream,
+    copy_training_data,
+    iter_training_chunks,
+    load_training_data_from_db,
+    parse_copy_csv,
+)
+
+COLUMNS = ["id", "age_years", "heart_rate", "temperature", "at_risk"]
+
+
+def make_rows(n):
+    return [(f"id-{i}", 30 + i % 50, 60 + i % 40, "98.6", i % 2) for i in range(n)]
+
+
+class FakeCursor:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.pos = 0
+        self.itersize = None
+        self.description = [SimpleNamespace(name=c) for c in COLUMNS]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        self.log["query"] = query
+
+    def fetchmany(self, size):
+        self.log.setdefault("fetches", []).append(size)
+        batch = self.rows[self.pos:self.pos + size]
+        self.pos += len(batch)
+        return batch
+
+    def copy(self, sql):
+        self.log["copy_sql"] = sql
+        return FakeCopy(self.rows)
+
+
+class FakeCopy:
+    """Yields CSV output in small, misaligned blocks like psycopg's Copy."""
+
+    def __init__(self, rows, block_size=17):
+        lines = [",".join(COLUMNS)] + [",".join(str(v) for v in row) for row in rows]
+        self.data = ("\n".join(lines) + "\n").encode()
+        self.block_size = block_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for i in range(0, len(self.data), self.block_size):
+            yield memoryview(self.data[i:i + self.block_size])
+
+
+class FakeConnection:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, name=None):
+        self.log["cursor_name"] = name
+        return FakeCursor(self.rows, self.log)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    log = {}
+    state = {"rows": make_rows(25)}
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setattr(psycopg, "connect", lambda url: FakeConnection(state["rows"], log))
+    return state, log
+
+
+def test_streams_chunks_through_named_cursor(fake_db):
+    _, log = fake_db
+    chunks = list(iter_training_chunks(chunk_rows=10, itersize=4))
+
+    assert log["cursor_name"]
+    assert set(log["fetches"]) == {4}
+    assert [len(c) for c in chunks] == [12, 12, 1]
+    assert "id" not in chunks[0].columns
+    assert chunks[0]["temperature"].dtype == np.float32
+    assert chunks[0]["heart_rate"].dtype == np.int16
+
+
+def test_numpy_chunks(fake_db):
+    chunks = list(iter_training_chunks(chunk_rows=100, as_numpy=True))
+
+    (chunk,) = chunks
+    assert isinstance(chunk, ArrayChunk)
+    assert chunk.X.shape == (25, 3)
+    assert chunk.X.dtype == np.float64
+    assert chunk.y.dtype == np.int8
+    assert chunk.feature_names == ["age_years", "heart_rate", "temperature"]
+
+
+def test_wrapper_concatenates_chunks(fake_db):
+    df = load_training_data_from_db(limit=25, chunk_rows=7, itersize=3)
+
+    assert len(df) == 25
+    assert list(df["age_years"][:3]) == [30, 31, 32]
+
+
+def test_limit_in_query(fake_db):
+    _, log = fake_db
+    list(iter_training_chunks(limit=5))
+    assert log["query"].endswith("LIMIT 5")
+
+
+def test_query_projects_training_columns(fake_db):
+    _, log = fake_db
+    list(iter_training_chunks())
+    assert log["query"].startswith('SELECT "bp_systolic", "bp_diastolic"')
+    assert '"at_risk" FROM' in log["query"]
+    assert "*" not in log["query"]
+
+    list(iter_training_chunks(columns=["heart_rate"]))
+    assert log["query"] == 'SELECT "heart_rate", "at_risk" FROM "ml_training_data"'
+
+    list(iter_training_chunks(columns=None))
+    assert log["query"].startswith("SELECT *")
+
+
+def test_decode_applies_compact_dtypes():
+    rows = [
+        (120, 80, 72, "98.6", 16, 98, 40, 0, "STUDENT", 1),
+        (130, None, 80, "99.1", 18, 97, 50, 0, "INSTRUCTOR", 0),
+    ]
+    columns = list(data_loader.FEATURE_COLUMNS) + ["entered_by_role", "at_risk"]
+    df = data_loader.decode_chunk(rows, columns, "v", keep=["entered_by_role"])
+
+    assert df["bp_systolic"].dtype == np.int16
+    # A NULL falls back to the nullable integer type
+    assert str(df["bp_diastolic"].dtype) == "Int16"
+    assert df["temperature"].dtype == np.float32
+    assert df["at_risk"].dtype == np.int8
+    assert df["entered_by_role"].dtype == "category"
+    # Without keep, entered_by_role is metadata and is dropped
+    assert "entered_by_role" not in data_loader.decode_chunk(rows, columns, "v").columns
+
+
+def test_decode_passes_kept_ids_and_timestamps_through():
+    ts = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [(uuid.UUID(int=1), ts, None, 72, 1), (uuid.UUID(int=2), ts, ts, 80, 0)]
+    columns = ["student_id", "submitted_at", "graded_at", "heart_rate", "at_risk"]
+    df = data_loader.decode_chunk(rows, columns, "v", keep=["student_id", "submitted_at", "graded_at"])
+
+    assert df["student_id"].tolist() == [uuid.UUID(int=1), uuid.UUID(int=2)]
+    assert df["submitted_at"].tolist() == [ts, ts]
+    assert df["graded_at"].tolist() == [None, ts]
+    assert "graded_at" not in data_loader.decode_chunk(rows, columns, "v").columns
+
+
+def test_wrapper_raises_on_empty(fake_db):
+    state, _ = fake_db
+    state["rows"] = []
+    with pytest.raises(ValueError, match="No data returned"):
+        load_training_data_from_db()
+
+
+def test_missing_database_url(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_DB_URL", raising=False)
+    with pytest.raises(ValueError):
+        data_loader.get_database_url()
+
+
+def test_copy_stream_reassembles_blocks():
+    blocks = [b"ab", b"", b"cde", memoryview(b"fgh")]
+    assert CopyStream(blocks).read() == b"abcdefgh"
+
+
+def test_copy_matches_stream(fake_db):
+    _, log = fake_db
+    copied = copy_training_data(limit=25)
+    streamed = load_training_data_from_db(limit=25)
+
+    assert log["copy_sql"].startswith("COPY (SELECT")
+    assert "FORMAT csv" in log["copy_sql"]
+    assert list(copied.columns) == list(streamed.columns)
+    np.testing.assert_array_equal(copied.to_numpy(), streamed.to_numpy())
+    assert copied["at_risk"].dtype == np.int8
+
+
+def test_wrapper_copy_method(fake_db):
+    df = load_training_data_from_db(method="copy")
+    assert len(df) == 25
+    with pytest.raises(ValueError, match="Unknown db method"):
+        load_training_data_from_db(method="bogus")
+
+
+def test_parse_copy_csv_drops_unlabeled_rows():
+    df = parse_copy_csv([b"id,heart_rate,at_risk\na,70,1\nb,80,\n"])
+    assert list(df["heart_rate"]) == [70]
+
+
+class FakeAdminConnection:
+    def __init__(self, log, fail=False):
+        self.log = log
+        self.fail = fail
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.setdefault("sql", []).append((sql, params))
+        if self.fail and sql.startswith("REFRESH"):
+            raise psycopg.errors.FeatureNotSupported("cannot refresh concurrently")
+        return SimpleNamespace(fetchone=lambda: (42,))
+
+
+def test_refresh_snapshot_concurrently_and_logs(monkeypatch):
+    log = {}
+
+    def connect(url, autocommit=False):
+        log["autocommit"] = autocommit
+        return FakeAdminConnection(log)
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setattr(psycopg, "connect", connect)
+    record = data_loader.refresh_training_snapshot()
+
+    # CONCURRENTLY cannot run inside a transaction block
+    assert log["autocommit"] is True
+    statements = [sql for sql, _ in log["sql"]]
+    assert statements[0] == 'REFRESH MATERIALIZED VIEW CONCURRENTLY "ml_training_snapshot"'
+    insert_sql, params = log["sql"][-1]
+    assert insert_sql.startswith('INSERT INTO "ml_snapshot_refreshes"')
+    assert params[0] == "ml_training_snapshot"
+    assert params[-1] == 42
+    assert record["row_count"] == 42
+    assert record["duration_ms"] >= 0
+
+
+def test_refresh_snapshot_blocking_and_errors(monkeypatch):
+    log = {}
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setattr(psycopg, "connect", lambda url, autocommit=False: FakeAdminConnection(log))
+    data_loader.refresh_training_snapshot(concurrently=False)
+    assert log["sql"][0][0] == 'REFRESH MATERIALIZED VIEW "ml_training_snapshot"'
+
+    monkeypatch.setattr(
+        psycopg, "connect", lambda url, autocommit=False: FakeAdminConnection({}, fail=True)
+    )
+    with pytest.raises(RuntimeError, match="refreshing ml_training_snapshot"):
+        data_loader.refresh_training_snapshot()
+
+
+class FakePartitionedView:
+    """COPY source that honours the id-range parameters of partition queries."""
+
+    def __init__(self, n):
+        rng = np.random.default_rng(0)
+        self.rows = [
+            (str(uuid.UUID(int=int(a) << 64 | int(b))), 60 + i % 40, i % 2)
+            for i, (a, b) in enumerate(rng.integers(0, 2**63, size=(n, 2)))
+        ]
+        self.connections = []
+
+    def connect(self, url):
+        conn = FakePartitionConnection(self)
+        self.connections.append(conn)
+        return conn
+
+
+class FakePartitionConnection:
+    def __init__(self, view):
+        self.view = view
+        self.closed = False
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        self.closed = True
+
+    def copy(self, sql, params=None):
+        params = list(params or [])
+        rows = self.view.rows
+        if "id >= " in sql:
+            low = uuid.UUID(params.pop(0))
+            rows = [r for r in rows if uuid.UUID(r[0]) >= low]
+        if "id < " in sql:
+            high = uuid.UUID(params.pop(0))
+            rows = [r for r in rows if uuid.UUID(r[0]) < high]
+        assert "ORDER BY id)" in sql
+        rows = sorted(rows, key=lambda r: uuid.UUID(r[0]))
+        lines = ["id,heart_rate,at_risk"] + [",".join(map(str, r)) for r in rows]
+        return _Blocks(("\n".join(lines) + "\n").encode())
+
+
+class _Blocks:
+    def __init__(self, data):
+        self.data = data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        yield self.data
+
+
+def test_partition_bounds_cover_key_space():
+    bounds = data_loader.partition_bounds(4)
+    assert bounds[0][0] is None and bounds[-1][1] is None
+    assert [hi for _, hi in bounds[:-1]] == [lo for lo, _ in bounds[1:]]
+    assert bounds[1][0] == "40000000-0000-0000-0000-000000000000"
+    with pytest.raises(ValueError):
+        data_loader.partition_bounds(0)
+
+
+@pytest.mark.parametrize("partitions,workers", [(1, None), (3, None), (8, 2)])
+def test_parallel_copy_is_deterministic(monkeypatch, partitions, workers):
+    view = FakePartitionedView(200)
+    monkeypatch.setenv("DATABASE_URL", "postgresql://fake")
+    monkeypatch.setattr(psycopg, "connect", view.connect)
+
+    df = data_loader.copy_training_data_parallel(partitions=partitions, workers=workers)
+
+    expected = sorted(view.rows, key=lambda r: uuid.UUID(r[0]))
+    assert list(df["heart_rate"]) == [r[1] for r in expected]
+    assert df["at_risk"].dtype == np.int8
+    # One connection per worker thread, all closed afterwards
+    assert len(view.connections) <= (workers or partitions)
+    assert all(conn.closed for conn in view.connections)
+
+
+def test_parallel_rejects_limit(fake_db):
+    with pytest.raises(ValueError, match="limit"):
+        load_training_data_from_db(limit=10, method="parallel")
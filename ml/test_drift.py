@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift import DriftMonitor, feature_profile, psi
+
+
+def training_frame(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "heart_rate": rng.normal(80, 12, n).round(),
+        "temperature": rng.normal(98.6, 0.8, n),
+        "pain_level": np.zeros(n),
+    })
+
+
+def test_feature_profile_bins_cover_training_rows():
+    profile = feature_profile(training_frame(), n_bins=10)
+    hr = profile["features"]["heart_rate"]
+
+    assert len(hr["proportions"]) == len(hr["edges"]) + 1
+    assert sum(hr["proportions"]) == pytest.approx(1.0)
+    assert hr["mean"] == pytest.approx(80, abs=1)
+    # A constant column collapses to a single edge
+    assert len(profile["features"]["pain_level"]["edges"]) == 1
+
+
+def test_monitor_moments_match_numpy():
+    df = training_frame()
+    monitor = DriftMonitor(feature_profile(df), min_samples=10)
+    served = training_frame(300, seed=1)
+    for row in served.to_dict("records"):
+        monitor.update(row)
+
+    scores = monitor.scores()["features"]["temperature"]
+    assert scores["n"] == 300
+    assert scores["mean"] == pytest.approx(served["temperature"].mean())
+    assert scores["std"] == pytest.approx(served["temperature"].std(ddof=0))
+
+
+def test_monitor_flags_shifted_feature_only():
+    monitor = DriftMonitor(feature_profile(training_frame()))
+    served = training_frame(1000, seed=2)
+    served["heart_rate"] += 25
+    for row in served.to_dict("records"):
+        monitor.update(row)
+
+    result = monitor.scores()
+    assert result["drifted"] == ["heart_rate"]
+    assert result["features"]["heart_rate"]["status"] == "major"
+    assert result["features"]["heart_rate"]["ks"] > 0.5
+    assert result["features"]["temperature"]["psi"] < 0.1
+
+
+def test_monitor_state_is_constant_size_and_skips_missing():
+    monitor = DriftMonitor(feature_profile(training_frame()))
+    shape = monitor._hist.shape
+    for _ in range(50):
+        monitor.update({"heart_rate": 80, "temperature": None, "pain_level": "n/a"})
+
+    result = monitor.scores()
+    assert monitor._hist.shape == shape
+    assert result["features"]["heart_rate"]["n"] == 50
+    assert result["features"]["temperature"]["n"] == 0
+    assert result["features"]["heart_rate"]["status"] == "insufficient_data"
+
+
+def test_psi_is_zero_for_identical_distributions():
+    p = np.array([0.2, 0.3, 0.5])
+    assert psi(p, p) == 0
+    assert psi(p, np.array([0.5, 0.3, 0.2])) > 0.25
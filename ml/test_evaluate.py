@@ -0,0 +1,140 @@
+import json
+
+import joblib
+import numpy as np
+import pytest
+
+from evaluate import EvalAccumulator, evaluate_chunks, iter_source, score_edges
+from metrics_engine import evaluate_predictions
+from model_selection import build_estimator
+from test_data_loader import fake_db  # noqa: F401 (fake psycopg connection fixture)
+from train import age_group, best_threshold, make_synthetic_data
+
+
+def quantized_scores(n, seed):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, n)
+    # Scores on the 1/1000 grid fall one distinct value per bin, so binned AUC is exact
+    grid = np.linspace(0, 1, 1001)
+    prob = grid[np.clip(350 * y + rng.integers(0, 650, n), 0, 999)]
+    ages = rng.uniform(0, 90, n)
+    return y, prob, ages
+
+
+def assert_same_metrics(actual, expected):
+    assert actual["confusion_matrix"] == expected["confusion_matrix"]
+    for name, value in expected.items():
+        if name != "confusion_matrix":
+            assert actual[name] == pytest.approx(value), name
+
+
+def test_report_matches_evaluate_predictions():
+    y, prob, ages = quantized_scores(3000, 1)
+    acc = EvalAccumulator(score_edges(0.5))
+    acc.update(y, prob, ages)
+
+    report = acc.report(0.5)
+    groups = np.array([age_group(a) for a in ages])
+    expected = evaluate_predictions(y, prob, threshold=0.5, groups=groups)
+
+    assert_same_metrics(report["overall"], expected["overall"])
+    assert report["by_age_group"].keys() == expected["by_group"].keys()
+    for group, metrics in expected["by_group"].items():
+        assert_same_metrics(report["by_age_group"][group], metrics)
+    for group in expected["by_group"]:
+        mask = groups == group
+        assert report["age_group_thresholds"][group] == best_threshold(y[mask], prob[mask])
+    assert report["n_rows"] == 3000
+
+
+def test_accumulators_merge_like_one_pass():
+    y, prob, ages = quantized_scores(2000, 2)
+    edges = score_edges(0.4, n_bins=50)
+    whole = EvalAccumulator(edges)
+    whole.update(y, prob, ages)
+    parts = [EvalAccumulator(edges) for _ in range(3)]
+    for part, idx in zip(parts, np.array_split(np.arange(2000), 3)):
+        part.update(y[idx], prob[idx], ages[idx])
+    merged = parts[0].merge(parts[1]).merge(parts[2])
+
+    np.testing.assert_array_equal(merged.pos, whole.pos)
+    np.testing.assert_array_equal(merged.tot, whole.tot)
+    assert merged.report(0.4) == whole.report(0.4)
+    with pytest.raises(ValueError, match="same bin edges"):
+        whole.merge(EvalAccumulator(score_edges(0.5)))
+
+
+def test_missing_ages_count_as_unknown():
+    acc = EvalAccumulator(score_edges(0.5))
+    acc.update(np.array([1, 0]), np.array([0.9, 0.2]), np.array([np.nan, 40.0]))
+    assert set(acc.report(0.5)["by_age_group"]) == {"unknown", "adult"}
+
+
+@pytest.fixture(scope="module")
+def labeled_export(tmp_path_factory):
+    df = make_synthetic_data(n=3000, seed=9)
+    X = df.drop(columns="at_risk").astype(float)
+    model = build_estimator("logreg", 9).fit(X, df["at_risk"])
+    root = tmp_path_factory.mktemp("eval")
+    joblib.dump(model, root / "model.joblib")
+    df.loc[5, "heart_rate"] = np.nan
+    df.to_csv(root / "export.csv", index=False)
+    df.to_parquet(root / "export.parquet", index=False)
+    return root, model, df, list(X.columns)
+
+
+@pytest.mark.parametrize("source", ["csv", "parquet"])
+def test_evaluate_chunks_streams_source(labeled_export, source):
+    root, model, df, features = labeled_export
+    chunks = iter_source(source, root / f"export.{source}", chunk_rows=700, columns=[*features, "at_risk"])
+
+    acc, skipped = evaluate_chunks(chunks, root / "model.joblib", features, 0.5, n_bootstrap=20, seed=1)
+
+    ok = df.drop(index=5)
+    prob = model.predict_proba(ok[features])[:, 1]
+    expected = evaluate_predictions(ok["at_risk"].to_numpy(), prob, threshold=0.5)
+    report = acc.report(0.5)
+    assert skipped == 1
+    assert report["overall"]["confusion_matrix"] == expected["overall"]["confusion_matrix"]
+    assert report["overall"]["roc_auc"] == pytest.approx(expected["overall"]["roc_auc"], abs=2e-3)
+    low, high = report["confidence_intervals"]["roc_auc"]
+    assert low <= report["overall"]["roc_auc"] <= high
+    json.dumps(report)
+
+
+def test_evaluate_chunks_workers_do_not_change_result(labeled_export):
+    root, _, _, features = labeled_export
+
+    def run(workers):
+        chunks = iter_source("parquet", root / "export.parquet", chunk_rows=500)
+        acc, _ = evaluate_chunks(
+            chunks, root / "model.joblib", features, 0.5, n_bootstrap=10, seed=3, workers=workers
+        )
+        return acc.report(0.5)
+
+    assert run(2) == run(1)
+
+
+def test_evaluate_chunks_requires_features(labeled_export):
+    root, _, df, features = labeled_export
+    chunks = iter([df.drop(columns=["heart_rate"])])
+    with pytest.raises(ValueError, match="heart_rate"):
+        evaluate_chunks(chunks, root / "model.joblib", features, 0.5)
+
+
+def test_db_source_selects_model_features(fake_db, tmp_path):
+    _, log = fake_db
+    features = ["age_years", "heart_rate", "temperature"]
+    df = make_synthetic_data(n=500, seed=2)
+    joblib.dump(build_estimator("logreg", 2).fit(df[features].astype(float), df["at_risk"]), tmp_path / "model.joblib")
+
+    chunks = iter_source("db", chunk_rows=10, columns=[*features, "at_risk"])
+    acc, skipped = evaluate_chunks(chunks, tmp_path / "model.joblib", features, 0.5)
+
+    assert log["query"].startswith('SELECT "age_years", "heart_rate", "temperature", "at_risk" FROM')
+    assert skipped == 0 and acc.report(0.5)["n_rows"] == 25
+
+
+def test_db_source_names_missing_view_columns(fake_db):
+    with pytest.raises(ValueError, match=r"no columns \['bp_systolic'\]"):
+        next(iter_source("db", columns=["age_years", "bp_systolic", "at_risk"]))
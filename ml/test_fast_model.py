@@ -0,0 +1,94 @@
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import predict
+from fast_model import FORMAT_VERSION, MAGIC, export_fast_model, is_exportable, load_fast_model
+from train import make_synthetic_data, save_artifacts, train_model
+
+
+def trained():
+    return train_model(make_synthetic_data(n=400, seed=5), n_bootstrap=0)
+
+
+def test_roundtrip_matches_sklearn():
+    out = trained()
+    model, metrics = out["model"], out["metrics"]
+    X = make_synthetic_data(n=50, seed=6)[metrics["feature_names"]].astype(float)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_fast_model(
+            model,
+            Path(tmp) / "model.gvm",
+            feature_names=metrics["feature_names"],
+            threshold=0.4,
+            group_thresholds=metrics["age_group_thresholds"],
+        )
+        fast = load_fast_model(path)
+
+        assert np.allclose(fast.predict_proba(X), model.predict_proba(X), atol=1e-12)
+        assert list(fast.feature_names_in_) == metrics["feature_names"]
+        assert fast.threshold == 0.4
+        assert fast.group_thresholds == pytest.approx(metrics["age_group_thresholds"])
+
+
+def test_fast_model_rejects_non_finite_input():
+    out = trained()
+    features = out["metrics"]["feature_names"]
+    X = make_synthetic_data(n=5, seed=6)[features].astype(float)
+    X.iloc[2, 1] = np.nan
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fast = load_fast_model(export_fast_model(out["model"], Path(tmp) / "model.gvm", features))
+        with pytest.raises(ValueError, match="NaN"):
+            fast.predict_proba(X)
+        with pytest.raises(ValueError, match="infinity"):
+            fast.predict_proba(np.full((1, X.shape[1]), np.inf))
+        # The sklearn model rejects the same input
+        with pytest.raises(ValueError, match="NaN"):
+            out["model"].predict_proba(X)
+
+
+def test_load_rejects_bad_magic_and_future_version():
+    out = trained()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_fast_model(out["model"], Path(tmp) / "model.gvm", out["metrics"]["feature_names"])
+        data = bytearray(path.read_bytes())
+
+        bad_magic = Path(tmp) / "bad.gvm"
+        bad_magic.write_bytes(b"NOTAMODL" + bytes(data[len(MAGIC):]))
+        with pytest.raises(ValueError, match="magic"):
+            load_fast_model(bad_magic)
+
+        future = Path(tmp) / "future.gvm"
+        data[8:12] = (FORMAT_VERSION + 1).to_bytes(4, "little")
+        future.write_bytes(bytes(data))
+        with pytest.raises(ValueError, match="newer"):
+            load_fast_model(future)
+
+
+def test_unsupported_model_not_exportable():
+    model = RandomForestClassifier(n_estimators=2).fit([[0.0], [1.0]], [0, 1])
+    assert not is_exportable(model)
+    with pytest.raises(ValueError):
+        export_fast_model(model, Path("/tmp/unused.gvm"), ["x"])
+
+
+def test_save_artifacts_writes_fast_model_and_predict_prefers_it():
+    out = trained()
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = save_artifacts(out["model"], out["metrics"], artifacts_dir=Path(tmp))
+        assert (Path(tmp) / "model.gvm").exists()
+
+        loaded = predict.load_model(outputs.model_path)
+        assert type(loaded).__name__ == "FastLinearModel"
+
+        payload = {name: 1.0 for name in out["metrics"]["feature_names"]}
+        fast_result = predict.predict_from_json(loaded, payload, out["metrics"]["feature_names"], 0.5)
+        slow_result = predict.predict_from_json(
+            out["model"], payload, out["metrics"]["feature_names"], 0.5
+        )
+        assert fast_result["risk_probability"] == pytest.approx(slow_result["risk_probability"])
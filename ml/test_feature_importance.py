@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score
+
+from feature_importance import permutation_importance, score
+from model_selection import build_estimator
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = pd.DataFrame({
+        "age_years": rng.uniform(0, 90, n),
+        "heart_rate": rng.normal(80, 15, n),
+        "noise": rng.normal(0, 1, n),
+    })
+    y = (X["heart_rate"] + rng.normal(0, 5, n) > 90).astype(int)
+    model = build_estimator("logreg", 0).fit(X, y)
+    return model, X, y
+
+
+def test_score_matches_sklearn(fitted):
+    model, X, y = fitted
+    prob = model.predict_proba(X)[:, 1]
+    assert score(y, prob) == pytest.approx(roc_auc_score(y, prob))
+
+
+def test_informative_feature_ranks_first(fitted):
+    model, X, y = fitted
+    before = X.copy()
+
+    result = permutation_importance(model, X, y, n_repeats=4, seed=1)
+
+    by_name = {f["feature"]: f for f in result["features"]}
+    assert result["features"][0]["feature"] == "heart_rate"
+    assert by_name["heart_rate"]["importance_mean"] > 0.2
+    assert abs(by_name["noise"]["importance_mean"]) < 0.02
+    low, high = by_name["heart_rate"]["confidence_interval"]
+    assert low <= by_name["heart_rate"]["importance_mean"] <= high
+    assert len(by_name["age_years"]["repeats"]) == 4
+    pd.testing.assert_frame_equal(X, before)
+
+
+def test_workers_do_not_change_result(fitted):
+    model, X, y = fitted
+    serial = permutation_importance(model, X, y, n_repeats=3, seed=2, workers=1)
+    parallel = permutation_importance(model, X, y, n_repeats=3, seed=2, workers=2)
+    assert parallel == serial
+
+
+def test_invalid_arguments(fitted):
+    model, X, y = fitted
+    with pytest.raises(ValueError, match="Unknown metric"):
+        permutation_importance(model, X, y, metric="log_loss")
+    with pytest.raises(ValueError, match="n_repeats"):
+        permutation_importance(model, X, y, n_repeats=0)
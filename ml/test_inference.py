@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pytest
+
+from model_selection import build_estimator
+from service.inference import ProcessPoolModel, model_from_env
+from train import make_synthetic_data
+
+
+@pytest.fixture(scope="module")
+def fitted(tmp_path_factory):
+    df = make_synthetic_data(n=600, seed=11)
+    X = df.drop(columns="at_risk").astype(float)
+    model = build_estimator("logreg", 11).fit(X, df["at_risk"])
+    path = tmp_path_factory.mktemp("model") / "model.joblib"
+    joblib.dump(model, path)
+    return model, path, X
+
+
+@pytest.fixture(scope="module")
+def pool(fitted):
+    _, path, X = fitted
+    with ProcessPoolModel(path, list(X.columns), workers=2, max_rows=64) as pool:
+        yield pool
+
+
+def test_process_pool_matches_in_process(fitted, pool):
+    model, _, X = fitted
+    # 600 rows span several max_rows chunks
+    np.testing.assert_allclose(pool.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_allclose(pool.predict_proba(X.iloc[:1]), model.predict_proba(X.iloc[:1]))
+    # Plain arrays in feature order are accepted too
+    np.testing.assert_allclose(pool.predict_proba(X.to_numpy()[:5]), model.predict_proba(X.iloc[:5]))
+    assert pool.predict_proba(X.iloc[:0]).shape == (0, 2)
+
+
+def test_process_pool_concurrent_callers(fitted, pool):
+    model, _, X = fitted
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(lambda i: pool.predict_proba(X.iloc[i : i + 7])[:, 1], range(0, 600, 7)))
+    np.testing.assert_allclose(np.concatenate(results), model.predict_proba(X)[:, 1])
+
+
+def test_process_pool_rejects_wrong_width(pool):
+    with pytest.raises(ValueError, match="features"):
+        pool.predict_proba(np.zeros((2, 3)))
+
+
+def test_process_pool_worker_error_is_raised(fitted, pool):
+    model, _, X = fitted
+    bad = X.iloc[:3].copy()
+    bad.iloc[1, 0] = np.nan
+    with pytest.raises(ValueError, match="NaN"):
+        pool.predict_proba(bad)
+    # The worker keeps serving afterwards
+    np.testing.assert_allclose(pool.predict_proba(X.iloc[:3]), model.predict_proba(X.iloc[:3]))
+
+
+def test_model_from_env(fitted, monkeypatch):
+    model, path, X = fitted
+    monkeypatch.delenv("INFERENCE_BACKEND", raising=False)
+    assert model_from_env(model, path, list(X.columns)) is model
+
+    monkeypatch.setenv("INFERENCE_BACKEND", "gpu")
+    with pytest.raises(ValueError, match="INFERENCE_BACKEND"):
+        model_from_env(model, path, list(X.columns))
+
+    monkeypatch.setenv("INFERENCE_BACKEND", "process")
+    monkeypatch.setenv("INFERENCE_WORKERS", "1")
+    pool = model_from_env(model, path, list(X.columns))
+    try:
+        assert isinstance(pool, ProcessPoolModel) and pool.n_workers == 1
+    finally:
+        pool.close()
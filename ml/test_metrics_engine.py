@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score,
+    average_precision_score,
+    balanced_accuracy_score,
+    f1_score,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
+
+from metrics_engine import evaluate_predictions, f1_at_thresholds
+
+
+def sample_scores(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, size=n)
+    # Rounded scores so the tie handling is exercised
+    prob = np.round(rng.random(n) * (0.4 + 0.6 * y), 2)
+    groups = rng.choice(["adult", "child", "senior"], size=n)
+    return y, prob, groups
+
+
+def test_overall_matches_sklearn():
+    y, prob, _ = sample_scores()
+    pred = (prob >= 0.3).astype(int)
+
+    overall = evaluate_predictions(y, prob, threshold=0.3)["overall"]
+
+    assert overall["accuracy"] == pytest.approx(accuracy_score(y, pred))
+    assert overall["balanced_accuracy"] == pytest.approx(balanced_accuracy_score(y, pred))
+    assert overall["precision"] == pytest.approx(precision_score(y, pred, zero_division=0))
+    assert overall["recall"] == pytest.approx(recall_score(y, pred, zero_division=0))
+    assert overall["f1"] == pytest.approx(f1_score(y, pred, zero_division=0))
+    assert overall["roc_auc"] == pytest.approx(roc_auc_score(y, prob))
+    assert overall["pr_auc"] == pytest.approx(average_precision_score(y, prob))
+
+
+def test_confusion_matrix_counts():
+    y = np.array([0, 0, 1, 1, 1])
+    prob = np.array([0.1, 0.6, 0.4, 0.7, 0.9])
+
+    cm = evaluate_predictions(y, prob, threshold=0.5)["overall"]["confusion_matrix"]
+
+    assert cm == {"tn": 1, "fp": 1, "fn": 1, "tp": 2}
+
+
+def test_group_breakdown_matches_per_group_metrics():
+    y, prob, groups = sample_scores(seed=1)
+
+    by_group = evaluate_predictions(y, prob, threshold=0.3, groups=groups)["by_group"]
+
+    assert sorted(by_group) == ["adult", "child", "senior"]
+    for name, report in by_group.items():
+        mask = groups == name
+        assert report["n"] == int(mask.sum())
+        assert report["roc_auc"] == pytest.approx(roc_auc_score(y[mask], prob[mask]))
+        assert report["f1"] == pytest.approx(f1_score(y[mask], (prob[mask] >= 0.3).astype(int)))
+
+
+def test_single_class_auc_is_none():
+    overall = evaluate_predictions(np.ones(4), np.array([0.2, 0.4, 0.6, 0.8]))["overall"]
+    assert overall["roc_auc"] is None
+
+
+def test_bootstrap_intervals():
+    y, prob, _ = sample_scores(seed=2)
+
+    first = evaluate_predictions(y, prob, n_bootstrap=100, seed=3)
+    second = evaluate_predictions(y, prob, n_bootstrap=100, seed=3)
+
+    intervals = first["confidence_intervals"]
+    assert intervals == second["confidence_intervals"]
+    for name in ("accuracy", "f1", "roc_auc", "pr_auc"):
+        low, high = intervals[name]
+        assert low <= first["overall"][name] <= high
+
+
+def test_f1_at_thresholds_matches_sklearn():
+    y, prob, _ = sample_scores(seed=4)
+    thresholds = np.linspace(0.1, 0.9, 17)
+
+    scores = f1_at_thresholds(y, prob, thresholds)
+
+    expected = [f1_score(y, (prob >= t).astype(int), zero_division=0) for t in thresholds]
+    assert np.allclose(scores, expected)
+
+
+def test_empty_input_rejected():
+    with pytest.raises(ValueError):
+        evaluate_predictions(np.array([]), np.array([]))
@@ -0,0 +1,68 @@
+import pytest
+
+from model_selection import build_estimator, measure_latency, select_model
+from profiling import StageProfiler
+from train import make_synthetic_data, train_model
+
+
+def latency(p99):
+    return {"single_row": {"p50_ms": p99 / 2, "p99_ms": p99}, "batch": {}}
+
+
+def test_select_best_within_budget():
+    candidates = {
+        "fast": {"roc_auc": 0.80, "latency": latency(1.0)},
+        "accurate": {"roc_auc": 0.90, "latency": latency(4.0)},
+        "too_slow": {"roc_auc": 0.95, "latency": latency(20.0)},
+    }
+    assert select_model(candidates, latency_budget_ms=5.0) == "accurate"
+
+
+def test_select_fastest_when_nothing_fits():
+    candidates = {
+        "a": {"roc_auc": 0.9, "latency": latency(8.0)},
+        "b": {"roc_auc": 0.8, "latency": latency(6.0)},
+    }
+    assert select_model(candidates, latency_budget_ms=1.0) == "b"
+
+
+def test_unknown_estimator():
+    with pytest.raises(ValueError):
+        build_estimator("svm")
+    with pytest.raises(ValueError):
+        train_model(make_synthetic_data(n=100, seed=1), estimator="svm")
+
+
+def test_measure_latency_structure():
+    df = make_synthetic_data(n=200, seed=2)
+    X = df.drop(columns=["at_risk"]).astype(float)
+    model = build_estimator("logreg").fit(X, df["at_risk"])
+
+    result = measure_latency(model, X, n_single=20, batch_size=500, n_batches=3)
+
+    assert result["single_row"]["p99_ms"] >= result["single_row"]["p50_ms"] > 0
+    assert result["batch"]["batch_size"] == 500
+    assert result["batch"]["rows_per_second"] > 0
+
+
+def test_train_model_auto_records_selection():
+    profiler = StageProfiler()
+    out = train_model(make_synthetic_data(n=400, seed=3), n_bootstrap=0, estimator="auto", profiler=profiler)
+
+    selection = out["metrics"]["model_selection"]
+    assert set(selection["candidates"]) == {"hgb", "logreg"}
+    assert out["metrics"]["estimator"] == selection["selected"]
+    # Scored on 20% of the 300 training rows, not on the 100 test rows
+    assert selection["validation_rows"] == 60
+    # ... and the winner is then refitted on all 300
+    rows = {stage["name"]: stage["rows"] for stage in profiler.report()}
+    assert rows["fit:logreg"] == 240 and rows["refit"] == 300
+    for summary in selection["candidates"].values():
+        assert "p99_ms" in summary["latency"]["single_row"]
+        assert "rows_per_second" in summary["latency"]["batch"]
+
+
+def test_train_model_hgb():
+    out = train_model(make_synthetic_data(n=400, seed=4), n_bootstrap=0, estimator="hgb")
+    assert out["metrics"]["estimator"] == "hgb"
+    assert "model_selection" not in out["metrics"]
@@ -0,0 +1,96 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from service import patient_reference
+from service.patient_reference import (
+    DEVIATION_FEATURES,
+    REFERENCE_COLUMNS,
+    PatientReferenceIndex,
+    add_reference_features,
+    deviation_features,
+)
+
+VITALS = ["bp_systolic", "bp_diastolic", "heart_rate", "temperature", "respiratory_rate", "oxygen_saturation"]
+
+
+def references(n, seed=0, start="2026-01-01"):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, n)],
+        "patient_id": [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, n)],
+        "created_at": pd.date_range(start, periods=n, freq="min", tz="UTC"),
+        "bp_systolic": rng.integers(100, 140, n).astype(float),
+        "bp_diastolic": rng.integers(60, 90, n).astype(float),
+        "heart_rate": rng.integers(60, 100, n).astype(float),
+        "temperature": rng.normal(98.6, 0.5, n),
+        "respiratory_rate": rng.integers(12, 20, n).astype(float),
+        "oxygen_saturation": rng.integers(94, 100, n).astype(float),
+    })
+
+
+def test_deviation_features_absolute_and_relative_error():
+    reading = np.array([130, 80, 90, 99.6, 16, 95])
+    reference = np.array([120, 80, 100, 98.6, 16, 100])
+    out = dict(zip(DEVIATION_FEATURES, deviation_features(reading, reference)[0]))
+
+    assert out["ref_available"] == 1
+    assert out["bp_systolic_abs_err"] == 10
+    assert out["bp_systolic_rel_err"] == pytest.approx(10 / 120)
+    assert out["heart_rate_abs_err"] == 10
+    assert out["temperature_abs_err"] == pytest.approx(1.0)
+    assert out["bp_diastolic_rel_err"] == 0
+
+
+def test_missing_reference_gives_zero_errors():
+    out = deviation_features(np.ones(6), np.full(6, np.nan))[0]
+    assert out.tolist() == [0.0] * len(DEVIATION_FEATURES)
+
+
+def test_index_lookup_matches_training_features():
+    refs = references(50)
+    index = PatientReferenceIndex(capacity=4)
+    index.load_frame(refs)
+
+    rng = np.random.default_rng(1)
+    readings = refs[VITALS] + rng.normal(0, 3, (50, 6))
+    readings["patient_id"] = refs["patient_id"]
+    training = pd.concat(
+        [readings, refs[VITALS].set_axis(list(REFERENCE_COLUMNS), axis=1), pd.Series(0, name="at_risk")],
+        axis=1,
+    )
+    expected = add_reference_features(training)
+
+    assert not set(REFERENCE_COLUMNS) & set(expected.columns)
+    for i in (0, 17, 49):
+        served = index.features(refs["patient_id"][i], readings.iloc[i].to_dict())
+        assert served == pytest.approx(expected.loc[i, list(DEVIATION_FEATURES)].to_dict())
+    assert index.features("unknown", readings.iloc[0].to_dict())["ref_available"] == 0
+
+
+def test_refresh_reads_after_watermark(monkeypatch):
+    old, new = references(10), references(5, seed=2, start="2026-02-01")
+    index = PatientReferenceIndex(capacity=2)
+    index.load_frame(old)
+    calls = []
+
+    def fake_copy(db_url, query, params):
+        calls.append(params)
+        return new
+
+    monkeypatch.setattr(patient_reference, "_copy_references", fake_copy)
+    assert index.refresh("postgresql://fake") == 5
+
+    assert calls[0]["ts"] == old["created_at"].iloc[-1].to_pydatetime()
+    assert len(index) == 15
+    assert index.reference(new["patient_id"][4])[0] == new["bp_systolic"][4]
+    assert index.watermark[1] == new["id"].iloc[-1]
+
+
+def test_unknown_patient_has_zero_errors():
+    index = PatientReferenceIndex()
+    out = index.features(None, dict(zip(VITALS, [120, 80, 70, 98.6, 16, 98])))
+    assert list(out) == list(DEVIATION_FEATURES)
+    assert set(out.values()) == {0.0}
@@ -2,6 +2,8 @@ import json
 import tempfile
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
 from sklearn.linear_model import LogisticRegression
 from sklearn.pipeline import Pipeline
@@ -13,7 +15,10 @@ from predict import (
     _resolve_threshold,
     get_feature_names,
     load_metrics,
+    predict_batch_from_json,
     predict_from_json,
+    resolve_thresholds,
+    serve_stdio,
 )
 
 
@@ -538,3 +543,145 @@ def test_predict_main_model_not_found():
     finally:
         sys.argv = original_argv
         predict.MODEL_PATH = original_model_path
+
+
+def test_resolve_thresholds_matches_scalar_version():
+    metrics = json.loads(temp_metrics_file().read_text())
+    ages = np.array([0.5, 1, 12.9, 13, 17.5, 18, 64, 65, 80, np.nan])
+    expected = [
+        _resolve_threshold(metrics, {} if np.isnan(a) else {"age_years": a}, 0.5) for a in ages
+    ]
+    np.testing.assert_allclose(resolve_thresholds(metrics, ages, 0.5), expected)
+    assert resolve_thresholds({}, ages, 0.7) == 0.7
+
+
+def fitted_model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {"age_years": rng.uniform(0, 90, 200), "heart_rate": rng.normal(80, 15, 200)}
+    )
+    y = (X["heart_rate"] > 85).astype(int)
+    return simple_model().fit(X, y), ["age_years", "heart_rate"]
+
+
+class ChunkedReader:
+    """Binary stdin stand-in whose read1 hands out the given chunks one per call."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read1(self, n=-1):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class CountingModel:
+    def __init__(self, model):
+        self.model = model
+        self.batch_sizes = []
+
+    def predict_proba(self, X):
+        self.batch_sizes.append(len(X))
+        return self.model.predict_proba(X)
+
+
+def test_predict_batch_from_json_matches_single():
+    model, names = fitted_model()
+    metrics = json.loads(temp_metrics_file().read_text())
+    payloads = [
+        {"age_years": 5, "heart_rate": 120},
+        {"age_years": 70, "heart_rate": 60, "note": "x"},
+        {"age_years": 30},
+        {"age_years": 30, "heart_rate": "fast"},
+        [1, 2],
+    ]
+
+    results = predict_batch_from_json(model, payloads, names, 0.5, metrics)
+
+    for payload, result in zip(payloads[:2], results[:2]):
+        assert result == pytest.approx(predict_from_json(model, payload, names, 0.5, metrics))
+    assert results[2] == {"error": "Missing required features", "missing": ["heart_rate"]}
+    assert results[3]["error"].startswith("Non-numeric feature value")
+    assert "JSON object" in results[4]["error"]
+
+
+def test_serve_stdio_micro_batches_buffered_lines():
+    import io
+
+    model, names = fitted_model()
+    counting = CountingModel(model)
+    lines = [json.dumps({"id": i, "age_years": 10 * i, "heart_rate": 60 + 5 * i}) for i in range(5)]
+    # Three lines arrive together, the last one split across reads, then EOF without a newline
+    stdin = ChunkedReader([
+        "\n".join(lines[:3]).encode() + b"\n" + lines[3][:5].encode(),
+        lines[3][5:].encode() + b"\nnot json\n\n",
+        lines[4].encode(),
+    ])
+    stdout = io.BytesIO()
+
+    served = serve_stdio(counting, names, 0.5, {}, stdin, stdout, max_batch=2)
+
+    out = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert served == 6
+    assert [r.get("id") for r in out] == [0, 1, 2, 3, None, 4]
+    assert out[4]["error"].startswith("Invalid JSON")
+    assert counting.batch_sizes == [2, 1, 1, 1]
+    for i, r in zip(range(5), [r for r in out if "id" in r]):
+        expected = predict_from_json(model, json.loads(lines[i]), names, 0.5)
+        assert r["risk_probability"] == pytest.approx(expected["risk_probability"])
+        assert r["extra_fields_ignored"] == []
+
+
+def test_batch_rejects_null_and_non_finite_features():
+    model, names = fitted_model()
+    payloads = [
+        {"age_years": 30, "heart_rate": None},
+        {"age_years": 30, "heart_rate": float("inf")},
+        {"age_years": 30, "heart_rate": 90},
+    ]
+
+    results = predict_batch_from_json(model, payloads, names, 0.5)
+
+    assert results[0] == {"error": "Missing or non-finite feature values", "features": ["heart_rate"]}
+    assert results[1] == results[0]
+    assert results[2] == pytest.approx(predict_from_json(model, payloads[2], names, 0.5))
+
+
+class PickyModel:
+    """Fails any call that includes a heart rate above 200."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict_proba(self, X):
+        if (X["heart_rate"] > 200).any():
+            raise ValueError("implausible heart rate")
+        return self.model.predict_proba(X)
+
+
+def test_serve_stdio_isolates_scoring_failures():
+    import io
+
+    model, names = fitted_model()
+    lines = [
+        {"id": 0, "age_years": 30, "heart_rate": 90},
+        {"id": 1, "age_years": 30, "heart_rate": 250},
+        {"id": 2, "age_years": 30, "heart_rate": None},
+        {"id": 3, "age_years": 30, "heart_rate": 70},
+    ]
+    stdin = ChunkedReader([b"".join(json.dumps(line).encode() + b"\n" for line in lines)])
+    stdout = io.BytesIO()
+
+    served = serve_stdio(PickyModel(model), names, 0.5, {}, stdin, stdout)
+
+    def strict(token):
+        raise AssertionError(f"invalid JSON constant {token}")
+
+    out = [json.loads(line, parse_constant=strict) for line in stdout.getvalue().splitlines()]
+    assert served == 4
+    assert [r["id"] for r in out] == [0, 1, 2, 3]
+    assert out[1]["error"] == "Scoring failed: ValueError: implausible heart rate"
+    assert out[2]["features"] == ["heart_rate"]
+    for r, line in zip([out[0], out[3]], [lines[0], lines[3]]):
+        payload = {k: v for k, v in line.items() if k != "id"}
+        expected = predict_from_json(model, payload, names, 0.5)
+        assert r["risk_probability"] == pytest.approx(expected["risk_probability"])
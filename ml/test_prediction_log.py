@@ -0,0 +1,119 @@
+import gzip
+import json
+import threading
+
+import pytest
+
+from service.prediction_log import NDJSONSink, NullSink, PredictionLogger, logger_from_env
+
+
+class ListSink:
+    def __init__(self, block=None):
+        self.batches = []
+        self.block = block
+        self.closed = False
+
+    def write(self, records):
+        if self.block is not None:
+            self.block.wait()
+        self.batches.append(list(records))
+
+    def close(self):
+        self.closed = True
+
+
+def read_ndjson(directory):
+    records = []
+    for path in sorted(directory.glob("predictions-*.ndjson.gz")):
+        with gzip.open(path, "rt") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+def test_logger_flushes_in_batches_and_drains_on_close():
+    sink = ListSink()
+    logger = PredictionLogger(sink, batch_size=10, flush_interval=60)
+    for i in range(25):
+        assert logger.log({"i": i})
+    logger.close()
+
+    assert [len(b) for b in sink.batches] == [10, 10, 5]
+    assert [r["i"] for b in sink.batches for r in b] == list(range(25))
+    assert sink.closed
+    stats = logger.stats()
+    assert stats["written"] == 25 and stats["flushes"] == 3 and stats["dropped"] == 0
+
+
+def test_logger_drops_instead_of_blocking_when_full():
+    release = threading.Event()
+    sink = ListSink(block=release)
+    logger = PredictionLogger(sink, max_queue=5, batch_size=1, flush_interval=0.01)
+    accepted = sum(logger.log({"i": i}) for i in range(100))
+    release.set()
+    logger.close()
+
+    stats = logger.stats()
+    assert accepted < 100
+    assert stats["dropped"] == 100 - accepted
+    assert stats["written"] == accepted
+
+
+def test_logger_counts_sink_failures():
+    class FailingSink(ListSink):
+        def write(self, records):
+            raise OSError("disk full")
+
+    logger = PredictionLogger(FailingSink(), batch_size=2)
+    logger.log({"i": 0})
+    logger.log({"i": 1})
+    logger.close()
+
+    stats = logger.stats()
+    assert stats["failed"] == 2 and stats["written"] == 0
+    assert stats["last_error"] == "OSError: disk full"
+
+
+def test_ndjson_sink_rotates_and_round_trips(tmp_path):
+    sink = NDJSONSink(tmp_path, max_bytes=1)
+    sink.write([{"i": 0}, {"i": 1}])
+    sink.write([{"i": 2}])
+    sink.close()
+
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 2
+    assert read_ndjson(tmp_path) == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+
+def test_ndjson_sink_appends_members_to_one_file(tmp_path):
+    sink = NDJSONSink(tmp_path)
+    for i in range(3):
+        sink.write([{"i": i}])
+
+    assert len(list(tmp_path.glob("*.ndjson.gz"))) == 1
+    assert [r["i"] for r in read_ndjson(tmp_path)] == [0, 1, 2]
+
+
+def test_logger_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("PREDICTION_LOG_SINK", raising=False)
+    monkeypatch.delenv("PREDICTION_LOG_DIR", raising=False)
+    off = logger_from_env()
+    assert isinstance(off.sink, NullSink)
+    assert off.log({"i": 0}) is False
+    stats = off.stats()
+    assert stats["enabled"] is False and stats["enqueued"] == stats["written"] == 0
+    assert off._thread is None
+
+    monkeypatch.setenv("PREDICTION_LOG_DIR", str(tmp_path))
+    assert logger_from_env().sink.directory == tmp_path
+
+    monkeypatch.setenv("PREDICTION_LOG_SINK", "ndjson")
+    monkeypatch.setenv("PREDICTION_LOG_DIR", str(tmp_path))
+    assert logger_from_env().sink.directory == tmp_path
+
+    monkeypatch.setenv("PREDICTION_LOG_SINK", "postgres")
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    with pytest.raises(RuntimeError, match="DATABASE_URL"):
+        logger_from_env()
+
+    monkeypatch.setenv("PREDICTION_LOG_SINK", "kafka")
+    with pytest.raises(ValueError, match="PREDICTION_LOG_SINK"):
+        logger_from_env()
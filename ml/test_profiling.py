@@ -0,0 +1,45 @@
+import numpy as np
+
+from profiling import StageProfiler
+from train import make_synthetic_data, train_model
+
+
+def test_stage_records_time_and_memory():
+    profiler = StageProfiler()
+    with profiler.stage("alloc", rows=10):
+        data = np.ones(1_000_000)
+    del data
+
+    (timing,) = profiler.stages
+    assert timing.name == "alloc"
+    assert timing.rows == 10
+    assert timing.wall_seconds >= 0
+    assert timing.peak_mem_bytes >= 8_000_000
+
+
+def test_nested_stage_peak_included_in_outer():
+    profiler = StageProfiler()
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            data = np.ones(500_000)
+            del data
+
+    inner, outer = profiler.stages
+    assert inner.name == "inner"
+    assert outer.peak_mem_bytes >= inner.peak_mem_bytes
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StageProfiler(enabled=False)
+    with profiler.stage("noop"):
+        pass
+    assert profiler.report() == []
+
+
+def test_train_model_profiles_stages():
+    profiler = StageProfiler()
+    train_model(make_synthetic_data(n=300, seed=1), n_bootstrap=10, profiler=profiler)
+
+    names = [s["name"] for s in profiler.report()]
+    assert names == ["coerce", "split", "fit", "predict", "feature_profile", "threshold_search", "metrics", "feature_importance"]
+    assert "metrics" in profiler.format_table()
@@ -0,0 +1,130 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import student_history
+from student_history import (
+    HISTORY_FEATURES,
+    PRIOR_RATE,
+    StudentHistoryStore,
+    add_history_features,
+    history_features,
+)
+
+T0 = pd.Timestamp("2026-01-05", tz="UTC")
+
+
+def readings(n=600, n_students=12, seed=0):
+    rng = np.random.default_rng(seed)
+    submitted = T0 + pd.to_timedelta(rng.integers(0, 86400 * 20, n), unit="s")
+    graded = pd.Series(submitted + pd.to_timedelta(rng.integers(60, 86400 * 3, n), unit="s"))
+    return pd.DataFrame({
+        "id": [str(uuid.UUID(int=int(x))) for x in rng.integers(0, 2**63, n)],
+        "student_id": rng.choice([f"student-{i}" for i in range(n_students)], n),
+        "submitted_at": submitted,
+        "graded_at": graded.where(rng.random(n) < 0.8),
+        "at_risk": rng.integers(0, 2, n),
+        "bp_systolic": rng.normal(120, 20, n).round(),
+        "bp_diastolic": rng.normal(80, 12, n).round(),
+        "heart_rate": rng.normal(80, 15, n).round(),
+        "temperature": rng.normal(98.6, 1.0, n),
+    })
+
+
+def replay(df):
+    """Features each submission sees when events are applied one at a time."""
+    store = StudentHistoryStore(capacity=2)
+    events = [(r.submitted_at, 0, i) for i, r in df.iterrows()]
+    events += [(r.graded_at, 1, i) for i, r in df.iterrows() if pd.notna(r.graded_at)]
+    seen = {}
+    # A grade stamped at the same instant as a submission is not yet visible
+    for _, kind, i in sorted(events, key=lambda e: (e[0], e[1])):
+        row = df.loc[i]
+        if kind == 0:
+            seen[i] = store.features(row.student_id)
+            store.record_submission(row.student_id, row)
+        else:
+            store.record_grade(row.student_id, row.at_risk)
+    return store, pd.DataFrame.from_dict(seen, orient="index").sort_index()
+
+
+def test_training_features_match_incremental_store():
+    df = readings()
+    store, expected = replay(df)
+    actual = history_features(df)
+
+    assert list(actual.columns) == list(HISTORY_FEATURES)
+    np.testing.assert_allclose(actual.to_numpy(), expected[list(HISTORY_FEATURES)].to_numpy(), atol=1e-6)
+
+    bulk = StudentHistoryStore()
+    bulk.load_frame(df)
+    for student in df["student_id"].unique():
+        assert bulk.features(student) == pytest.approx(store.features(student))
+
+
+def test_grades_are_not_visible_before_graded_at():
+    df = pd.DataFrame({
+        "student_id": ["a", "a", "a"],
+        "submitted_at": [T0, T0 + pd.Timedelta(hours=1), T0 + pd.Timedelta(hours=3)],
+        "graded_at": [T0 + pd.Timedelta(hours=2), None, None],
+        "at_risk": [1, 0, 0],
+        "heart_rate": [75, 75, 75],
+    })
+    out = history_features(df)
+
+    assert out["student_submissions"].tolist() == [0, 1, 2]
+    # Graded between the second and third submission
+    assert out["student_graded"].tolist() == [0, 0, 1]
+    assert out["student_error_rate"].iloc[1] == PRIOR_RATE
+    assert out["student_error_rate"].iloc[2] > PRIOR_RATE
+
+
+def test_add_history_features_drops_source_columns():
+    df = readings(50)
+    out = add_history_features(df)
+
+    assert not {"student_id", "submitted_at", "graded_at"} & set(out.columns)
+    assert set(HISTORY_FEATURES) <= set(out.columns)
+    with pytest.raises(ValueError, match="student_id"):
+        history_features(df.drop(columns=["student_id"]))
+
+
+def test_store_refresh_applies_new_events_after_watermark(monkeypatch):
+    df = readings(300).sort_values("submitted_at", ignore_index=True)
+    cutoff = df["submitted_at"].iloc[200]
+    old = df[df["submitted_at"] < cutoff].copy()
+    old.loc[old["graded_at"] >= cutoff, "graded_at"] = pd.NaT
+    new_subs = df[df["submitted_at"] >= cutoff]
+    new_grades = df[df["graded_at"] >= cutoff].sort_values("graded_at")
+
+    store = StudentHistoryStore()
+    store.load_frame(old)
+    served = {
+        student_history.SUBMISSIONS_QUERY: new_subs,
+        student_history.GRADES_QUERY: new_grades,
+    }
+    calls = []
+
+    def fake_copy(db_url, query, params):
+        calls.append(params)
+        return served[query]
+
+    monkeypatch.setattr(student_history, "_copy_readings", fake_copy)
+    assert store.refresh("postgresql://fake") == (len(new_subs), len(new_grades))
+    assert calls[0]["ts"] < cutoff.to_pydatetime()
+
+    full = StudentHistoryStore()
+    full.load_frame(df)
+    for student in df["student_id"].unique():
+        assert store.features(student) == pytest.approx(full.features(student))
+
+
+def test_unknown_student_gets_cold_start_values():
+    store = StudentHistoryStore()
+    cold = store.features(None)
+
+    assert cold == store.features("never-seen")
+    assert cold["student_submissions"] == 0
+    assert cold["student_error_rate"] == PRIOR_RATE
@@ -0,0 +1,79 @@
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from synthetic_data import (
+    SyntheticConfig,
+    iter_synthetic_chunks,
+    simulate_vitals,
+    write_synthetic_shards,
+)
+
+
+def test_chunks_reproducible_across_worker_counts():
+    serial = pd.concat(iter_synthetic_chunks(1000, seed=3, chunk_rows=300, workers=1), ignore_index=True)
+    parallel = pd.concat(iter_synthetic_chunks(1000, seed=3, chunk_rows=300, workers=2), ignore_index=True)
+
+    assert len(serial) == 1000
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_chunk_sizes():
+    sizes = [len(c) for c in iter_synthetic_chunks(1000, chunk_rows=300)]
+    assert sizes == [300, 300, 300, 100]
+
+
+def test_positive_rate_knob():
+    config = SyntheticConfig(positive_rate=0.05)
+    df = simulate_vitals(np.random.default_rng(1), 5000, config)
+    assert df["at_risk"].mean() == pytest.approx(0.05, abs=0.005)
+
+
+def test_age_distribution_named():
+    config = SyntheticConfig(age_distribution="pediatric")
+    df = simulate_vitals(np.random.default_rng(2), 5000, config)
+    assert (df["age_years"] < 18).mean() > 0.7
+
+
+def test_age_distribution_explicit_weights():
+    config = SyntheticConfig(age_distribution={"senior": 1.0})
+    df = simulate_vitals(np.random.default_rng(4), 500, config)
+    assert df["age_years"].between(65, 100).all()
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError):
+        simulate_vitals(np.random.default_rng(0), 10, SyntheticConfig(positive_rate=1.5))
+    with pytest.raises(ValueError):
+        simulate_vitals(np.random.default_rng(0), 10, SyntheticConfig(age_distribution="toddler"))
+
+
+def test_write_synthetic_shards_csv():
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp) / "shards"
+        paths = write_synthetic_shards(out_dir, n_rows=500, seed=5, chunk_rows=200, workers=2, fmt="csv")
+
+        assert [p.name for p in paths] == ["part-00000.csv", "part-00001.csv", "part-00002.csv"]
+        manifest = json.loads((out_dir / "_manifest.json").read_text())
+        assert manifest["n_rows"] == 500
+
+        df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+        expected = pd.concat(iter_synthetic_chunks(500, seed=5, chunk_rows=200), ignore_index=True)
+        assert len(df) == 500
+        assert (df["at_risk"].values == expected["at_risk"].values).all()
+
+
+def test_load_data_synthetic_streaming():
+    from train import load_data
+
+    df = load_data(
+        "synthetic",
+        synthetic_rows=700,
+        synthetic_config=SyntheticConfig(positive_rate=0.3),
+    )
+    assert len(df) == 700
+    assert df["at_risk"].mean() == pytest.approx(0.3, abs=0.01)
@@ -0,0 +1,122 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.replay import run_replay
+from service.traffic_capture import TrafficCapture, anonymise, capture_from_env, read_capture
+
+PAYLOAD = {"age_years": 30, "heart_rate": 72, "resp_rate": 16, "temp_f": 98.6, "spo2_pct": 98, "systolic_bp": 120, "diastolic_bp": 80, "height_ft": 5, "height_in": 8, "weight_lb": 160, "pain_0_10": 2}
+
+
+def test_anonymise_keeps_repeats_linked():
+    a = anonymise({**PAYLOAD, "student_id": "s-1", "patient_id": "p-9"}, b"salt")
+    b = anonymise({**PAYLOAD, "student_id": "s-1", "patient_id": "p-8"}, b"salt")
+
+    assert a["student_id"] == b["student_id"] != "s-1"
+    assert a["patient_id"] != b["patient_id"]
+    assert len(a["student_id"]) == 16
+    assert anonymise({"student_id": "s-1"}, b"other")["student_id"] != a["student_id"]
+    assert {k: a[k] for k in PAYLOAD} == PAYLOAD
+    assert anonymise({"patient_id": None}, b"salt") == {"patient_id": None}
+
+
+def test_predict_requests_are_captured(monkeypatch, tmp_path):
+    import service.api as api
+
+    monkeypatch.setattr(api, "traffic_capture", TrafficCapture(tmp_path, salt=b"k"))
+    client = TestClient(api.app)
+    for patient in ("p-1", "p-2", "p-1"):
+        assert client.post("/predict", json={**PAYLOAD, "patient_id": patient}).status_code == 200
+    api.traffic_capture.close()
+
+    (path,) = tmp_path.glob("traffic-*.ndjson.gz")
+    with gzip.open(path, "rt") as f:
+        raw = f.read()
+    assert "p-1" not in raw
+
+    records = read_capture(tmp_path)
+    assert [r["path"] for r in records] == ["/predict"] * 3
+    assert records[0]["t"] <= records[1]["t"] <= records[2]["t"]
+    ids = [r["body"]["patient_id"] for r in records]
+    assert ids[0] == ids[2] != ids[1]
+    assert records[0]["body"]["heart_rate"] == 72 and "length_in" not in records[0]["body"]
+
+
+def test_capture_from_env(monkeypatch, tmp_path):
+    monkeypatch.delenv("TRAFFIC_CAPTURE_DIR", raising=False)
+    assert capture_from_env() is None
+
+    monkeypatch.setenv("TRAFFIC_CAPTURE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRAFFIC_CAPTURE_SALT", "fixed")
+    capture = capture_from_env()
+    assert capture.salt == b"fixed" and capture.logger.sink.directory == tmp_path
+    capture.close()
+
+
+def test_read_capture_orders_by_arrival(tmp_path):
+    path = tmp_path / "traffic-1.ndjson.gz"
+    with gzip.open(path, "wt") as f:
+        for t in (3.0, 1.0, 2.0):
+            f.write(json.dumps({"t": t, "path": "/predict", "body": {}}) + "\n")
+
+    assert [r["t"] for r in read_capture(path)] == [1.0, 2.0, 3.0]
+    assert read_capture(tmp_path) == read_capture(path)
+
+
+def test_replay_keeps_pacing_and_reports_latency():
+    import service.api as api
+
+    records = [{"t": 100.0 + dt, "path": "/predict", "body": PAYLOAD} for dt in (0.0, 0.0, 0.1, 0.2)]
+    report = asyncio.run(run_replay(records, app=api.app, speed=2.0))
+
+    assert report["requests"] == 4 and report["errors"] == 0
+    assert report["status_counts"] == {"200": 4}
+    # 0.2s of captured traffic at 2x takes at least 0.1s
+    assert report["elapsed_seconds"] >= 0.1
+    assert report["captured_seconds"] == pytest.approx(0.2)
+    latency = report["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p90"] <= latency["p99"] <= latency["max"]
+
+
+def test_replay_counts_errors_and_rejects_bad_args():
+    import service.api as api
+
+    records = [{"t": 0.0, "path": "/predict", "body": {"heart_rate": 72}}]
+    report = asyncio.run(run_replay(records, app=api.app, speed=0))
+    assert report["errors"] == 1 and report["status_counts"] == {"422": 1}
+
+    with pytest.raises(ValueError, match="exactly one"):
+        asyncio.run(run_replay(records))
+    with pytest.raises(ValueError, match="speed"):
+        asyncio.run(run_replay(records, app=api.app, speed=-1))
+
+
+def test_in_process_replay_runs_the_app_lifespan():
+    from contextlib import asynccontextmanager
+
+    from fastapi import FastAPI, HTTPException
+
+    events = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        events.append("startup")
+        yield
+        events.append("shutdown")
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.post("/predict")
+    def predict(body: dict):
+        if events != ["startup"]:
+            raise HTTPException(status_code=503)
+        return {}
+
+    records = [{"t": float(i), "path": "/predict", "body": {}} for i in range(3)]
+    report = asyncio.run(run_replay(records, app=app, speed=0))
+
+    assert report["status_counts"] == {"200": 3}
+    assert events == ["startup", "shutdown"]
@@ -1,5 +1,8 @@
+import json
+
 import numpy as np
 import pandas as pd
+import pytest
 from pathlib import Path
 
 from train import (
@@ -251,6 +254,20 @@ def test_save_artifacts():
         shutil.rmtree(temp_dir)
 
 
+def test_save_artifacts_writes_feature_profile(tmp_path):
+    from train import save_artifacts, train_model
+
+    result = train_model(make_synthetic_data(n=200, seed=3), seed=42, n_bootstrap=0)
+    assert set(result["feature_profile"]["features"]) == set(result["metrics"]["feature_names"])
+
+    save_artifacts(result["model"], result["metrics"], artifacts_dir=tmp_path, profile=result["feature_profile"])
+    profile = json.loads((tmp_path / "feature_profile.json").read_text())
+    assert profile["features"]["heart_rate"]["count"] == 150
+
+    save_artifacts(result["model"], result["metrics"], artifacts_dir=tmp_path)
+    assert not (tmp_path / "feature_profile.json").exists()
+
+
 def test_load_data_db_fallback():
     from train import load_data
     
@@ -308,3 +325,47 @@ def test_exception_handler_in_import():
         assert hasattr(train, 'load_training_data_from_db')
     except Exception:
         pass
+
+
+def test_load_data_csv_student_history(tmp_path):
+    from train import load_data
+
+    df = make_synthetic_data(n=60, seed=5)
+    df["student_id"] = ["a", "b", "c"] * 20
+    df["submitted_at"] = pd.date_range("2026-01-01", periods=60, freq="h", tz="UTC")
+    df["graded_at"] = df["submitted_at"] + pd.Timedelta(hours=5)
+    csv_path = tmp_path / "readings.csv"
+    df.to_csv(csv_path, index=False)
+
+    out = load_data("csv", csv_path=csv_path, student_history=True)
+    assert "student_id" not in out.columns
+    assert out["student_submissions"].tolist()[:6] == [0, 0, 0, 1, 1, 1]
+
+    with pytest.raises(ValueError, match="Student history"):
+        load_data("synthetic", student_history=True)
+
+
+def test_load_data_csv_patient_reference(tmp_path):
+    from train import load_data
+
+    df = make_synthetic_data(n=20, seed=6)
+    for col in ("bp_systolic", "bp_diastolic", "heart_rate", "temperature", "respiratory_rate", "oxygen_saturation"):
+        df[f"ref_{col}"] = df[col] + 1
+    df.loc[0, [c for c in df.columns if c.startswith("ref_")]] = None
+    csv_path = tmp_path / "readings.csv"
+    df.to_csv(csv_path, index=False)
+
+    out = load_data("csv", csv_path=csv_path, patient_reference=True)
+    assert not [c for c in out.columns if c.startswith("ref_") and c != "ref_available"]
+    assert out["ref_available"].tolist()[:2] == [0.0, 1.0]
+    assert out["heart_rate_abs_err"].iloc[1] == 1
+
+
+def test_train_model_reports_feature_importance():
+    df = make_synthetic_data(n=400, seed=8)
+    report = train_model(df, n_bootstrap=0, importance_repeats=2)["eval_report"]
+    importance = report["feature_importance"]
+    assert importance["metric"] == "roc_auc"
+    assert {f["feature"] for f in importance["features"]} == set(df.columns) - {"at_risk"}
+
+    assert "feature_importance" not in train_model(df, n_bootstrap=0, importance_repeats=0)["eval_report"]
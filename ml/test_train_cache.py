@@ -0,0 +1,72 @@
+import tempfile
+from pathlib import Path
+
+import train
+from train import make_synthetic_data, train_model, train_with_cache
+from train_cache import TrainingCache, cache_key, code_version, dataset_fingerprint
+
+
+def test_fingerprint_ignores_row_and_column_order():
+    df = make_synthetic_data(n=200, seed=1)
+    shuffled = df.sample(frac=1.0, random_state=3)[list(reversed(df.columns))]
+
+    assert dataset_fingerprint(df) == dataset_fingerprint(shuffled)
+
+
+def test_fingerprint_changes_with_data():
+    df = make_synthetic_data(n=200, seed=1)
+    changed = df.copy()
+    changed.loc[0, "heart_rate"] += 1
+
+    assert dataset_fingerprint(df) != dataset_fingerprint(changed)
+
+
+def test_cache_key_sorts_dict_keys():
+    assert cache_key({"a": 1, "b": 2}) == cache_key({"b": 2, "a": 1})
+    assert cache_key({"a": 1}) != cache_key({"a": 2})
+
+
+def test_code_version_covers_library_versions(tmp_path):
+    src = tmp_path / "stage.py"
+    src.write_text("x = 1\n")
+    base = code_version([src], versions=["sklearn 1.0"])
+
+    assert code_version([src], versions=["sklearn 1.0"]) == base
+    assert code_version([src], versions=["sklearn 1.1"]) != base
+    src.write_text("x = 2\n")
+    assert code_version([src], versions=["sklearn 1.0"]) != base
+
+
+def test_threshold_change_reuses_fit():
+    df = make_synthetic_data(n=300, seed=2)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TrainingCache(Path(tmp))
+
+        first = train_model(df, threshold=0.5, n_bootstrap=0, cache=cache)
+        second = train_model(df, threshold=0.3, n_bootstrap=0, cache=cache)
+
+        assert cache.misses == {"split": 1, "fit": 1}
+        assert cache.hits == {"split": 1, "fit": 1}
+        assert second["metrics"]["threshold"] == 0.3
+        assert first["metrics"]["roc_auc"] == second["metrics"]["roc_auc"]
+
+
+def test_train_with_cache_reuses_run():
+    df = make_synthetic_data(n=300, seed=3)
+    with tempfile.TemporaryDirectory() as tmp:
+        original_dir = train.ARTIFACTS_DIR
+        train.ARTIFACTS_DIR = Path(tmp) / "artifacts"
+        try:
+            cache = TrainingCache(Path(tmp) / "cache")
+
+            _, metrics, reused = train_with_cache(df, cache, n_bootstrap=0)
+            assert not reused
+
+            (train.ARTIFACTS_DIR / "model.joblib").unlink()
+            outputs, cached_metrics, reused = train_with_cache(df, cache, n_bootstrap=0)
+
+            assert reused
+            assert outputs.model_path.exists()
+            assert cached_metrics == metrics
+        finally:
+            train.ARTIFACTS_DIR = original_dir
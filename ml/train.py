@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import inspect
 import json
 from dataclasses import dataclass
 from pathlib import Path
@@ -8,36 +9,187 @@ from pathlib import Path
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    accuracy_score,
-    average_precision_score,
-    balanced_accuracy_score,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
+import sklearn
 from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     # For static analysis / type checkers, prefer the package import
-    from ml.data_loader import load_training_data_from_db  # pragma: no cover
+    from ml.age_group_models import fit_age_group_models  # pragma: no cover
+    from ml.calibration import (  # pragma: no cover
+        CALIBRATION_SIZE,
+        METHODS as CALIBRATION_METHODS,
+        fit_calibration,
+    )
+    from ml.data_cache import DATA_CACHE_PATH, read_training_cache  # pragma: no cover
+    from ml.data_loader import (  # pragma: no cover
+        DB_METHODS,
+        DEFAULT_PARTITIONS,
+        SNAPSHOT_VIEW,
+        TRAINING_COLUMNS,
+        load_training_data_from_db,
+    )
+    from ml.drift import feature_profile, save_profile  # pragma: no cover
+    from ml.feature_importance import DEFAULT_REPEATS, permutation_importance  # pragma: no cover
+    from ml.metrics_engine import evaluate_predictions, f1_at_thresholds  # pragma: no cover
+    from ml.predict import AgeGroupModel, CalibratedModel, Calibrator  # pragma: no cover
+    from ml.synthetic_data import (  # pragma: no cover
+        AGE_DISTRIBUTIONS,
+        SyntheticConfig,
+        iter_synthetic_chunks,
+        simulate_vitals,
+    )
+    from ml.fast_model import export_fast_model, is_exportable  # pragma: no cover
+    from ml.model_selection import (  # pragma: no cover
+        DEFAULT_LATENCY_BUDGET_MS,
+        ESTIMATORS,
+        SELECTION_METRIC,
+        SELECTION_SIZE,
+        build_estimator,
+        measure_latency,
+        select_model,
+    )
+    from ml.profiling import NULL_PROFILER, StageProfiler  # pragma: no cover
+    from ml.service.patient_reference import (  # pragma: no cover
+        REFERENCE_COLUMNS,
+        add_reference_features,
+    )
+    from ml.student_history import HISTORY_SOURCE_COLUMNS, add_history_features  # pragma: no cover
+    from ml.train_cache import (  # pragma: no cover
+        TrainingCache,
+        cache_key,
+        code_version,
+        dataset_fingerprint,
+    )
 else:
     # Runtime: try package import first, then fallback to local module import
     try:
-        from ml.data_loader import load_training_data_from_db
+        from ml.age_group_models import fit_age_group_models
+    except Exception:
+        from age_group_models import fit_age_group_models
+    try:
+        from ml.calibration import CALIBRATION_SIZE, METHODS as CALIBRATION_METHODS, fit_calibration
+    except Exception:
+        from calibration import CALIBRATION_SIZE, METHODS as CALIBRATION_METHODS, fit_calibration
+    try:
+        from ml.data_cache import DATA_CACHE_PATH, read_training_cache
+    except Exception:
+        from data_cache import DATA_CACHE_PATH, read_training_cache
+    try:
+        from ml.data_loader import (
+            DB_METHODS,
+            DEFAULT_PARTITIONS,
+            SNAPSHOT_VIEW,
+            TRAINING_COLUMNS,
+            load_training_data_from_db,
+        )
+    except Exception:
+        from data_loader import (
+            DB_METHODS,
+            DEFAULT_PARTITIONS,
+            SNAPSHOT_VIEW,
+            TRAINING_COLUMNS,
+            load_training_data_from_db,
+        )
+    try:
+        from ml.drift import feature_profile, save_profile
+    except Exception:
+        from drift import feature_profile, save_profile
+    try:
+        from ml.feature_importance import DEFAULT_REPEATS, permutation_importance
+    except Exception:
+        from feature_importance import DEFAULT_REPEATS, permutation_importance
+    try:
+        from ml.metrics_engine import evaluate_predictions, f1_at_thresholds
+    except Exception:
+        from metrics_engine import evaluate_predictions, f1_at_thresholds
+    try:
+        from ml.predict import AgeGroupModel, CalibratedModel, Calibrator
+    except Exception:
+        from predict import AgeGroupModel, CalibratedModel, Calibrator
+    try:
+        from ml.synthetic_data import (
+            AGE_DISTRIBUTIONS,
+            SyntheticConfig,
+            iter_synthetic_chunks,
+            simulate_vitals,
+        )
+    except Exception:
+        from synthetic_data import (
+            AGE_DISTRIBUTIONS,
+            SyntheticConfig,
+            iter_synthetic_chunks,
+            simulate_vitals,
+        )
+    try:
+        from ml.fast_model import export_fast_model, is_exportable
+    except Exception:
+        from fast_model import export_fast_model, is_exportable
+    try:
+        from ml.model_selection import (
+            DEFAULT_LATENCY_BUDGET_MS,
+            ESTIMATORS,
+            SELECTION_METRIC,
+            SELECTION_SIZE,
+            build_estimator,
+            measure_latency,
+            select_model,
+        )
+    except Exception:
+        from model_selection import (
+            DEFAULT_LATENCY_BUDGET_MS,
+            ESTIMATORS,
+            SELECTION_METRIC,
+            SELECTION_SIZE,
+            build_estimator,
+            measure_latency,
+            select_model,
+        )
+    try:
+        from ml.profiling import NULL_PROFILER, StageProfiler
+    except Exception:
+        from profiling import NULL_PROFILER, StageProfiler
+    try:
+        from ml.service.patient_reference import REFERENCE_COLUMNS, add_reference_features
+    except Exception:
+        from service.patient_reference import REFERENCE_COLUMNS, add_reference_features
+    try:
+        from ml.student_history import HISTORY_SOURCE_COLUMNS, add_history_features
+    except Exception:
+        from student_history import HISTORY_SOURCE_COLUMNS, add_history_features
+    try:
+        from ml.train_cache import TrainingCache, cache_key, code_version, dataset_fingerprint
     except Exception:
-        from data_loader import load_training_data_from_db
+        from train_cache import TrainingCache, cache_key, code_version, dataset_fingerprint
+
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 ARTIFACTS_DIR = REPO_ROOT / "ml" / "artifacts"
 EVAL_REPORT_PATH = ARTIFACTS_DIR / "eval_report.json"
+FEATURE_PROFILE_PATH = ARTIFACTS_DIR / "feature_profile.json"
+CALIBRATION_PATH = ARTIFACTS_DIR / "calibration.json"
+
+# Source files whose changes invalidate cached training results, including
+# the writers of every file a cached run restores (train_cache.RUN_FILES and
+# OPTIONAL_RUN_FILES); cached fit stages are pickled, hence the sklearn version
+CODE_VERSION = code_version(
+    [
+        Path(__file__),
+        Path(inspect.getfile(evaluate_predictions)),
+        Path(inspect.getfile(build_estimator)),
+        Path(inspect.getfile(fit_age_group_models)),
+        Path(inspect.getfile(permutation_importance)),
+        Path(inspect.getfile(fit_calibration)),
+        Path(inspect.getfile(export_fast_model)),
+        Path(inspect.getfile(feature_profile)),
+        Path(inspect.getfile(Calibrator)),
+        Path(inspect.getfile(add_history_features)),
+        Path(inspect.getfile(add_reference_features)),
+    ],
+    versions=[f"sklearn {sklearn.__version__}"],
+)
+
 
 @dataclass(frozen=True)
 class TrainOutputs:
@@ -47,45 +199,7 @@ class TrainOutputs:
 
 def make_synthetic_data(n: int = 2000, seed: int = 7) -> pd.DataFrame:
     """Generate synthetic medical vitals data with age-aware variation."""
-    rng = np.random.default_rng(seed)
-
-    age_years = rng.uniform(0, 100, size=n)
-    age_factor = np.clip((age_years - 18) / 50, 0, 1)
-
-    bp_systolic = rng.integers(90, 180, size=n) + (age_factor * 12)
-    bp_diastolic = rng.integers(60, 110, size=n) + (age_factor * 6)
-    heart_rate = rng.integers(50, 120, size=n) + (age_years < 12) * 15
-    temperature = rng.uniform(96.0, 102.0, size=n)
-    respiratory_rate = rng.integers(10, 30, size=n) + (age_years < 2) * 6
-    oxygen_saturation = rng.integers(85, 100, size=n)
-    pulse_pressure = bp_systolic - bp_diastolic
-    pain_level = rng.integers(0, 11, size=n)
-
-    risk_score = (
-        0.18 * ((bp_systolic > 140) | (bp_systolic < 90)).astype(int)
-        + 0.14 * ((bp_diastolic > 90) | (bp_diastolic < 60)).astype(int)
-        + 0.18 * (heart_rate > 100).astype(int)
-        + 0.14 * (temperature > 100.4).astype(int)
-        + 0.10 * (respiratory_rate > 20).astype(int)
-        + 0.10 * (oxygen_saturation < 95).astype(int)
-        + 0.10 * (pain_level >= 7).astype(int)
-        + 0.06 * (age_years > 70).astype(int)
-    ) + rng.normal(0, 0.12, size=n)
-
-    at_risk = (risk_score >= 0.45).astype(int)
-
-    return pd.DataFrame({
-        "age_years": age_years.round(1),
-        "bp_systolic": bp_systolic,
-        "bp_diastolic": bp_diastolic,
-        "heart_rate": heart_rate,
-        "temperature": temperature,
-        "respiratory_rate": respiratory_rate,
-        "oxygen_saturation": oxygen_saturation,
-        "pulse_pressure": pulse_pressure,
-        "pain_level": pain_level,
-        "at_risk": at_risk,
-    })
+    return simulate_vitals(np.random.default_rng(seed), n)
 
 
 def age_group(age: float) -> str:
@@ -102,129 +216,632 @@ def age_group(age: float) -> str:
 
 def best_threshold(y_true: np.ndarray, prob: np.ndarray) -> float:
     candidates = np.linspace(0.1, 0.9, 81)
-    best_t = 0.5
-    best_f1 = -1.0
-    for t in candidates:
-        pred = (prob >= t).astype(int)
-        score = f1_score(y_true, pred, zero_division=0)
-        if score > best_f1:
-            best_f1 = score
-            best_t = t
-    return float(best_t)
-
-
-def load_data(source: str, csv_path: Path | None = None, limit: int | None = None) -> pd.DataFrame:
-    """Load training data from specified source."""
+    scores = f1_at_thresholds(np.asarray(y_true), np.asarray(prob), candidates)
+    # First candidate wins ties, as in a strict ">" scan
+    return float(candidates[int(np.argmax(scores))])
+
+
+def load_data(
+    source: str,
+    csv_path: Path | None = None,
+    limit: int | None = None,
+    synthetic_rows: int | None = None,
+    synthetic_workers: int = 1,
+    synthetic_config: SyntheticConfig | None = None,
+    profiler: StageProfiler | None = None,
+    db_method: str = "stream",
+    cache_path: Path | None = None,
+    view_name: str = "ml_training_data",
+    db_partitions: int = DEFAULT_PARTITIONS,
+    student_history: bool = False,
+    patient_reference: bool = False,
+) -> pd.DataFrame:
+    """
+    Load training data from specified source.
+
+    For ``source="db"``, ``db_method`` picks the extraction path: a
+    server-side cursor (``"stream"``), ``COPY ... TO STDOUT`` (``"copy"``) or
+    ``db_partitions`` concurrent COPYs over id ranges (``"parallel"``), and
+    ``view_name`` the relation to read, e.g. the materialized
+    ``ml_training_snapshot`` from migrations/002.
+    ``source="cache"`` reads the local Parquet mirror kept by data_cache.py
+    without touching the database.
+
+    For ``source="synthetic"``, passing ``synthetic_rows`` streams that many
+    rows from the sharded generator (spread over ``synthetic_workers``
+    processes) instead of the small in-memory default.
+
+    ``student_history`` adds the point-in-time features of student_history.py;
+    the readings must carry student_id, submitted_at and graded_at
+    (migrations/005), so synthetic data is rejected. ``patient_reference``
+    likewise adds the reference deviation features of
+    service/patient_reference.py from the ref_* columns (migrations/006).
+    """
+    if source == "synthetic":
+        if student_history or patient_reference:
+            raise ValueError(
+                "Student history and patient reference features need real readings "
+                "(source db, cache or csv)"
+            )
+        if synthetic_rows is None and synthetic_config is None:
+            return make_synthetic_data()
+        chunks = iter_synthetic_chunks(
+            synthetic_rows or 2000,
+            workers=synthetic_workers,
+            config=synthetic_config,
+        )
+        return pd.concat(chunks, ignore_index=True)
+
+    keep = HISTORY_SOURCE_COLUMNS if student_history else ()
+    extra = REFERENCE_COLUMNS if patient_reference else ()
     if source == "db":
-        return load_training_data_from_db(limit=limit)
-    if source == "csv":
+        df = load_training_data_from_db(
+            limit=limit,
+            view_name=view_name,
+            profiler=profiler,
+            method=db_method,
+            columns=TRAINING_COLUMNS + keep + extra,
+            partitions=db_partitions,
+        )
+    elif source == "cache":
+        df = read_training_cache(cache_path or DATA_CACHE_PATH, keep=keep + extra)
+    elif source == "csv":
         if csv_path is None or not csv_path.exists():
             raise FileNotFoundError(f"CSV not found: {csv_path}")
         df = pd.read_csv(csv_path)
         if "at_risk" not in df.columns:
             raise ValueError("CSV must include target column 'at_risk'")
-        return df
-    if source == "synthetic":
-        return make_synthetic_data()
-    raise ValueError(f"Invalid source: {source}")
-
-
-def train_model(df: pd.DataFrame, seed: int = 7, threshold: float = 0.5) -> dict:
+    else:
+        raise ValueError(f"Invalid source: {source}")
+
+    if student_history:
+        with (profiler or NULL_PROFILER).stage("student_history", rows=len(df)):
+            df = add_history_features(df)
+    if patient_reference:
+        with (profiler or NULL_PROFILER).stage("patient_reference", rows=len(df)):
+            df = add_reference_features(df)
+    return df
+
+
+def train_model(
+    df: pd.DataFrame,
+    seed: int = 7,
+    threshold: float = 0.5,
+    n_bootstrap: int = 200,
+    cache: TrainingCache | None = None,
+    data_fingerprint: str | None = None,
+    profiler: StageProfiler | None = None,
+    estimator: str = "logreg",
+    latency_budget_ms: float | None = None,
+    per_age_group: bool = False,
+    group_workers: int | None = None,
+    importance_repeats: int = DEFAULT_REPEATS,
+    importance_workers: int | None = 1,
+    calibration: str | None = None,
+) -> dict:
+    """
+    Fit the risk model and evaluate it on a held-out split.
+
+    ``estimator`` names a model from ``model_selection.ESTIMATORS`` or is
+    ``"auto"`` to fit them all. When several candidates are fitted or a
+    ``latency_budget_ms`` is given, single-row and batch inference latency is
+    measured for each candidate and the best model whose single-row p99 fits
+    the budget is kept; the measurements go to ``metrics["model_selection"]``.
+    Candidates are compared on SELECTION_SIZE of the training split, held out
+    from the fit, so the test metrics are not biased by the choice; the
+    selected candidate is then refitted with those rows added back.
+
+    ``per_age_group`` fits each candidate as a global model plus one model
+    per age group (age_group_models.py) on ``group_workers`` processes; the
+    group split goes to ``metrics["age_group_models"]``.
+
+    ``importance_repeats`` shuffles of each test column (feature_importance.py,
+    on ``importance_workers`` processes) give the permutation importances in
+    ``eval_report["feature_importance"]``; 0 skips the stage.
+
+    ``calibration`` ("isotonic" or "platt") holds out CALIBRATION_SIZE of the
+    training split, fits a calibration map on it (calibration.py) and reports
+    thresholds and metrics on calibrated probabilities; the table is returned
+    as ``out["calibration"]``.
+
+    With ``cache``, the cleaned train/test split and the fitted model are
+    looked up by dataset fingerprint, seed and code version before being
+    recomputed, so changing only ``threshold`` or ``n_bootstrap`` skips the fit.
+    ``profiler`` records wall time and peak memory for each stage.
+    """
+    prof = profiler or NULL_PROFILER
     if "age_years" not in df.columns:
         raise ValueError("Training data must include age_years column.")
 
-    feature_cols = [c for c in df.columns if c != "at_risk"]
-    X = df[feature_cols].astype(float)
-    y = df["at_risk"].astype(int)
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.25, random_state=seed, stratify=y
-    )
-
-    model = Pipeline([
-        ("scaler", StandardScaler()),
-        ("clf", LogisticRegression(max_iter=2000, class_weight="balanced")),
-    ])
-    model.fit(X_train, y_train)
-
-    prob = model.predict_proba(X_test)[:, 1]
+    candidates = sorted(ESTIMATORS) if estimator == "auto" else [estimator]
+    for name in candidates:
+        if name not in ESTIMATORS:
+            raise ValueError(f"Unknown estimator: {name}. Choose from {sorted(ESTIMATORS)} or 'auto'")
 
-    age_groups = pd.Series(X_test["age_years"].values, index=X_test.index).map(age_group)
-    group_thresholds = {
-        group: best_threshold(y_test[age_groups == group], prob[age_groups == group])
-        for group in sorted(age_groups.unique())
-    }
-
-    pred = (prob >= threshold).astype(int)
+    feature_cols = [c for c in df.columns if c != "at_risk"]
 
-    cm = confusion_matrix(y_test, pred, labels=[0, 1])
-    tn, fp, fn, tp = int(cm[0, 0]), int(cm[0, 1]), int(cm[1, 0]), int(cm[1, 1])
+    split_key = None
+    if cache is not None:
+        data_fingerprint = data_fingerprint or dataset_fingerprint(df)
+        split_key = cache_key(data_fingerprint, {"seed": seed, "test_size": 0.25}, CODE_VERSION)
+
+    split = cache.get("split", split_key) if cache is not None and split_key else None
+    if split is None:
+        with prof.stage("coerce", rows=len(df)):
+            X = df[feature_cols].astype(float)
+            y = df["at_risk"].astype(int)
+        with prof.stage("split", rows=len(df)):
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.25, random_state=seed, stratify=y
+            )
+        split = {
+            "X_train": X_train,
+            "X_test": X_test,
+            "y_train": y_train,
+            "y_test": y_test,
+            "positive_rate": float(y.mean()),
+        }
+        if cache is not None and split_key:
+            cache.put("split", split_key, split)
+    X_train, X_test = split["X_train"], split["X_test"]
+    y_train, y_test = split["y_train"], split["y_test"]
+    selecting = len(candidates) > 1 or latency_budget_ms is not None
+    if selecting:
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_train, y_train, test_size=SELECTION_SIZE, random_state=seed, stratify=y_train
+        )
+    if calibration is not None:
+        if calibration not in CALIBRATION_METHODS:
+            raise ValueError(f"Unknown calibration: {calibration}. Choose from {list(CALIBRATION_METHODS)}")
+        X_train, X_cal, y_train, y_cal = train_test_split(
+            X_train, y_train, test_size=CALIBRATION_SIZE, random_state=seed, stratify=y_train
+        )
+
+    def fit(
+        name: str, X_fit: pd.DataFrame, y_fit: pd.Series, stage: str, **config: Any
+    ) -> tuple[Any, Any]:
+        # Fitted model (cached by split, candidate and config) and its age-group summary
+        fit_config = {
+            "estimator": name,
+            **({"per_age_group": True} if per_age_group else {}),
+            **({"selection_size": SELECTION_SIZE} if selecting else {}),
+            **({"calibration_size": CALIBRATION_SIZE} if calibration is not None else {}),
+            **config,
+        }
+        fit_key = cache_key(split_key, fit_config) if split_key else None
+        cached = cache.get("fit", fit_key) if cache is not None and fit_key else None
+        if per_age_group:
+            if cached is not None:
+                return AgeGroupModel.from_bundle(cached["bundle"]), cached["summary"]
+            with prof.stage(stage, rows=len(X_fit)):
+                model, summary = fit_age_group_models(X_fit, y_fit, name, seed, workers=group_workers)
+            if cache is not None and fit_key:
+                cache.put("fit", fit_key, {"bundle": model.to_bundle(), "summary": summary})
+            return model, summary
+        if cached is not None:
+            return cached, None
+        model = build_estimator(name, seed)
+        with prof.stage(stage, rows=len(X_fit)):
+            model.fit(X_fit, y_fit)
+        if cache is not None and fit_key:
+            cache.put("fit", fit_key, model)
+        return model, None
+
+    fitted = {}
+    group_summaries = {}
+    for name in candidates:
+        stage = "fit" if len(candidates) == 1 else f"fit:{name}"
+        fitted[name], group_summaries[name] = fit(name, X_train, y_train, stage)
+
+    selection = None
+    selected = candidates[0]
+    if selecting:
+        budget = DEFAULT_LATENCY_BUDGET_MS if latency_budget_ms is None else latency_budget_ms
+        summary = {}
+        for name, candidate in fitted.items():
+            with prof.stage(f"latency:{name}"):
+                latency = measure_latency(candidate, X_val.iloc[:1000])
+            score = evaluate_predictions(
+                y_val.to_numpy(), candidate.predict_proba(X_val)[:, 1], threshold=threshold
+            )["overall"][SELECTION_METRIC]
+            summary[name] = {
+                SELECTION_METRIC: score,
+                "latency": latency,
+                "within_budget": latency["single_row"]["p99_ms"] <= budget,
+            }
+        selected = select_model(summary, budget)
+        selection = {
+            "latency_budget_ms": budget,
+            "metric": SELECTION_METRIC,
+            "validation_rows": len(X_val),
+            "selected": selected,
+            "candidates": summary,
+        }
+        # The validation rows only served the choice; fit the winner on them too
+        X_train, y_train = pd.concat([X_train, X_val]), pd.concat([y_train, y_val])
+        fitted[selected], group_summaries[selected] = fit(selected, X_train, y_train, "refit", refit=True)
+    model = fitted[selected]
+
+    table = None
+    scorer = model
+    if calibration is not None:
+        with prof.stage("calibration", rows=len(X_cal)):
+            table = fit_calibration(
+                model.predict_proba(X_cal)[:, 1],
+                y_cal.to_numpy(),
+                X_cal["age_years"].to_numpy(),
+                method=calibration,
+            )
+        # Score the way predict.load_model serves it
+        scorer = CalibratedModel(model, Calibrator(table))
+
+    with prof.stage("predict", rows=len(X_test)):
+        prob = scorer.predict_proba(X_test)[:, 1]
+
+    # Reference distributions for the service's drift monitor
+    with prof.stage("feature_profile", rows=len(X_train)):
+        profile = feature_profile(X_train)
+
+    with prof.stage("threshold_search", rows=len(X_test)):
+        age_groups = pd.Series(X_test["age_years"].values, index=X_test.index).map(age_group)
+        group_thresholds = {
+            group: best_threshold(y_test[age_groups == group], prob[age_groups == group])
+            for group in sorted(age_groups.unique())
+        }
+
+    with prof.stage("metrics", rows=len(X_test)):
+        report = evaluate_predictions(
+            y_test.to_numpy(),
+            prob,
+            threshold=threshold,
+            groups=age_groups.to_numpy(),
+            n_bootstrap=n_bootstrap,
+            seed=seed,
+        )
+    overall = report["overall"]
+    intervals = report.get("confidence_intervals", {})
+
+    importance = None
+    if importance_repeats > 0:
+        with prof.stage("feature_importance", rows=len(X_test)):
+            importance = permutation_importance(
+                scorer,
+                X_test,
+                y_test,
+                n_repeats=importance_repeats,
+                seed=seed,
+                workers=importance_workers,
+                threshold=threshold,
+            )
 
     eval_report = {
-        "overall": {
-            "accuracy": float(accuracy_score(y_test, pred)),
-            "balanced_accuracy": float(balanced_accuracy_score(y_test, pred)),
-            "precision": float(precision_score(y_test, pred, zero_division=0)),
-            "recall": float(recall_score(y_test, pred, zero_division=0)),
-            "f1": float(f1_score(y_test, pred, zero_division=0)),
-            "roc_auc": float(roc_auc_score(y_test, prob)),
-            "pr_auc": float(average_precision_score(y_test, prob)),
-            "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
-        },
+        "overall": overall,
+        "confidence_intervals": intervals,
+        "by_age_group": report["by_group"],
         "age_group_thresholds": group_thresholds,
+        **({"feature_importance": importance} if importance is not None else {}),
     }
 
     return {
         "model": model,
         "metrics": {
             "n_rows": int(df.shape[0]),
-            "n_features": int(X.shape[1]),
-            "positive_rate": float(y.mean()),
+            "n_features": len(feature_cols),
+            "positive_rate": split["positive_rate"],
             "threshold": float(threshold),
             "age_group_thresholds": group_thresholds,
-            "accuracy": float(accuracy_score(y_test, pred)),
-            "balanced_accuracy": float(balanced_accuracy_score(y_test, pred)),
-            "precision": float(precision_score(y_test, pred, zero_division=0)),
-            "recall": float(recall_score(y_test, pred, zero_division=0)),
-            "f1": float(f1_score(y_test, pred, zero_division=0)),
-            "roc_auc": float(roc_auc_score(y_test, prob)),
-            "pr_auc": float(average_precision_score(y_test, prob)),
-            "confusion_matrix": {"tn": tn, "fp": fp, "fn": fn, "tp": tp},
+            **overall,
+            "confidence_intervals": intervals,
             "feature_names": feature_cols,
+            "estimator": selected,
+            **({"model_selection": selection} if selection is not None else {}),
+            **({"age_group_models": group_summaries[selected]} if per_age_group else {}),
+            **(
+                {"calibration": {"method": calibration, "groups": sorted(table["groups"])}}
+                if table is not None
+                else {}
+            ),
         },
         "eval_report": eval_report,
+        "feature_profile": profile,
+        "calibration": table,
     }
 
 
-def save_artifacts(model, metrics: dict, eval_report: dict | None = None) -> TrainOutputs:
-    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
-    model_path = ARTIFACTS_DIR / "model.joblib"
-    metrics_path = ARTIFACTS_DIR / "metrics.json"
-    joblib.dump(model, model_path)
+def save_artifacts(
+    model,
+    metrics: dict,
+    eval_report: dict | None = None,
+    artifacts_dir: Path | None = None,
+    profile: dict | None = None,
+    calibration: dict | None = None,
+) -> TrainOutputs:
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    artifacts_dir.mkdir(parents=True, exist_ok=True)
+    model_path = artifacts_dir / "model.joblib"
+    metrics_path = artifacts_dir / "metrics.json"
+    # AgeGroupModel is saved as a plain dict of estimators, loaded back by predict.load_model
+    to_bundle = getattr(model, "to_bundle", None)
+    joblib.dump(to_bundle() if to_bundle is not None else model, model_path)
+
+    # Pickle-free copy for fast loading; drop a stale one if this model can't be exported
+    fast_path = artifacts_dir / "model.gvm"
+    if is_exportable(model) and "feature_names" in metrics:
+        export_fast_model(
+            model,
+            fast_path,
+            feature_names=metrics["feature_names"],
+            threshold=metrics.get("threshold", 0.5),
+            group_thresholds=metrics.get("age_group_thresholds"),
+            metadata={"n_rows": metrics.get("n_rows"), "sklearn_version": sklearn.__version__},
+        )
+    elif fast_path.exists():
+        fast_path.unlink()
+
     metrics_path.write_text(json.dumps(metrics, indent=2))
     if eval_report is not None:
-        EVAL_REPORT_PATH.write_text(json.dumps(eval_report, indent=2))
+        (artifacts_dir / EVAL_REPORT_PATH.name).write_text(json.dumps(eval_report, indent=2))
+    profile_path = artifacts_dir / FEATURE_PROFILE_PATH.name
+    if profile is not None:
+        save_profile(profile, profile_path)
+    elif profile_path.exists():
+        profile_path.unlink()
+    # predict.load_model applies calibration.json whenever it sits next to the model
+    calibration_path = artifacts_dir / CALIBRATION_PATH.name
+    if calibration is not None:
+        calibration_path.write_text(json.dumps(calibration))
+    elif calibration_path.exists():
+        calibration_path.unlink()
     return TrainOutputs(model_path=model_path, metrics_path=metrics_path)
 
 
+def train_with_cache(
+    df: pd.DataFrame,
+    cache: TrainingCache,
+    seed: int = 7,
+    threshold: float = 0.5,
+    n_bootstrap: int = 200,
+    profiler: StageProfiler | None = None,
+    estimator: str = "logreg",
+    latency_budget_ms: float | None = None,
+    per_age_group: bool = False,
+    group_workers: int | None = None,
+    importance_repeats: int = DEFAULT_REPEATS,
+    importance_workers: int | None = 1,
+    calibration: str | None = None,
+) -> tuple[TrainOutputs, dict, bool]:
+    """
+    Train and save artifacts, reusing a cached run when data, config and code match.
+
+    Returns the written outputs, the metrics and whether the run came from cache.
+    """
+    fingerprint = dataset_fingerprint(df)
+    config = {
+        "seed": seed,
+        "threshold": threshold,
+        "n_bootstrap": n_bootstrap,
+        "estimator": estimator,
+        "latency_budget_ms": latency_budget_ms,
+        **({"per_age_group": True} if per_age_group else {}),
+        "importance_repeats": importance_repeats,
+        **({"calibration": calibration} if calibration is not None else {}),
+    }
+    run_key = cache_key(fingerprint, config, CODE_VERSION)
+
+    outputs = TrainOutputs(
+        model_path=ARTIFACTS_DIR / "model.joblib",
+        metrics_path=ARTIFACTS_DIR / "metrics.json",
+    )
+    if cache.restore_run(run_key, ARTIFACTS_DIR):
+        return outputs, json.loads(outputs.metrics_path.read_text()), True
+
+    out = train_model(
+        df,
+        seed=seed,
+        threshold=threshold,
+        n_bootstrap=n_bootstrap,
+        cache=cache,
+        data_fingerprint=fingerprint,
+        profiler=profiler,
+        estimator=estimator,
+        latency_budget_ms=latency_budget_ms,
+        per_age_group=per_age_group,
+        group_workers=group_workers,
+        importance_repeats=importance_repeats,
+        importance_workers=importance_workers,
+        calibration=calibration,
+    )
+    with (profiler or NULL_PROFILER).stage("dump"):
+        outputs = save_artifacts(
+            out["model"],
+            out["metrics"],
+            out["eval_report"],
+            profile=out["feature_profile"],
+            calibration=out["calibration"],
+        )
+    cache.store_run(run_key, ARTIFACTS_DIR)
+    return outputs, out["metrics"], False
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Train ML model for vitals risk prediction")
-    parser.add_argument("--source", choices=["db", "csv", "synthetic"], default="db")
+    parser.add_argument("--source", choices=["db", "cache", "csv", "synthetic"], default="db")
     parser.add_argument("--csv", type=str, default="")
+    parser.add_argument(
+        "--view",
+        type=str,
+        default="ml_training_data",
+        help=f"Relation read by --source db; use {SNAPSHOT_VIEW} for the materialized snapshot",
+    )
+    parser.add_argument(
+        "--data-cache",
+        type=str,
+        default="",
+        help="Parquet cache for --source cache (default: ml/.cache/data); sync with data_cache.py",
+    )
+    parser.add_argument(
+        "--db-method",
+        choices=list(DB_METHODS),
+        default="stream",
+        help="How --source db extracts rows: server-side cursor, COPY, or parallel COPY of id ranges",
+    )
+    parser.add_argument(
+        "--db-partitions",
+        type=int,
+        default=DEFAULT_PARTITIONS,
+        help="Id ranges (and connections) used by --db-method parallel",
+    )
+    parser.add_argument(
+        "--student-history",
+        action="store_true",
+        help="Add point-in-time per-student history features (needs db, cache or csv readings)",
+    )
+    parser.add_argument(
+        "--patient-reference",
+        action="store_true",
+        help="Add deviation-from-correct-vitals features (needs db, cache or csv readings)",
+    )
     parser.add_argument("--limit", type=int, default=None)
     parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument(
+        "--bootstrap", type=int, default=200, help="Bootstrap resamples for metric CIs (0 disables)"
+    )
+    parser.add_argument(
+        "--estimator",
+        choices=sorted(ESTIMATORS) + ["auto"],
+        default="logreg",
+        help="Model family; 'auto' fits all and picks the best within the latency budget",
+    )
+    parser.add_argument(
+        "--latency-budget-ms",
+        type=float,
+        default=None,
+        help=(
+            "Single-row p99 predict_proba budget used for model selection "
+            f"(default with --estimator auto: {DEFAULT_LATENCY_BUDGET_MS:g})"
+        ),
+    )
+    parser.add_argument(
+        "--per-age-group",
+        action="store_true",
+        help="Fit one model per age group plus a global fallback, routed by age at serve time",
+    )
+    parser.add_argument(
+        "--group-workers",
+        type=int,
+        default=None,
+        help="Processes for the --per-age-group fits (default: one per fit, up to the CPU count)",
+    )
+    parser.add_argument(
+        "--importance-repeats",
+        type=int,
+        default=DEFAULT_REPEATS,
+        help="Shuffles per feature for permutation importance in eval_report.json (0 disables)",
+    )
+    parser.add_argument(
+        "--importance-workers",
+        type=int,
+        default=None,
+        help="Processes for permutation importance (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--calibration",
+        choices=list(CALIBRATION_METHODS),
+        default=None,
+        help="Fit a calibration map on held-out training rows; predict.py applies it to probabilities",
+    )
+    parser.add_argument(
+        "--cache", action="store_true", help="Reuse cached runs/fits when data, config and code match"
+    )
+    parser.add_argument("--cache-dir", type=str, default="")
+    parser.add_argument(
+        "--profile", action="store_true", help="Record wall time and peak memory per pipeline stage"
+    )
+    parser.add_argument("--profile-out", type=str, default="", help="Write the stage profile as JSON")
+    parser.add_argument("--synthetic-rows", type=int, default=None)
+    parser.add_argument("--synthetic-workers", type=int, default=1)
+    parser.add_argument("--positive-rate", type=float, default=None)
+    parser.add_argument(
+        "--age-distribution", choices=sorted(AGE_DISTRIBUTIONS), default="uniform"
+    )
     args = parser.parse_args()
 
     csv_path = Path(args.csv).expanduser().resolve() if args.csv else None
-    df = load_data(args.source, csv_path, args.limit if args.source == "db" else None)
-    out = train_model(df, threshold=args.threshold)
-    outputs = save_artifacts(out["model"], out["metrics"], out.get("eval_report"))
-
-    print("Training complete")
+    synthetic_config = None
+    if args.positive_rate is not None or args.age_distribution != "uniform":
+        synthetic_config = SyntheticConfig(
+            positive_rate=args.positive_rate,
+            age_distribution=args.age_distribution,
+        )
+    profiler = StageProfiler(enabled=args.profile)
+    with profiler.stage("load"):
+        df = load_data(
+            args.source,
+            csv_path,
+            args.limit if args.source == "db" else None,
+            synthetic_rows=args.synthetic_rows,
+            synthetic_workers=args.synthetic_workers,
+            synthetic_config=synthetic_config,
+            profiler=profiler,
+            db_method=args.db_method,
+            cache_path=Path(args.data_cache).expanduser().resolve() if args.data_cache else None,
+            view_name=args.view,
+            db_partitions=args.db_partitions,
+            student_history=args.student_history,
+            patient_reference=args.patient_reference,
+        )
+    if args.cache:
+        cache_dir = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else None
+        cache = TrainingCache(cache_dir) if cache_dir else TrainingCache()
+        outputs, metrics, reused = train_with_cache(
+            df,
+            cache,
+            threshold=args.threshold,
+            n_bootstrap=args.bootstrap,
+            profiler=profiler,
+            estimator=args.estimator,
+            latency_budget_ms=args.latency_budget_ms,
+            per_age_group=args.per_age_group,
+            group_workers=args.group_workers,
+            importance_repeats=args.importance_repeats,
+            importance_workers=args.importance_workers,
+            calibration=args.calibration,
+        )
+    else:
+        out = train_model(
+            df,
+            threshold=args.threshold,
+            n_bootstrap=args.bootstrap,
+            profiler=profiler,
+            estimator=args.estimator,
+            latency_budget_ms=args.latency_budget_ms,
+            per_age_group=args.per_age_group,
+            group_workers=args.group_workers,
+            importance_repeats=args.importance_repeats,
+            importance_workers=args.importance_workers,
+            calibration=args.calibration,
+        )
+        with profiler.stage("dump"):
+            outputs = save_artifacts(
+                out["model"],
+                out["metrics"],
+                out.get("eval_report"),
+                profile=out.get("feature_profile"),
+                calibration=out.get("calibration"),
+            )
+        metrics, reused = out["metrics"], False
+
+    print("Training complete" + (" (reused cached artifacts)" if reused else ""))
     print(f"Source: {args.source}")
     print(f"Model:   {outputs.model_path}")
     print(f"Metrics: {outputs.metrics_path}")
-    print(json.dumps(out["metrics"], indent=2))
+    print(json.dumps(metrics, indent=2))
+
+    if args.profile:
+        print("Stage profile:")
+        print(profiler.format_table())
+        if args.profile_out:
+            profiler.write_json(Path(args.profile_out).expanduser().resolve())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+"""
+Content-addressed cache for training runs and their intermediate stages.
+
+Keys are SHA-256 digests over the dataset fingerprint, the training config
+and the code version, so a cached entry is reused only when all three match.
+
+Layout under the cache root:
+    runs/<key>/          model.joblib, metrics.json, eval_report.json (+ model.gvm)
+    stages/<stage>/<key>.joblib   intermediate results (cleaned split, fitted model)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Iterable
+
+import joblib
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = REPO_ROOT / "ml" / ".cache" / "train"
+
+RUN_FILES = ("model.joblib", "metrics.json", "eval_report.json")
+# model.gvm exists only for models that support the fast artifact format;
+# feature_profile.json is missing from runs cached before it was introduced;
+# calibration.json exists only for --calibration runs
+OPTIONAL_RUN_FILES = ("model.gvm", "feature_profile.json", "calibration.json")
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Stable hash of a DataFrame's contents.
+
+    Independent of column order and row order: columns are sorted by name and
+    the per-row hashes are sorted before being digested. Column dtypes are part
+    of the fingerprint.
+    """
+    cols = sorted(str(c) for c in df.columns)
+    frame = df.rename(columns=str)[cols]
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy(copy=True)
+    row_hashes.sort()
+
+    h = hashlib.sha256()
+    h.update(json.dumps([[c, str(frame[c].dtype)] for c in cols]).encode())
+    h.update(row_hashes.tobytes())
+    return h.hexdigest()
+
+
+def code_version(paths: Iterable[Path], versions: Iterable[str] = ()) -> str:
+    """Hash of the source files (and library ``versions``) that determine training output."""
+    h = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    for version in versions:
+        h.update(version.encode())
+    return h.hexdigest()[:16]
+
+
+def cache_key(*parts: Any) -> str:
+    """Digest of JSON-serializable key parts (dict keys are sorted)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _install(src: Path, dst: Path) -> None:
+    # Copy then rename: readers never see a partial file (or a rewritten mmap),
+    # and the fresh mtime marks the restored file as current
+    tmp = dst.with_name(f"{dst.name}.tmp{os.getpid()}")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class TrainingCache:
+    """Local on-disk cache of training artifacts and intermediate stages."""
+
+    def __init__(self, root: Path = CACHE_DIR):
+        self.root = Path(root)
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+    def _count(self, table: dict[str, int], stage: str) -> None:
+        table[stage] = table.get(stage, 0) + 1
+
+    # Intermediate stages -------------------------------------------------
+
+    def _stage_path(self, stage: str, key: str) -> Path:
+        return self.root / "stages" / stage / f"{key}.joblib"
+
+    def get(self, stage: str, key: str) -> Any | None:
+        path = self._stage_path(stage, key)
+        if not path.exists():
+            self._count(self.misses, stage)
+            return None
+        self._count(self.hits, stage)
+        return joblib.load(path)
+
+    def put(self, stage: str, key: str, value: Any) -> None:
+        path = self._stage_path(stage, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        joblib.dump(value, tmp)
+        os.replace(tmp, path)
+
+    # Complete runs -------------------------------------------------------
+
+    def _run_dir(self, key: str) -> Path:
+        return self.root / "runs" / key
+
+    def has_run(self, key: str) -> bool:
+        run_dir = self._run_dir(key)
+        return all((run_dir / name).exists() for name in RUN_FILES)
+
+    def store_run(self, key: str, artifacts_dir: Path) -> None:
+        run_dir = self._run_dir(key)
+        tmp = run_dir.with_name(f"{key}.tmp{os.getpid()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        for name in RUN_FILES:
+            shutil.copy2(artifacts_dir / name, tmp / name)
+        for name in OPTIONAL_RUN_FILES:
+            if (artifacts_dir / name).exists():
+                shutil.copy2(artifacts_dir / name, tmp / name)
+        if run_dir.exists():
+            shutil.rmtree(run_dir)
+        os.replace(tmp, run_dir)
+
+    def restore_run(self, key: str, artifacts_dir: Path) -> bool:
+        """Copy a cached run into ``artifacts_dir``; False if there is no complete entry."""
+        if not self.has_run(key):
+            self._count(self.misses, "run")
+            return False
+        self._count(self.hits, "run")
+        artifacts_dir.mkdir(parents=True, exist_ok=True)
+        run_dir = self._run_dir(key)
+        for name in RUN_FILES:
+            _install(run_dir / name, artifacts_dir / name)
+        for name in OPTIONAL_RUN_FILES:
+            if (run_dir / name).exists():
+                _install(run_dir / name, artifacts_dir / name)
+            elif (artifacts_dir / name).exists():
+                (artifacts_dir / name).unlink()
+        return True